@@ -0,0 +1,185 @@
+# JoyApp/archivo_tickets.py
+"""
+Archivo de tickets emitidos: un puñado de archivos de segmento en vez de un
+.txt por venta.
+
+Cada ticket se guarda como un registro comprimido (zlib, con un diccionario
+fijo de las claves y textos que se repiten en todos los tickets) al final del
+segmento vigente, `tickets/tickets_NNNN.seg` junto a la base. Cuando el
+segmento pasa de TAM_SEGMENTO se empieza otro. La tabla tickets_archivo
+indexa venta_id -> (segmento, desplazamiento, largo): leer un ticket es una
+búsqueda por la PK, un seek y una lectura.
+
+Se guardan los datos del ticket (encabezado, items, pagos, totales), no el
+texto impreso, así la reimpresión sale por cualquier impresora sin volver a
+consultar ventas/ítems/pagos.
+
+Registro: b"JT" | versión (1 byte) | crc32 (4) | largo (4) | datos comprimidos.
+
+    python -m JoyApp.archivo_tickets 1234      # muestra el ticket de la venta #1234
+"""
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+from . import db
+from .db import get_conn
+
+# La tabla tickets_archivo la crea migraciones (v9).
+TAM_SEGMENTO = 16 * 1024 * 1024
+MAGIA = b"JT"
+VERSION = 1
+_CABECERA = struct.Struct("<2sBII")  # magia, versión, crc32, largo
+
+# Diccionario de compresión de la versión 1. NO modificar: los registros ya
+# escritos se descomprimen con él (para cambiarlo, agregar una versión nueva).
+_DICCIONARIOS = {
+    1: (
+        '"subtotal": "detalle": null, "descripcion": "Oro 18k", "Plata 925"'
+        '"metodo": "EFECTIVO", "monto": "metodo": "TARJETA", "metodo": "TRANSFERENCIA", '
+        '"totales": {"total": }}'
+        '"pagos": [{"items": [{"modalidad": "MENOR", "modalidad": "MAYOR", "vendedor": '
+        '"emitido": "2025-"ticket_id": "telefono": "000-000-000", '
+        '{"encabezado": {"nombre": "ESTELA JOYAS", '
+    ).encode("utf-8"),
+}
+
+
+def carpeta() -> Path:
+    """Carpeta de los segmentos (junto a la base en uso)."""
+    return Path(db.DB_PATH).resolve().parent / "tickets"
+
+
+def ruta_segmento(numero: int) -> Path:
+    return carpeta() / f"tickets_{numero:04d}.seg"
+
+
+def _comprimir(datos: Dict[str, Any]) -> bytes:
+    crudo = json.dumps(datos, ensure_ascii=False, separators=(", ", ": ")).encode("utf-8")
+    c = zlib.compressobj(9, zdict=_DICCIONARIOS[VERSION])
+    return c.compress(crudo) + c.flush()
+
+
+def _descomprimir(version: int, comprimido: bytes) -> Dict[str, Any]:
+    d = zlib.decompressobj(zdict=_DICCIONARIOS[version])
+    return json.loads(d.decompress(comprimido) + d.flush())
+
+
+class ArchivoTickets:
+    def guardar(self, venta_id: int, datos: Dict[str, Any]) -> bool:
+        """
+        Agrega el ticket de la venta. Si la venta ya tiene uno guardado no hace
+        nada (queda el original, no las reimpresiones). Devuelve True si lo escribió.
+        """
+        con = get_conn()
+        # El lock de escritura de la base ordena también a los que agregan al segmento,
+        # aunque sean de otro proceso
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if con.execute("SELECT 1 FROM tickets_archivo WHERE venta_id = ?", (venta_id,)).fetchone():
+                con.rollback()
+                return False
+            comprimido = _comprimir(datos)
+            registro = _CABECERA.pack(MAGIA, VERSION, zlib.crc32(comprimido), len(comprimido)) + comprimido
+
+            numero = con.execute("SELECT COALESCE(MAX(segmento), 1) FROM tickets_archivo").fetchone()[0]
+            ruta = ruta_segmento(numero)
+            if ruta.exists() and ruta.stat().st_size + len(registro) > TAM_SEGMENTO:
+                numero += 1
+                ruta = ruta_segmento(numero)
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            with open(ruta, "ab") as f:
+                desplazamiento = f.tell()
+                f.write(registro)
+            # Si se corta entre la escritura y el commit quedan bytes huérfanos al final
+            # del segmento, que nadie indexa: no hace falta repararlos
+            con.execute(
+                "INSERT INTO tickets_archivo (venta_id, segmento, desplazamiento, largo, guardado) "
+                "VALUES (?, ?, ?, ?, datetime('now'))",
+                (venta_id, numero, desplazamiento, len(comprimido)),
+            )
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        return True
+
+    def leer(self, venta_id: int) -> Dict[str, Any] | None:
+        """Datos del ticket de la venta, o None si no está en el archivo (o el registro está dañado)."""
+        row = get_conn().execute(
+            "SELECT segmento, desplazamiento, largo FROM tickets_archivo WHERE venta_id = ?", (venta_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        segmento, desplazamiento, largo = row
+        try:
+            with open(ruta_segmento(segmento), "rb") as f:
+                f.seek(desplazamiento)
+                bloque = f.read(_CABECERA.size + largo)
+        except OSError:
+            return None
+        return self._decodificar(bloque, largo)
+
+    @staticmethod
+    def _decodificar(bloque: bytes, largo: int) -> Dict[str, Any] | None:
+        if len(bloque) < _CABECERA.size + largo:
+            return None
+        magia, version, crc, largo_registro = _CABECERA.unpack_from(bloque)
+        comprimido = bloque[_CABECERA.size:_CABECERA.size + largo]
+        if (magia != MAGIA or version not in _DICCIONARIOS or largo_registro != largo
+                or zlib.crc32(comprimido) != crc):
+            return None
+        return _descomprimir(version, comprimido)
+
+    def recorrer(self) -> Iterator[Tuple[int, Dict[str, Any] | None]]:
+        """(venta_id, datos) de todo el archivo, en el orden físico de los segmentos."""
+        filas = get_conn().execute(
+            "SELECT venta_id, segmento, desplazamiento, largo FROM tickets_archivo "
+            "ORDER BY segmento, desplazamiento"
+        ).fetchall()
+        abierto, f = None, None
+        try:
+            for venta_id, segmento, desplazamiento, largo in filas:
+                if segmento != abierto:
+                    if f is not None:
+                        f.close()
+                    f, abierto = open(ruta_segmento(segmento), "rb"), segmento
+                f.seek(desplazamiento)
+                yield venta_id, self._decodificar(f.read(_CABECERA.size + largo), largo)
+        finally:
+            if f is not None:
+                f.close()
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Cantidad de tickets, segmentos y bytes en disco."""
+        tickets, segmentos = get_conn().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT segmento) FROM tickets_archivo"
+        ).fetchone()
+        bytes_disco = sum(os.path.getsize(p) for p in carpeta().glob("tickets_*.seg"))
+        return {"tickets": tickets, "segmentos": segmentos, "bytes": bytes_disco}
+
+
+# Instancia única para toda la app
+ARCHIVO = ArchivoTickets()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .printing import PLANTILLA_TEXTO
+
+    parser = argparse.ArgumentParser(description="Consulta el archivo de tickets")
+    parser.add_argument("venta_id", type=int, nargs="?", help="muestra el ticket de esta venta")
+    args = parser.parse_args()
+
+    if args.venta_id is None:
+        e = ARCHIVO.estadisticas()
+        print(f"🗄️  {e['tickets']} tickets en {e['segmentos']} segmentos ({e['bytes'] / 1024:,.1f} KB) — {carpeta()}")
+    else:
+        d = ARCHIVO.leer(args.venta_id)
+        if d is None:
+            raise SystemExit(f"❌ La venta #{args.venta_id} no tiene ticket archivado.")
+        print(PLANTILLA_TEXTO.renderizar(d["encabezado"], d["items"], d["pagos"], d["totales"]).decode("utf-8"))
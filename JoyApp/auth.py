@@ -1,27 +1,229 @@
 # JoyApp/auth.py
+"""
+Usuarios y contraseñas (bcrypt).
+
+El costo de bcrypt se calibra una vez por equipo para que verificar tarde
+~OBJETIVO_SEGUNDOS (calibrar_costo) y queda en la tabla configuracion. Los
+hashes guardados con otro costo se rehacen solos en el próximo login correcto.
+
+Las funciones que llaman a bcrypt son lentas a propósito: la UI las corre en
+el pool de tareas. Para desbloquear la terminal (o el cambio de turno del
+mismo cajero) hay un caché en memoria de corta duración: después de un login
+correcto se guarda un HMAC de la contraseña con una clave aleatoria del
+proceso, y `desbloquear` compara contra eso sin pasar por bcrypt. Nada de eso
+toca el disco y se pierde al cerrar la app.
+
+`USUARIOS` es la tabla usuarios en memoria (id -> nombre, rol, activo), para
+mostrar vendedores sin JOIN; `Sesion` es el usuario que ingresó, con sus permisos.
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, NamedTuple, Optional
+
 import bcrypt
+
+from . import db
 from .db import get_conn
 
 VALID_ROLES = {"JEFE", "VENDEDOR"}
 
+OBJETIVO_SEGUNDOS = 0.25      # lo que debería tardar una verificación en este equipo
+COSTO_MINIMO = 10
+COSTO_MAXIMO = 16
+COSTO_POR_DEFECTO = 12        # hasta que se calibre
+CLAVE_COSTO = "bcrypt_costo"  # en la tabla configuracion
+
+DURACION_DESBLOQUEO = 15 * 60  # segundos que vale un login para desbloquear sin bcrypt
+
+_lock = threading.Lock()
+_COSTO_POR_BASE: Dict[str, int] = {}
+_CLAVE_HMAC = secrets.token_bytes(32)
+# usuario_id -> (HMAC de la contraseña, hash guardado al verificar, vence)
+_desbloqueos: Dict[int, tuple] = {}
+
+
+# --------- PERMISOS Y SESIÓN ---------
+# "materiales" (alta/baja de materiales, precios, stock y repreciado) es solo del JEFE
+PERMISOS_POR_ROL: Dict[str, FrozenSet[str]] = {
+    "JEFE": frozenset({"vender", "historial", "reimprimir", "exportar", "caja", "reportes", "materiales"}),
+    "VENDEDOR": frozenset({"vender", "historial", "reimprimir", "exportar", "caja", "reportes"}),
+}
+
+
+@dataclass(frozen=True)
+class Sesion:
+    """Usuario que ingresó en esta terminal."""
+    id: int
+    username: str
+    rol: str
+    permisos: FrozenSet[str] = frozenset()
+
+    @classmethod
+    def de(cls, usuario_id: int, username: str, rol: str) -> "Sesion":
+        return cls(usuario_id, username, rol, PERMISOS_POR_ROL.get(rol, frozenset()))
+
+    def puede(self, permiso: str) -> bool:
+        return permiso in self.permisos
+
+
+# --------- CACHÉ DE USUARIOS ---------
+class Usuario(NamedTuple):
+    id: int
+    username: str
+    rol: str
+    activo: int
+
+
+SIN_USUARIO = "(sin usuario)"
+
+
+class CacheUsuarios:
+    """
+    Tabla usuarios en memoria (son pocas filas). Como CATALOGO: se recarga al
+    invalidar() (altas y bajas de este proceso) o cuando PRAGMA data_version
+    indica que otra conexión escribió, chequeado como mucho cada `intervalo` s.
+    """
+
+    def __init__(self, intervalo: float = 2.0):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._por_id: Dict[int, Usuario] = {}
+        self._invalidaciones = 0
+        self._cargado_con = -1
+        self._data_version: tuple | None = None  # (ruta de la base, id de conexión, data_version)
+        self._ultimo_chequeo = 0.0
+
+    def invalidar(self):
+        with self._lock:
+            self._invalidaciones += 1
+
+    def _data_version_actual(self) -> tuple:
+        con = get_conn()
+        return str(db.DB_PATH), id(con), con.execute("PRAGMA data_version").fetchone()[0]
+
+    def _asegurar_vigente(self):
+        with self._lock:
+            if self._cargado_con == self._invalidaciones:
+                ahora = time.monotonic()
+                if ahora - self._ultimo_chequeo < self.intervalo:
+                    return
+                self._ultimo_chequeo = ahora
+                if self._data_version_actual() == self._data_version:
+                    return
+            rows = get_conn().execute("SELECT id, username, rol, COALESCE(activo, 1) FROM usuarios").fetchall()
+            self._por_id = {int(r[0]): Usuario(int(r[0]), r[1], r[2], int(r[3])) for r in rows}
+            self._cargado_con = self._invalidaciones
+            self._data_version = self._data_version_actual()
+            self._ultimo_chequeo = time.monotonic()
+
+    def obtener(self, usuario_id: int | None) -> Optional[Usuario]:
+        if usuario_id is None:
+            return None
+        self._asegurar_vigente()
+        return self._por_id.get(int(usuario_id))
+
+    def nombre(self, usuario_id: int | None) -> str:
+        """username del id ('(sin usuario)' si no existe), sin consultar la base."""
+        u = self.obtener(usuario_id)
+        return u.username if u else SIN_USUARIO
+
+    def nombres(self) -> Dict[int, str]:
+        """{id: username} de todos los usuarios (para mapear muchas filas de una vez)."""
+        self._asegurar_vigente()
+        return {u.id: u.username for u in self._por_id.values()}
+
+
+# Instancia única para toda la app
+USUARIOS = CacheUsuarios()
+
+
+# --------- COSTO DE BCRYPT ---------
+def costo() -> int:
+    """Costo configurado para la base en uso (COSTO_POR_DEFECTO si todavía no se calibró)."""
+    ruta = str(db.DB_PATH)
+    valor = _COSTO_POR_BASE.get(ruta)
+    if valor is None:
+        row = get_conn().execute("SELECT valor FROM configuracion WHERE clave = ?", (CLAVE_COSTO,)).fetchone()
+        if row is None:
+            return COSTO_POR_DEFECTO
+        valor = _COSTO_POR_BASE[ruta] = int(row[0])
+    return valor
+
+
+def calibrar_costo(objetivo: float = OBJETIVO_SEGUNDOS) -> int:
+    """
+    Mide bcrypt en este equipo, elige el mayor costo que no pase de `objetivo`
+    segundos (cada +1 duplica el tiempo) y lo guarda. Devuelve el costo elegido.
+    """
+    muestra = b"calibracion-joyapp"
+    inicio = time.perf_counter()
+    bcrypt.hashpw(muestra, bcrypt.gensalt(COSTO_MINIMO))
+    tiempo = time.perf_counter() - inicio
+
+    elegido = COSTO_MINIMO
+    while elegido < COSTO_MAXIMO and tiempo * 2 <= objetivo:
+        elegido += 1
+        tiempo *= 2
+
+    with get_conn() as con:
+        con.execute(
+            "INSERT INTO configuracion (clave, valor) VALUES (?, ?) "
+            "ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor",
+            (CLAVE_COSTO, str(elegido)),
+        )
+    _COSTO_POR_BASE[str(db.DB_PATH)] = elegido
+    return elegido
+
+
+def asegurar_costo() -> int:
+    """Calibra solo si este equipo todavía no tiene costo guardado (primer arranque)."""
+    if get_conn().execute("SELECT 1 FROM configuracion WHERE clave = ?", (CLAVE_COSTO,)).fetchone():
+        return costo()
+    return calibrar_costo()
+
+
+def _costo_de(stored: bytes) -> int | None:
+    """b'$2b$12$...' -> 12 (None si no es un hash bcrypt)."""
+    partes = stored.split(b"$")
+    try:
+        return int(partes[2]) if len(partes) >= 4 else None
+    except ValueError:
+        return None
+
+
+def _hashear(password: str) -> bytes:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(costo()))
+
+
+# --------- USUARIOS ---------
 def crear_usuario(username: str, password: str, rol: str):
     """
     Crea un usuario con contraseña hasheada (bcrypt).
     """
     if rol not in VALID_ROLES:
         raise ValueError("Rol inválido. Use 'JEFE' o 'VENDEDOR'.")
-    pw_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    pw_hash = _hashear(password)
     with get_conn() as con:
         con.execute(
             "INSERT INTO usuarios (username, password_hash, rol, activo) VALUES (?,?,?,1)",
             (username, pw_hash, rol),
         )
-        con.commit()
+    USUARIOS.invalidar()
+
+def _reemplazar_hash(uid: int, anterior, nuevo: bytes):
+    # Solo si nadie cambió la contraseña mientras tanto
+    with get_conn() as con:
+        con.execute("UPDATE usuarios SET password_hash=? WHERE id=? AND password_hash=?", (nuevo, uid, anterior))
 
 def validar_login(username: str, password: str):
     """
     Valida el login y MIGRA automáticamente contraseñas legacy en texto plano a bcrypt.
-    Devuelve dict {id, username, rol} si ok; si no, None.
+    Si el hash tiene un costo distinto del configurado, lo rehace con el costo actual.
+    Devuelve la Sesion si ok; si no, None.
     """
     with get_conn() as con:
         row = con.execute(
@@ -39,6 +241,9 @@ def validar_login(username: str, password: str):
 
     try:
         ok = bcrypt.checkpw(password.encode("utf-8"), stored)
+        if ok and _costo_de(stored) != costo():
+            pw_hash = _hashear(password)
+            _reemplazar_hash(uid, row[2], pw_hash)
     except ValueError:
         # Hash inválido (probable texto plano). Intentar migrar si coincide.
         try:
@@ -47,14 +252,56 @@ def validar_login(username: str, password: str):
             legacy = str(stored)
 
         if password == legacy:
-            new_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
-            with get_conn() as con:
-                con.execute("UPDATE usuarios SET password_hash=? WHERE id=?", (new_hash, uid))
-                con.commit()
+            pw_hash = _hashear(password)
+            _reemplazar_hash(uid, row[2], pw_hash)
             ok = True
         else:
             ok = False
 
     if ok:
-        return {"id": uid, "username": uname, "rol": rol}
+        _recordar(uid, password, pw_hash)
+        return Sesion.de(uid, uname, rol)
     return None
+
+
+# --------- DESBLOQUEO RÁPIDO ---------
+def _huella(password: str) -> bytes:
+    return hmac.new(_CLAVE_HMAC, password.encode("utf-8"), hashlib.sha256).digest()
+
+def _recordar(uid: int, password: str, pw_hash):
+    with _lock:
+        _desbloqueos[uid] = (_huella(password), pw_hash, time.monotonic() + DURACION_DESBLOQUEO)
+
+def olvidar(usuario_id: int | None = None):
+    """Descarta el desbloqueo rápido de un usuario (o de todos)."""
+    with _lock:
+        if usuario_id is None:
+            _desbloqueos.clear()
+        else:
+            _desbloqueos.pop(usuario_id, None)
+
+def desbloquear(username: str, password: str) -> Sesion | None:
+    """
+    Como validar_login, pero si el usuario se validó hace menos de
+    DURACION_DESBLOQUEO compara contra el HMAC en memoria (microsegundos) en vez
+    de bcrypt. Igual relee el usuario: si lo desactivaron o le cambiaron la
+    contraseña, vuelve a la validación completa.
+    """
+    row = get_conn().execute(
+        "SELECT id, username, password_hash, rol, activo FROM usuarios WHERE username=?",
+        (username,),
+    ).fetchone()
+    if not row or row[4] == 0:
+        return None
+    uid, uname, pw_hash, rol, _ = row
+
+    with _lock:
+        guardado = _desbloqueos.get(uid)
+    if guardado is not None:
+        huella, hash_verificado, vence = guardado
+        if time.monotonic() < vence and hash_verificado == pw_hash:
+            if hmac.compare_digest(huella, _huella(password)):
+                return Sesion.de(uid, uname, rol)
+            return None
+        olvidar(uid)
+    return validar_login(username, password)
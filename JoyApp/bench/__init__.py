@@ -0,0 +1,15 @@
+# JoyApp/bench/__init__.py
+"""
+Benchmarks de la app sobre una base sintética.
+
+  generar.py  arma una data.db realista (materiales, vendedores, ventas de
+              varios años con su mezcla de pagos) con el esquema real
+              (db.init_db) y cargando las ventas por models.importar_ventas.
+  medir.py    cronometra las operaciones frecuentes y escribe un reporte JSON;
+              con --base compara contra un reporte guardado y marca regresiones.
+
+    python -m JoyApp.bench --ventas 20000 --salida bench.json
+    python -m JoyApp.bench --ventas 20000 --salida bench.json --base bench_base.json
+
+Nunca toca JoyApp/data.db: la base sintética va a un directorio temporal (o a --db).
+"""
@@ -0,0 +1,6 @@
+# JoyApp/bench/__main__.py
+import sys
+
+from .medir import main
+
+sys.exit(main())
@@ -0,0 +1,155 @@
+# JoyApp/bench/generar.py
+"""
+Base de datos sintética para benchmarks.
+
+El esquema sale de db.init_db (las mismas migraciones que la app) y las
+ventas entran por models.importar_ventas, así que quedan con stock
+descontado, resumen diario y FTS al día, igual que en producción.
+
+    python -m JoyApp.bench.generar /tmp/bench.db --materiales 200 --ventas 50000 --anios 3
+"""
+import random
+from datetime import date, datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+from .. import db
+
+CONTRASENA = "bench"  # de todos los vendedores sintéticos
+TRAMO = 20000         # ventas por llamada a importar_ventas
+
+# (tipo, ley, precio mayor por gramo en Gs)
+_METALES = [
+    ("Oro", "750", 420000), ("Oro", "18k", 420000), ("Oro", "585", 330000), ("Oro", "24k", 560000),
+    ("Plata", "925", 9500), ("Plata", "950", 9800), ("Platino", "950", 260000),
+]
+_PIEZAS = ["Anillo", "Cadena", "Collar", "Pulsera", "Aros", "Dije", "Alianza", "Esclava", "Gargantilla", "Broche"]
+_EXTRAS = [("Grabado", 50000), ("Estuche", 35000), ("Soldadura", 80000), ("Engarce", 120000)]
+
+
+class Escala(NamedTuple):
+    materiales: int = 200
+    ventas: int = 20000
+    anios: float = 2.0
+    items_por_venta: Tuple[int, int] = (1, 4)   # mínimo y máximo de ítems
+    vendedores: int = 5
+    # proporción de ventas por método de pago (un solo pago por venta)
+    pagos: Tuple[Tuple[str, float], ...] = (("EFECTIVO", 0.6), ("TARJETA", 0.3), ("TRANSFERENCIA", 0.1))
+    extras: float = 0.1                          # probabilidad de un ítem EXTRA por venta
+    semilla: int = 1
+
+
+def _materiales(escala: Escala, rnd: random.Random) -> List[Tuple]:
+    filas = []
+    for n in range(escala.materiales):
+        tipo, ley, mayor = _METALES[n % len(_METALES)]
+        mayor = round(mayor * rnd.uniform(0.9, 1.1))
+        menor = -(-round(mayor * 1.25) // 1000) * 1000
+        # Stock de sobra: las ventas sintéticas nunca deben fallar por stock
+        filas.append((f"{rnd.choice(_PIEZAS)} {tipo.lower()} {n + 1}", ley, tipo, mayor, menor, 1, 1e9))
+    return filas
+
+
+def _ventas(escala: Escala, material_ids: List[int], vendedores: List[str], rnd: random.Random) -> Iterator[Dict[str, Any]]:
+    fin = datetime.combine(date.today(), datetime.min.time())
+    segundos = int(escala.anios * 365 * 86400)
+    inicio = fin - timedelta(seconds=segundos)
+    metodos = [m for m, _ in escala.pagos]
+    pesos = [p for _, p in escala.pagos]
+    # Fechas crecientes con los ids, como en una base real
+    instantes = sorted(rnd.randrange(segundos) for _ in range(escala.ventas))
+    for n, s in enumerate(instantes):
+        items: List[Dict[str, Any]] = [
+            {"material_id": rnd.choice(material_ids), "peso_gramos": round(rnd.lognormvariate(1.3, 0.7), 2)}
+            for _ in range(rnd.randint(*escala.items_por_venta))
+        ]
+        if rnd.random() < escala.extras:
+            desc, precio = rnd.choice(_EXTRAS)
+            items.append({"tipo": "EXTRA", "descripcion": desc, "subtotal": precio})
+        yield {
+            "ref": n + 1,
+            "fecha": (inicio + timedelta(seconds=s)).strftime("%Y-%m-%d %H:%M:%S"),
+            "vendedor": rnd.choice(vendedores),
+            "modalidad": "MAYOR" if rnd.random() < 0.3 else "MENOR",
+            "metodo": rnd.choices(metodos, pesos)[0],
+            "items": items,
+        }
+
+
+def generar(ruta: str | Path, escala: Escala = Escala(), reemplazar: bool = True) -> Dict[str, Any]:
+    """
+    Crea la base en `ruta` (y la deja como db.DB_PATH). Devuelve un resumen
+    con lo generado. ValueError si `ruta` es la base real de la app.
+    """
+    from .. import auth, models
+    from ..catalogo import CATALOGO
+
+    ruta = Path(ruta).resolve()
+    if ruta == Path(db.__file__).resolve().parent / "data.db":
+        raise ValueError("No se generan datos sintéticos sobre la base real de la app.")
+    if reemplazar:
+        for extra in ("", "-wal", "-shm"):
+            Path(str(ruta) + extra).unlink(missing_ok=True)
+
+    db.cerrar_conexiones()
+    db.DB_PATH = ruta
+    db.init_db()
+    auth.asegurar_costo()
+    rnd = random.Random(escala.semilla)
+
+    vendedores = [f"vendedor{n + 1}" for n in range(escala.vendedores)]
+    existentes = {r[0] for r in db.get_conn().execute("SELECT username FROM usuarios")}
+    for nombre in vendedores:
+        if nombre not in existentes:
+            auth.crear_usuario(nombre, CONTRASENA, "VENDEDOR")
+
+    with db.get_conn() as con:
+        con.executemany(
+            "INSERT INTO materiales (nombre, ley, tipo, precio_gramo_mayor, precio_gramo_menor, activo, stock_gramos) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            _materiales(escala, rnd),
+        )
+    CATALOGO.invalidar()
+    material_ids = [m.id for m in CATALOGO.activos()]
+
+    # De a tramos: la memoria no crece con la escala
+    ventas = _ventas(escala, material_ids, vendedores, rnd)
+    importadas = 0
+    while True:
+        tramo = list(islice(ventas, TRAMO))
+        if not tramo:
+            break
+        res = models.importar_ventas(tramo)
+        if res.errores:
+            raise RuntimeError(f"{len(res.errores)} ventas sintéticas con error; la primera: {res.errores[0]}")
+        importadas += len(res.importadas)
+    db.get_conn().execute("PRAGMA optimize")
+    return {
+        "ruta": str(ruta),
+        "materiales": len(material_ids),
+        "ventas": importadas,
+        "vendedores": len(vendedores),
+        "bytes": ruta.stat().st_size,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    base = Escala()
+    parser = argparse.ArgumentParser(description="Genera una base sintética para benchmarks")
+    parser.add_argument("db", help="archivo a crear (se reemplaza si existe)")
+    parser.add_argument("--materiales", type=int, default=base.materiales)
+    parser.add_argument("--ventas", type=int, default=base.ventas)
+    parser.add_argument("--anios", type=float, default=base.anios)
+    parser.add_argument("--semilla", type=int, default=base.semilla)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    info = generar(args.db, base._replace(
+        materiales=args.materiales, ventas=args.ventas, anios=args.anios, semilla=args.semilla,
+    ))
+    print(f"✅ {info['ventas']} ventas, {info['materiales']} materiales en {info['ruta']} "
+          f"({info['bytes'] / 1e6:.1f} MB, {time.perf_counter() - t0:.1f} s)")
@@ -0,0 +1,235 @@
+# JoyApp/bench/medir.py
+"""
+Cronometra las operaciones frecuentes de la app sobre una base sintética y
+escribe un reporte JSON. Con --base compara contra un reporte anterior: una
+operación es regresión si su mediana empeora más que --tolerancia.
+
+    python -m JoyApp.bench --ventas 20000 --salida bench.json
+    python -m JoyApp.bench --db /tmp/bench.db --reusar --salida hoy.json --base bench.json
+
+Sale con código 1 si hubo regresiones (sirve para correrlo antes y después de
+cada cambio de rendimiento).
+"""
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from .. import db
+from .generar import CONTRASENA, Escala, generar
+
+VERSION_REPORTE = 1
+TOLERANCIA = 0.20  # +20 % en la mediana cuenta como regresión
+
+
+class Medicion(NamedTuple):
+    n: int
+    mediana_ms: float
+    p95_ms: float
+    min_ms: float
+
+    @property
+    def por_segundo(self) -> float:
+        return 1000.0 / self.mediana_ms if self.mediana_ms > 0 else 0.0
+
+
+def cronometrar(fn: Callable[[], Any], n: int, calentamiento: int = 1, antes: Callable[[], Any] | None = None) -> Medicion:
+    """Corre fn n veces (más `calentamiento` sin contar); `antes` corre fuera del tiempo medido."""
+    for _ in range(calentamiento):
+        if antes:
+            antes()
+        fn()
+    tiempos: List[float] = []
+    for _ in range(n):
+        if antes:
+            antes()
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    tiempos.sort()
+    return Medicion(
+        n,
+        round(statistics.median(tiempos), 4),
+        round(tiempos[min(n - 1, int(n * 0.95))], 4),
+        round(tiempos[0], 4),
+    )
+
+
+def _operaciones(repeticiones: int) -> Dict[str, Medicion]:
+    """Todas las mediciones; las que escriben en la base van al final."""
+    from .. import auth, caja, models
+    from ..catalogo import CATALOGO
+    from ..printing import PLANTILLA_ESCPOS, Printer
+    from ..reportes import REPORTES
+
+    con = db.get_conn()
+    rnd = random.Random(7)
+    ultima = con.execute("SELECT MAX(fecha) FROM ventas").fetchone()[0]
+    hasta = datetime.strptime(ultima[:10], "%Y-%m-%d")
+    dia, mes_desde = hasta.strftime("%Y-%m-%d"), (hasta - timedelta(days=30)).strftime("%Y-%m-%d")
+    usuario = con.execute("SELECT id FROM usuarios WHERE username = 'vendedor1'").fetchone()[0]
+    n = repeticiones
+    r: Dict[str, Medicion] = {}
+
+    # --- Catálogo ---
+    r["listar_materiales_activos"] = cronometrar(models.listar_materiales_activos, n * 10)
+    r["listar_materiales_activos_frio"] = cronometrar(models.listar_materiales_activos, n, antes=CATALOGO.invalidar)
+
+    # --- Historial ---
+    r["historial_primera_pagina"] = cronometrar(lambda: models.pagina_ventas(), n)
+    r["historial_ultimo_mes"] = cronometrar(lambda: models.pagina_ventas(mes_desde, dia), n)
+    r["historial_texto"] = cronometrar(lambda: models.pagina_ventas(texto="collar oro"), n)
+    r["historial_resumen_texto"] = cronometrar(lambda: models.resumen_ventas(texto="collar oro"), n)
+    r["detalle_venta"] = cronometrar(lambda: models.detalle_venta(rnd.randint(1, 1000)), n * 5)
+
+    # --- Cierre de caja y reportes ---
+    r["cierre_caja_dia"] = cronometrar(lambda: models.resumen_caja_dia(dia), n * 5)
+    r["resumen_ventas_anual"] = cronometrar(
+        lambda: models.resumen_ventas((hasta - timedelta(days=365)).strftime("%Y-%m-%d"), dia), n * 5)
+    r["reporte_material_mes"] = cronometrar(
+        lambda: REPORTES.consultar("material", *models.rango_dias(mes_desde, dia)), n, antes=REPORTES.invalidar)
+
+    # --- Tickets ---
+    enc = {"nombre": "ESTELA JOYAS", "telefono": "000-000-000", "ticket_id": "123",
+           "vendedor": "vendedor1", "modalidad": "MENOR", "emitido": "2025-01-01 10:00"}
+    items = [{"descripcion": f"Anillo oro 750 {g} g @ 525000", "detalle": None, "subtotal": g * 525000}
+             for g in (2.5, 3.1, 7.25, 1.0)]
+    pagos = [{"metodo": "EFECTIVO", "monto": 100000}, {"metodo": "TARJETA", "monto": 6500000}]
+    totales = {"total": 6600000}
+    printer = Printer()
+    r["print_ticket"] = cronometrar(lambda: printer.print_ticket(enc, items, pagos, totales), n * 20)
+    r["ticket_escpos_bytes"] = cronometrar(lambda: PLANTILLA_ESCPOS.renderizar(enc, items, pagos, totales), n * 20)
+
+    # --- Login ---
+    r["validar_login"] = cronometrar(lambda: auth.validar_login("vendedor1", CONTRASENA), max(3, n // 10))
+    r["desbloquear"] = cronometrar(lambda: auth.desbloquear("vendedor1", CONTRASENA), n * 5)
+
+    # --- Escrituras ---
+    sesion = caja.sesion_abierta("bench") or caja.obtener_sesion(caja.abrir_sesion(usuario, 0, terminal="bench"))
+    materiales = [m for m in CATALOGO.activos()][:50]
+
+    def _venta():
+        lineas = []
+        for m in rnd.sample(materiales, 2):
+            peso = round(rnd.uniform(0.5, 10), 2)
+            lineas.append({"material_id": m.id, "descripcion": m.nombre, "peso_gramos": peso,
+                           "precio_por_gramo": m.precio_menor, "cantidad": 1,
+                           "subtotal": round(peso * m.precio_menor), "tipo": "MATERIAL"})
+        total = sum(i["subtotal"] for i in lineas)
+        models.crear_venta(usuario, "MENOR", lineas, [{"metodo": "EFECTIVO", "monto": total}],
+                           caja_sesion_id=sesion["id"])
+
+    r["crear_venta"] = cronometrar(_venta, n * 2)
+    r["cierre_caja_sesion"] = cronometrar(lambda: caja.obtener_sesion(sesion["id"]), n * 5)
+    return r
+
+
+def comparar(actual: Dict[str, Any], base: Dict[str, Any], tolerancia: float = TOLERANCIA) -> List[Dict[str, Any]]:
+    """[{operacion, base_ms, actual_ms, cambio, regresion}] de las operaciones presentes en los dos reportes."""
+    filas = []
+    for nombre, m in actual["resultados"].items():
+        b = base.get("resultados", {}).get(nombre)
+        if not b or not b["mediana_ms"]:
+            continue
+        cambio = m["mediana_ms"] / b["mediana_ms"] - 1
+        filas.append({
+            "operacion": nombre, "base_ms": b["mediana_ms"], "actual_ms": m["mediana_ms"],
+            "cambio": round(cambio, 4), "regresion": cambio > tolerancia,
+        })
+    return filas
+
+
+def medir(escala: Escala, ruta_db: Path, reusar: bool = False, repeticiones: int = 50) -> Dict[str, Any]:
+    """Genera (o reusa) la base sintética, corre las mediciones y devuelve el reporte."""
+    t0 = time.perf_counter()
+    if reusar and ruta_db.exists():
+        db.cerrar_conexiones()
+        db.DB_PATH = ruta_db.resolve()
+        db.init_db()
+        info = {"ruta": str(db.DB_PATH), "reusada": True}
+    else:
+        info = generar(ruta_db, escala)
+    info["segundos_generacion"] = round(time.perf_counter() - t0, 2)
+
+    con = db.get_conn()
+    info["ventas"] = con.execute("SELECT COUNT(*) FROM ventas").fetchone()[0]
+    info["materiales"] = con.execute("SELECT COUNT(*) FROM materiales").fetchone()[0]
+
+    resultados = _operaciones(repeticiones)
+    return {
+        "version": VERSION_REPORTE,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine(),
+        },
+        "escala": {**escala._asdict(), "repeticiones": repeticiones},
+        "base_de_datos": info,
+        "resultados": {
+            nombre: {**m._asdict(), "por_segundo": round(m.por_segundo, 1)} for nombre, m in resultados.items()
+        },
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    import argparse
+
+    base = Escala()
+    parser = argparse.ArgumentParser(prog="python -m JoyApp.bench", description="Benchmarks de JoyApp sobre una base sintética")
+    parser.add_argument("--db", help="base sintética (por defecto, una temporal)")
+    parser.add_argument("--reusar", action="store_true", help="si --db existe, medir sobre ella sin regenerar")
+    parser.add_argument("--materiales", type=int, default=base.materiales)
+    parser.add_argument("--ventas", type=int, default=base.ventas)
+    parser.add_argument("--anios", type=float, default=base.anios)
+    parser.add_argument("--vendedores", type=int, default=base.vendedores)
+    parser.add_argument("--semilla", type=int, default=base.semilla)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--salida", help="guardar el reporte JSON aquí")
+    parser.add_argument("--base", help="reporte JSON anterior contra el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="empeoramiento tolerado (0.2 = 20 %%)")
+    args = parser.parse_args(argv)
+
+    escala = base._replace(materiales=args.materiales, ventas=args.ventas, anios=args.anios,
+                           vendedores=args.vendedores, semilla=args.semilla)
+    with tempfile.TemporaryDirectory(prefix="joyapp-bench-") as tmp:
+        ruta_db = Path(args.db) if args.db else Path(tmp) / "bench.db"
+        reporte = medir(escala, ruta_db, reusar=args.reusar, repeticiones=args.repeticiones)
+        db.cerrar_conexiones()
+
+    print(f"{'Operación':<32} {'n':>5} {'mediana ms':>11} {'p95 ms':>9} {'op/s':>10}")
+    for nombre, m in reporte["resultados"].items():
+        print(f"{nombre:<32} {m['n']:>5} {m['mediana_ms']:>11.3f} {m['p95_ms']:>9.3f} {m['por_segundo']:>10,.1f}")
+
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"📝 Reporte: {args.salida}")
+
+    if not args.base:
+        return 0
+    anterior = json.loads(Path(args.base).read_text(encoding="utf-8"))
+    if anterior.get("escala", {}).get("ventas") != reporte["escala"]["ventas"]:
+        print("⚠️  La base de comparación se midió con otra escala: los números no son comparables del todo.")
+    filas = comparar(reporte, anterior, args.tolerancia)
+    print(f"\n{'Operación':<32} {'base ms':>10} {'ahora ms':>10} {'cambio':>9}")
+    for f in filas:
+        marca = "  ❌" if f["regresion"] else ""
+        print(f"{f['operacion']:<32} {f['base_ms']:>10.3f} {f['actual_ms']:>10.3f} {f['cambio']:>+9.1%}{marca}")
+    regresiones = [f for f in filas if f["regresion"]]
+    if regresiones:
+        print(f"❌ {len(regresiones)} regresiones (más de {args.tolerancia:.0%} sobre la base).")
+        return 1
+    print("✅ Sin regresiones.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
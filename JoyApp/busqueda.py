@@ -0,0 +1,106 @@
+# JoyApp/busqueda.py
+"""
+Índice de búsqueda para autocompletar (materiales en Nueva Venta).
+
+Se arma una vez y después cada consulta es barata:
+  - claves pre-normalizadas (minúsculas y sin acentos: "Pendiente Óro" ~ "oro");
+  - arreglo ordenado de prefijos (la etiqueta completa y desde cada palabra),
+    que se recorre con bisect;
+  - mapa de trigramas para coincidencias en medio de una palabra.
+Resultados ordenados por relevancia y recortados a `limite`.
+"""
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+N_GRAMA = 3
+LIMITE = 50
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes/diéresis, para comparar como lo escribe el cajero."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold().strip()
+
+
+class IndiceBusqueda:
+    """`entradas`: pares (clave, etiqueta). buscar() devuelve pares en orden de relevancia."""
+
+    def __init__(self, entradas: Iterable[Tuple[Hashable, str]]):
+        self.entradas: List[Tuple[Hashable, str]] = list(entradas)
+        self._norm: List[str] = [normalizar(etq) for _, etq in self.entradas]
+
+        # (texto desde el inicio de cada palabra, es_inicio_de_etiqueta, índice)
+        prefijos = []
+        for i, norm in enumerate(self._norm):
+            inicio = 0
+            for palabra in norm.split(" "):
+                if palabra:
+                    prefijos.append((norm[inicio:], inicio == 0, i))
+                inicio += len(palabra) + 1
+        prefijos.sort()
+        self._prefijos = prefijos
+        self._claves_prefijo = [p[0] for p in prefijos]
+
+        self._ngramas: Dict[str, Set[int]] = {}
+        for i, norm in enumerate(self._norm):
+            for j in range(len(norm) - N_GRAMA + 1):
+                self._ngramas.setdefault(norm[j:j + N_GRAMA], set()).add(i)
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def _por_prefijo(self, q: str) -> Tuple[List[int], List[int]]:
+        """Índices cuya etiqueta empieza con q, y cuyos otras palabras empiezan con q."""
+        desde = bisect_left(self._claves_prefijo, q)
+        hasta = bisect_left(self._claves_prefijo, q + "\uffff", desde)
+        inicio, palabra = [], []
+        for _texto, es_inicio, i in self._prefijos[desde:hasta]:
+            (inicio if es_inicio else palabra).append(i)
+        return inicio, palabra
+
+    def _por_subcadena(self, q: str) -> List[int]:
+        if len(q) < N_GRAMA:
+            return [i for i, norm in enumerate(self._norm) if q in norm]
+        candidatos: Set[int] | None = None
+        for j in range(len(q) - N_GRAMA + 1):
+            ids = self._ngramas.get(q[j:j + N_GRAMA])
+            if not ids:
+                return []
+            candidatos = set(ids) if candidatos is None else candidatos & ids
+            if not candidatos:
+                return []
+        return [i for i in candidatos if q in self._norm[i]]
+
+    def buscar(self, texto: str, limite: int = LIMITE) -> List[Tuple[Hashable, str]]:
+        """
+        Orden: 1) la etiqueta empieza con el texto, 2) alguna palabra empieza con el
+        texto, 3) el texto aparece en cualquier parte. Dentro de cada grupo, alfabético.
+        Texto vacío: todas las entradas (hasta `limite`).
+        """
+        q = normalizar(texto)
+        if not q:
+            return self.entradas[:limite]
+
+        inicio, palabra = self._por_prefijo(q)
+        vistos: Set[int] = set()
+        orden: List[int] = []
+        for grupo in (inicio, palabra):
+            for i in sorted(set(grupo), key=self._norm.__getitem__):
+                if i not in vistos:
+                    vistos.add(i)
+                    orden.append(i)
+        if len(orden) < limite:
+            resto = [i for i in self._por_subcadena(q) if i not in vistos]
+            orden.extend(sorted(resto, key=self._norm.__getitem__))
+        return [self.entradas[i] for i in orden[:limite]]
+
+    def empieza_con(self, texto: str) -> Tuple[Hashable, str] | None:
+        """Primera entrada (alfabética) cuya etiqueta completa empieza con `texto`."""
+        q = normalizar(texto)
+        if not q:
+            return None
+        inicio, _ = self._por_prefijo(q)
+        if not inicio:
+            return None
+        return self.entradas[min(inicio, key=self._norm.__getitem__)]
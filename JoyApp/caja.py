@@ -0,0 +1,107 @@
+# JoyApp/caja.py
+"""
+Sesiones de caja (tabla caja_sesiones).
+
+Cada terminal abre una sesión con su monto inicial; crear_venta suma cada venta
+a los totales de la sesión en la misma transacción. Cerrar la sesión es leer
+una fila: el efectivo esperado es monto_inicial + total_efectivo, y se compara
+con lo contado. Sirve igual para turnos que cruzan la medianoche o varias
+terminales, porque no depende de la fecha de las ventas.
+"""
+import socket
+import sqlite3
+from typing import Any, Dict, List
+
+from .db import get_conn
+
+TERMINAL = socket.gethostname()
+
+# metodo de pago -> columna acumuladora en caja_sesiones
+COLUMNA_METODO = {
+    "EFECTIVO": "total_efectivo",
+    "TARJETA": "total_tarjeta",
+    "TRANSFERENCIA": "total_transferencia",
+}
+
+_COLUMNAS = (
+    "id, terminal, fecha_apertura, usuario_apertura, monto_inicial, "
+    "cantidad_ventas, total_ventas, total_efectivo, total_tarjeta, total_transferencia, "
+    "fecha_cierre, usuario_cierre, monto_cierre, monto_esperado, diferencia"
+)
+
+
+def _como_dict(row) -> Dict[str, Any] | None:
+    if not row:
+        return None
+    return dict(zip([c.strip() for c in _COLUMNAS.split(",")], row))
+
+
+def abrir_sesion(usuario_id: int, monto_inicial: float, terminal: str = TERMINAL) -> int:
+    """Abre una sesión para la terminal. ValueError si ya hay una abierta."""
+    try:
+        with get_conn() as con:
+            cur = con.execute(
+                "INSERT INTO caja_sesiones (terminal, fecha_apertura, usuario_apertura, monto_inicial) "
+                "VALUES (?, datetime('now'), ?, ?)",
+                (terminal, usuario_id, float(monto_inicial)),
+            )
+            return int(cur.lastrowid)
+    except sqlite3.IntegrityError:
+        raise ValueError(f"La caja de '{terminal}' ya tiene una sesión abierta.")
+
+
+def sesion_abierta(terminal: str = TERMINAL) -> Dict[str, Any] | None:
+    return _como_dict(get_conn().execute(
+        f"SELECT {_COLUMNAS} FROM caja_sesiones WHERE terminal = ? AND fecha_cierre IS NULL",
+        (terminal,),
+    ).fetchone())
+
+
+def obtener_sesion(sesion_id: int) -> Dict[str, Any] | None:
+    return _como_dict(get_conn().execute(
+        f"SELECT {_COLUMNAS} FROM caja_sesiones WHERE id = ?", (sesion_id,)
+    ).fetchone())
+
+
+def registrar_venta(cur: sqlite3.Cursor, sesion_id: int, total: float, pagos: List[Dict[str, Any]]):
+    """
+    Suma una venta a los totales de la sesión (dentro de la transacción de crear_venta).
+    ValueError si la sesión no existe o ya está cerrada.
+    """
+    por_columna = {col: 0.0 for col in COLUMNA_METODO.values()}
+    for p in pagos:
+        por_columna[COLUMNA_METODO[p["metodo"]]] += float(p["monto"])
+    cur.execute(
+        "UPDATE caja_sesiones SET cantidad_ventas = cantidad_ventas + 1, total_ventas = total_ventas + ?, "
+        "total_efectivo = total_efectivo + ?, total_tarjeta = total_tarjeta + ?, "
+        "total_transferencia = total_transferencia + ? "
+        "WHERE id = ? AND fecha_cierre IS NULL",
+        (
+            float(total),
+            por_columna["total_efectivo"],
+            por_columna["total_tarjeta"],
+            por_columna["total_transferencia"],
+            sesion_id,
+        ),
+    )
+    if cur.rowcount != 1:
+        raise ValueError(f"La sesión de caja #{sesion_id} no está abierta.")
+
+
+def cerrar_sesion(sesion_id: int, usuario_id: int, monto_contado: float) -> Dict[str, Any]:
+    """
+    Cierra la sesión y concilia: esperado = monto_inicial + total_efectivo,
+    diferencia = contado - esperado (negativo = falta plata).
+    Devuelve la sesión ya cerrada.
+    """
+    with get_conn() as con:
+        cur = con.execute(
+            "UPDATE caja_sesiones SET fecha_cierre = datetime('now'), usuario_cierre = ?, monto_cierre = ?, "
+            "monto_esperado = monto_inicial + total_efectivo, "
+            "diferencia = ? - (monto_inicial + total_efectivo) "
+            "WHERE id = ? AND fecha_cierre IS NULL",
+            (usuario_id, float(monto_contado), float(monto_contado), sesion_id),
+        )
+        if cur.rowcount != 1:
+            raise ValueError(f"La sesión de caja #{sesion_id} no está abierta.")
+    return obtener_sesion(sesion_id)
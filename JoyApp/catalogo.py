@@ -0,0 +1,145 @@
+# JoyApp/catalogo.py
+"""
+Catálogo de materiales en memoria, compartido por la pantalla de venta y la
+gestión de materiales.
+
+Se recarga (una sola consulta) solo cuando algo cambió:
+  - `invalidar()`: lo llaman models al guardar materiales o ventas en ESTE proceso;
+  - `PRAGMA data_version`: cambia cuando otra conexión (otro hilo u otra terminal)
+    escribió en la base. Se consulta como mucho cada `intervalo` segundos.
+Mientras tanto, leer precios o la lista de materiales no toca la base.
+
+data_version cambia con CUALQUIER escritura (ventas, cola de impresión...), así
+que al recargar se comparan las filas: si no cambiaron no sube `version`, y el
+índice de búsqueda solo se rearma si cambiaron las etiquetas de los activos
+(no cuando una venta descuenta stock).
+"""
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .busqueda import IndiceBusqueda
+from .db import get_conn
+
+
+class Material(NamedTuple):
+    # Mismo orden que las columnas de la tabla en Gestión de Materiales
+    id: int
+    nombre: str
+    ley: str
+    tipo: str
+    precio_mayor: float
+    precio_menor: float
+    stock: float
+    activo: int
+
+
+def etiqueta(m: Material) -> str:
+    """Texto que se muestra en el combo de Nueva Venta."""
+    return f"{m.nombre} {m.ley or ''}".strip()
+
+
+def etiquetas_unicas(materiales: List[Material]) -> List[Tuple[Material, str]]:
+    """[(material, etiqueta)]; si dos materiales comparten "nombre ley", se les agrega " #id"."""
+    etiquetas = [etiqueta(m) for m in materiales]
+    repetidas: Dict[str, int] = {}
+    for etq in etiquetas:
+        repetidas[etq] = repetidas.get(etq, 0) + 1
+    return [(m, etq if repetidas[etq] == 1 else f"{etq} #{m.id}") for m, etq in zip(materiales, etiquetas)]
+
+
+class CatalogoMateriales:
+    def __init__(self, intervalo: float = 0.5):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._por_id: Dict[int, Material] = {}
+        self._todos: List[Material] = []     # id DESC (como la tabla de gestión)
+        self._activos: List[Material] = []   # activos por nombre (como nueva venta)
+        self._invalidaciones = 0             # se incrementa en invalidar()
+        self._cargado_con = -1               # valor de _invalidaciones al recargar
+        self._data_version: tuple | None = None  # (id de conexión, data_version)
+        self._ultimo_chequeo = 0.0
+        self.version = 0                     # cambia cuando cambian las filas
+        self.version_etiquetas = 0           # cambia cuando cambian (id, nombre, ley) de los activos
+        # (version_etiquetas, IndiceBusqueda de activos, version, {etiqueta: Material})
+        self._indice: tuple | None = None
+
+    def invalidar(self):
+        """Marca el catálogo como viejo; la próxima lectura lo recarga."""
+        with self._lock:
+            self._invalidaciones += 1
+
+    def _data_version_actual(self) -> tuple:
+        con = get_conn()
+        return id(con), con.execute("PRAGMA data_version").fetchone()[0]
+
+    def _asegurar_vigente(self):
+        with self._lock:
+            if self._cargado_con == self._invalidaciones:
+                ahora = time.monotonic()
+                if ahora - self._ultimo_chequeo < self.intervalo:
+                    return
+                self._ultimo_chequeo = ahora
+                if self._data_version_actual() == self._data_version:
+                    return
+            self._recargar()
+
+    def _recargar(self):
+        # Se llama con _lock tomado
+        rows = get_conn().execute(
+            "SELECT id, nombre, COALESCE(ley,''), COALESCE(tipo,''), "
+            "precio_gramo_mayor, precio_gramo_menor, COALESCE(stock_gramos, 0), COALESCE(activo, 1) "
+            "FROM materiales ORDER BY id DESC"
+        ).fetchall()
+        todos = [Material(int(r[0]), r[1], r[2], r[3], float(r[4]), float(r[5]), float(r[6]), int(r[7])) for r in rows]
+        self._cargado_con = self._invalidaciones
+        self._data_version = self._data_version_actual()
+        self._ultimo_chequeo = time.monotonic()
+        if todos == self._todos:
+            return  # la escritura fue en otra tabla: todo sigue valiendo
+        activos = sorted((m for m in todos if m.activo == 1), key=lambda m: m.nombre)
+        if [(m.id, m.nombre, m.ley) for m in activos] != [(m.id, m.nombre, m.ley) for m in self._activos]:
+            self.version_etiquetas += 1
+        self._todos = todos
+        self._por_id = {m.id: m for m in todos}
+        self._activos = activos
+        self.version += 1
+
+    def activos(self) -> List[Material]:
+        self._asegurar_vigente()
+        return self._activos
+
+    def todos(self) -> List[Material]:
+        self._asegurar_vigente()
+        return self._todos
+
+    def indice_activos(self) -> IndiceBusqueda:
+        """Índice de autocompletado (clave=id, etiqueta="nombre ley"); se rearma solo si cambió el catálogo."""
+        return self.indice_y_etiquetas()[0]
+
+    def indice_y_etiquetas(self) -> Tuple[IndiceBusqueda, Dict[str, Material]]:
+        """
+        Índice de autocompletado y {etiqueta: Material} armados de la misma foto
+        del catálogo, así toda etiqueta que ofrece el índice está en el dict.
+        """
+        self._asegurar_vigente()
+        with self._lock:
+            activos, version, version_etiquetas = self._activos, self.version, self.version_etiquetas
+        indice = self._indice
+        if indice is None or indice[0] != version_etiquetas:
+            pares = etiquetas_unicas(activos)
+            indice = (version_etiquetas, IndiceBusqueda((m.id, etq) for m, etq in pares),
+                      version, {etq: m for m, etq in pares})
+        elif indice[2] != version:
+            # Mismas etiquetas (p. ej. solo cambió stock o precio): el índice sirve, el dict se actualiza
+            indice = (version_etiquetas, indice[1], version, {etq: m for m, etq in etiquetas_unicas(activos)})
+        self._indice = indice
+        return indice[1], indice[3]
+
+    def obtener(self, material_id: int) -> Optional[Material]:
+        self._asegurar_vigente()
+        return self._por_id.get(int(material_id))
+
+
+# Instancia única para toda la app
+CATALOGO = CatalogoMateriales()
@@ -1,92 +1,107 @@
 from pathlib import Path
 import sqlite3
+import threading
 import os
 
 # ✅ Ruta absoluta al archivo de base de datos dentro de JoyApp/
 DB_PATH = Path(__file__).resolve().parent / "data.db"
 
-def get_conn():
-    # Siempre devolver una conexión nueva; habilitamos FK por si usás claves foráneas
-    con = sqlite3.connect(str(DB_PATH))
-    con.execute("PRAGMA foreign_keys = ON;")
+# Ajustes que se aplican UNA sola vez al abrir cada conexión
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL;",        # lectores y escritor no se bloquean entre sí
+    "PRAGMA synchronous = NORMAL;",      # en WAL sigue siendo seguro ante cortes de luz
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA busy_timeout = 5000;",       # otra terminal escribiendo: esperar, no fallar
+    "PRAGMA cache_size = -16000;",       # ~16 MB de caché de páginas
+    "PRAGMA mmap_size = 268435456;",     # 256 MB mapeados en memoria
+    "PRAGMA temp_store = MEMORY;",
+)
+
+# Tope de conexiones simultáneas (una por hilo que toca la base)
+MAX_CONEXIONES = 8
+
+_local = threading.local()
+_lock = threading.Lock()
+_pool: dict[int, tuple[str, sqlite3.Connection]] = {}
+_stats = {"abiertas": 0, "cerradas": 0, "reutilizadas": 0}
+_generacion = 0  # se incrementa en cerrar_conexiones() para invalidar las de otros hilos
+
+
+def _abrir(ruta: str) -> sqlite3.Connection:
+    # check_same_thread=False solo para poder cerrarla desde cerrar_conexiones();
+    # cada conexión la usa únicamente el hilo que la abrió.
+    con = sqlite3.connect(ruta, check_same_thread=False)
+    for pragma in PRAGMAS:
+        con.execute(pragma)
+    return con
+
+
+def _purgar_hilos_muertos():
+    """Cierra las conexiones de hilos que ya terminaron (llamar con _lock tomado)."""
+    vivos = {t.ident for t in threading.enumerate()}
+    for ident in [i for i in _pool if i not in vivos]:
+        _ruta, con = _pool.pop(ident)
+        con.close()
+        _stats["cerradas"] += 1
+
+
+def get_conn() -> sqlite3.Connection:
+    """
+    Devuelve la conexión de larga duración del hilo actual (una por hilo).
+    Se puede seguir usando como `with get_conn() as con:` (commit/rollback),
+    pero NO hay que cerrarla: la reutilizan todas las llamadas del mismo hilo.
+    """
+    ruta = str(DB_PATH)
+    con = getattr(_local, "con", None)
+    if con is not None and _local.ruta == ruta and _local.generacion == _generacion:
+        with _lock:  # += no es atómico: los hilos de tareas y de impresión perderían cuentas
+            _stats["reutilizadas"] += 1
+        return con
+
+    with _lock:
+        ident = threading.get_ident()
+        if ident in _pool:
+            # Cambió DB_PATH (p. ej. benchmarks) o el ident es de un hilo muerto: descartar la vieja
+            _pool.pop(ident)[1].close()
+            _stats["cerradas"] += 1
+        if len(_pool) >= MAX_CONEXIONES:
+            _purgar_hilos_muertos()
+        if len(_pool) >= MAX_CONEXIONES:
+            raise RuntimeError(f"Se alcanzó el máximo de {MAX_CONEXIONES} conexiones a la base de datos")
+        con = _abrir(ruta)
+        _pool[ident] = (ruta, con)
+        _stats["abiertas"] += 1
+
+    _local.con = con
+    _local.ruta = ruta
+    _local.generacion = _generacion
     return con
 
+
+def cerrar_conexiones():
+    """Cierra todas las conexiones del pool (al salir de la app o antes de mover data.db)."""
+    global _generacion
+    with _lock:
+        _generacion += 1
+        for _ruta, con in _pool.values():
+            con.close()
+            _stats["cerradas"] += 1
+        _pool.clear()
+    _local.__dict__.clear()
+
+
+def estadisticas_conexiones() -> dict:
+    """Contadores de uso del pool: abiertas, cerradas, reutilizadas y activas."""
+    with _lock:
+        return {**_stats, "activas": len(_pool), "maximo": MAX_CONEXIONES}
+
+
 def init_db():
-    from textwrap import dedent
-
-    schema = dedent("""
-        -- Tablas base
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            rol TEXT CHECK(rol IN ('JEFE','VENDEDOR')) NOT NULL,
-            activo INTEGER DEFAULT 1
-        );
-
-        CREATE TABLE IF NOT EXISTS materiales (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            ley TEXT,
-            tipo TEXT,
-            precio_gramo_mayor REAL NOT NULL,
-            precio_gramo_menor REAL NOT NULL,
-            activo INTEGER DEFAULT 1
-        );
-
-        CREATE TABLE IF NOT EXISTS extras (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            precio REAL NOT NULL,
-            activo INTEGER DEFAULT 1
-        );
-
-        CREATE TABLE IF NOT EXISTS caja_sesiones (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            fecha_apertura TEXT NOT NULL,
-            usuario_apertura INTEGER NOT NULL,
-            monto_inicial REAL NOT NULL,
-            fecha_cierre TEXT,
-            usuario_cierre INTEGER,
-            monto_cierre REAL
-        );
-
-        CREATE TABLE IF NOT EXISTS ventas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            fecha TEXT NOT NULL,
-            usuario_id INTEGER NOT NULL,
-            modalidad TEXT CHECK(modalidad IN ('MAYOR','MENOR')) NOT NULL,
-            caja_sesion_id INTEGER,
-            total REAL NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS venta_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            venta_id INTEGER NOT NULL,
-            material_id INTEGER,
-            descripcion TEXT,
-            peso_gramos REAL,
-            precio_por_gramo REAL,
-            cantidad INTEGER DEFAULT 1,
-            subtotal REAL NOT NULL,
-            tipo TEXT CHECK(tipo IN ('MATERIAL','EXTRA')) NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS pagos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            venta_id INTEGER NOT NULL,
-            metodo TEXT CHECK(metodo IN ('EFECTIVO','TARJETA','TRANSFERENCIA')) NOT NULL,
-            monto REAL NOT NULL
-        );
-
-        -- Índices útiles
-        CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha);
-        CREATE INDEX IF NOT EXISTS idx_items_venta ON venta_items(venta_id);
-        CREATE INDEX IF NOT EXISTS idx_pagos_venta ON pagos(venta_id);
-    """)
+    # Las tablas e índices se crean/actualizan con las migraciones versionadas
+    from .migraciones import migrar
 
     with get_conn() as con:
-        con.executescript(schema)
+        migrar(con)
         # Usuario admin por defecto si no existe
         cur = con.execute("SELECT COUNT(*) FROM usuarios WHERE username = ?", ("admin",))
         if cur.fetchone()[0] == 0:
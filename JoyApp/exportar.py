@@ -0,0 +1,220 @@
+# JoyApp/exportar.py
+"""
+Exportación de ventas (con sus ítems y pagos) a CSV o JSONL, opcionalmente gzip.
+
+Se recorre `ventas` por id ascendente en lotes (cursor por clave, como el
+historial) y por cada lote se leen sus ítems y pagos con un rango sobre
+venta_id. Cada lote se escribe y se descarta: la memoria no depende del
+rango exportado, y entre lotes el hilo suelta la base.
+
+Reanudable: después de cada lote se anota el último id exportado en
+`<destino>.progreso`; con `continuar=True` se sigue desde ahí agregando al
+mismo archivo (en gzip queda un archivo multi-miembro, que gzip/zcat leen
+como uno solo).
+
+    python -m JoyApp.exportar ventas_2025.csv.gz --desde 2025-01-01 --hasta 2025-12-31
+    python -m JoyApp.exportar ventas_2025.csv.gz --continuar
+"""
+import csv
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .db import get_conn
+
+TAM_LOTE = 1000
+FORMATOS = ("csv", "jsonl")
+
+# Columnas del CSV: una fila por ítem (las ventas sin ítems salen con las columnas de ítem vacías)
+COLUMNAS_CSV = [
+    "venta_id", "fecha", "vendedor", "modalidad", "caja_sesion_id", "total", "pagos",
+    "item_id", "material_id", "descripcion", "tipo", "peso_gramos", "precio_por_gramo", "cantidad", "subtotal",
+]
+
+# progreso(ventas exportadas, último id)
+Progreso = Callable[[int, int], None]
+
+
+def formato_de(ruta: str | Path) -> str:
+    """'x.jsonl' / 'x.jsonl.gz' -> 'jsonl'; cualquier otra cosa -> 'csv'."""
+    nombre = str(ruta).lower().removesuffix(".gz")
+    return "jsonl" if nombre.endswith((".jsonl", ".json")) else "csv"
+
+
+def ruta_progreso(destino: str | Path) -> Path:
+    destino = Path(destino)
+    return destino.with_name(destino.name + ".progreso")
+
+
+def ultimo_id_exportado(destino: str | Path) -> int | None:
+    """Último id de venta anotado para `destino` (None si no hay exportación previa)."""
+    try:
+        return int(ruta_progreso(destino).read_text(encoding="utf-8").strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _abrir(destino: Path, comprimir: bool, agregar: bool):
+    modo = "at" if agregar else "wt"
+    if comprimir:
+        return gzip.open(destino, modo, encoding="utf-8", newline="", compresslevel=6)
+    return open(destino, modo, encoding="utf-8", newline="")
+
+
+def _lote_ventas(con, desde_id: int, dia_ini: int | None, dia_fin: int | None, limite: int) -> List[Tuple]:
+    condiciones, params = ["v.id > ?"], [desde_id]
+    if dia_ini is not None:
+        condiciones.append("v.dia >= ?")
+        params.append(dia_ini)
+    if dia_fin is not None:
+        condiciones.append("v.dia < ?")
+        params.append(dia_fin)
+    return con.execute(f"""
+        SELECT v.id, v.fecha, COALESCE(u.username, ''), v.modalidad, v.caja_sesion_id, v.total
+        FROM ventas v
+        LEFT JOIN usuarios u ON u.id = v.usuario_id
+        WHERE {" AND ".join(condiciones)}
+        ORDER BY v.id
+        LIMIT ?
+    """, (*params, limite)).fetchall()
+
+
+def _por_venta(con, sql: str, primero: int, ultimo: int, ids: set) -> Dict[int, List[Tuple]]:
+    """Filas de items/pagos del rango de ids [primero, ultimo], agrupadas por venta (solo las del lote)."""
+    res: Dict[int, List[Tuple]] = {}
+    for row in con.execute(sql, (primero, ultimo)):
+        if row[0] in ids:
+            res.setdefault(row[0], []).append(row[1:])
+    return res
+
+
+_SQL_ITEMS = """
+    SELECT venta_id, id, material_id, descripcion, tipo, peso_gramos, precio_por_gramo, cantidad, subtotal
+    FROM venta_items WHERE venta_id BETWEEN ? AND ? ORDER BY venta_id, id
+"""
+_SQL_PAGOS = """
+    SELECT venta_id, metodo, monto
+    FROM pagos WHERE venta_id BETWEEN ? AND ? ORDER BY venta_id, id
+"""
+
+
+def _escribir_csv(f, ventas, items, pagos, encabezado: bool):
+    w = csv.writer(f)
+    if encabezado:
+        w.writerow(COLUMNAS_CSV)
+    filas = []
+    for vid, fecha, vendedor, modalidad, sesion, total in ventas:
+        texto_pagos = "|".join(f"{m}:{monto}" for m, monto in pagos.get(vid, ()))
+        base = [vid, fecha, vendedor, modalidad, sesion if sesion is not None else "", total, texto_pagos]
+        for it in items.get(vid) or [("",) * 8]:
+            filas.append(base + ["" if x is None else x for x in it])
+    w.writerows(filas)
+
+
+def _escribir_jsonl(f, ventas, items, pagos):
+    buf = io.StringIO()
+    for vid, fecha, vendedor, modalidad, sesion, total in ventas:
+        registro = {
+            "venta_id": vid, "fecha": fecha, "vendedor": vendedor, "modalidad": modalidad,
+            "caja_sesion_id": sesion, "total": total,
+            "items": [
+                dict(zip(("item_id", "material_id", "descripcion", "tipo", "peso_gramos",
+                          "precio_por_gramo", "cantidad", "subtotal"), it))
+                for it in items.get(vid, ())
+            ],
+            "pagos": [{"metodo": m, "monto": monto} for m, monto in pagos.get(vid, ())],
+        }
+        buf.write(json.dumps(registro, ensure_ascii=False))
+        buf.write("\n")
+    f.write(buf.getvalue())
+
+
+def exportar(
+    destino: str | Path,
+    *,
+    desde: str | None = None,
+    hasta: str | None = None,
+    formato: str | None = None,
+    comprimir: bool | None = None,
+    desde_id: int | None = None,
+    continuar: bool = False,
+    tam_lote: int = TAM_LOTE,
+    progreso: Optional[Progreso] = None,
+) -> Tuple[int, int | None]:
+    """
+    Exporta las ventas de [desde, hasta] (YYYY-MM-DD, inclusive; None = sin límite)
+    con id > desde_id. Formato y gzip se deducen de la extensión si no se indican.
+    Con continuar=True arranca después del último id anotado y agrega al archivo.
+    Devuelve (ventas exportadas, último id exportado).
+    """
+    from .models import rango_dias
+
+    destino = Path(destino)
+    formato = formato or formato_de(destino)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}. Opciones: {', '.join(FORMATOS)}")
+    if comprimir is None:
+        comprimir = destino.suffix.lower() == ".gz"
+
+    agregar = False
+    if continuar:
+        anotado = ultimo_id_exportado(destino)
+        if anotado is not None and destino.exists():
+            desde_id = max(desde_id or 0, anotado)
+            agregar = True
+    ultimo = desde_id or 0
+    dia_ini, dia_fin = rango_dias(desde, hasta)
+
+    con = get_conn()
+    exportadas = 0
+    with _abrir(destino, comprimir, agregar) as f:
+        encabezado = not agregar
+        while True:
+            ventas = _lote_ventas(con, ultimo, dia_ini, dia_fin, tam_lote)
+            if not ventas:
+                break
+            primero, ultimo = ventas[0][0], ventas[-1][0]
+            ids = {v[0] for v in ventas}
+            items = _por_venta(con, _SQL_ITEMS, primero, ultimo, ids)
+            pagos = _por_venta(con, _SQL_PAGOS, primero, ultimo, ids)
+
+            if formato == "csv":
+                _escribir_csv(f, ventas, items, pagos, encabezado)
+                encabezado = False
+            else:
+                _escribir_jsonl(f, ventas, items, pagos)
+            f.flush()
+            # Recién con el lote escrito se anota: al reanudar no se pierde nada
+            ruta_progreso(destino).write_text(str(ultimo), encoding="utf-8")
+
+            exportadas += len(ventas)
+            if progreso:
+                progreso(exportadas, ultimo)
+            if len(ventas) < tam_lote:
+                break
+
+    return exportadas, (ultimo or None)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Exporta ventas, ítems y pagos a CSV o JSONL")
+    parser.add_argument("destino", help="archivo de salida (.csv, .jsonl; agregar .gz para comprimir)")
+    parser.add_argument("--desde", help="YYYY-MM-DD")
+    parser.add_argument("--hasta", help="YYYY-MM-DD inclusive")
+    parser.add_argument("--formato", choices=FORMATOS, help="por defecto, según la extensión")
+    parser.add_argument("--desde-id", type=int, help="exportar solo ventas con id mayor a este")
+    parser.add_argument("--continuar", action="store_true", help="seguir una exportación interrumpida")
+    args = parser.parse_args()
+
+    def _mostrar(n, ultimo_id):
+        print(f"\r📤 {n} ventas (hasta #{ultimo_id})", end="", flush=True)
+
+    n, ultimo_id = exportar(
+        args.destino, desde=args.desde, hasta=args.hasta, formato=args.formato,
+        desde_id=args.desde_id, continuar=args.continuar, progreso=_mostrar,
+    )
+    print(f"\n✅ {n} ventas exportadas a {args.destino} (último id: {ultimo_id or '-'}).")
@@ -0,0 +1,131 @@
+# JoyApp/importar.py
+"""
+Importación masiva de ventas desde CSV o JSONL (opcionalmente .gz).
+
+Acepta el mismo formato que produce exportar.py, así que sirve tanto para
+pasar ventas de otra máquina como para cargar tickets de papel armados en
+una planilla:
+
+  - CSV: una fila por ítem; las filas con la misma `venta_id` (o `ref`) son
+    una venta. Columnas: fecha, vendedor (o usuario_id), modalidad, pagos
+    ("EFECTIVO:100000|TARJETA:50000") o metodo, material_id, peso_gramos,
+    precio_por_gramo (opcional), tipo, descripcion y subtotal (para EXTRA).
+  - JSONL: una venta por línea, con listas "items" y "pagos".
+
+Las ventas reciben ids nuevos; la referencia original solo se usa en el
+reporte de errores.
+
+    python -m JoyApp.importar ventas_offline.csv [--validar] [--errores errores.csv]
+"""
+import csv
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from .exportar import formato_de
+
+
+def _abrir(ruta: Path):
+    if ruta.suffix.lower() == ".gz":
+        return gzip.open(ruta, "rt", encoding="utf-8-sig", newline="")
+    return open(ruta, "r", encoding="utf-8-sig", newline="")
+
+
+def _pagos_de_texto(texto: str):
+    pagos = []
+    for parte in (texto or "").split("|"):
+        if not parte.strip():
+            continue
+        metodo, _, monto = parte.partition(":")
+        pagos.append({"metodo": metodo.strip(), "monto": monto.strip()})
+    return pagos
+
+
+def leer_csv(ruta: Path) -> Iterator[Dict[str, Any]]:
+    """Agrupa filas consecutivas con la misma venta_id/ref en una venta."""
+    actual: Dict[str, Any] | None = None
+    clave_actual = None
+    with _abrir(ruta) as f:
+        for n, fila in enumerate(csv.DictReader(f), start=2):  # la 1 es el encabezado
+            fila = {k.strip(): (v or "").strip() for k, v in fila.items() if k}
+            clave = fila.get("venta_id") or fila.get("ref") or f"fila {n}"
+            if actual is None or clave != clave_actual:
+                if actual is not None:
+                    yield actual
+                clave_actual = clave
+                actual = {
+                    "ref": clave,
+                    "fecha": fila.get("fecha"),
+                    "vendedor": fila.get("vendedor"),
+                    "usuario_id": fila.get("usuario_id"),
+                    "modalidad": fila.get("modalidad"),
+                    # Sin pagos ni metodo queda sin pagos: models lo reporta, no se adivina el método
+                    "pagos": _pagos_de_texto(fila.get("pagos", "")) or ([{"metodo": fila["metodo"]}] if fila.get("metodo") else []),
+                    "items": [],
+                }
+            if fila.get("material_id") or fila.get("tipo", "").upper() == "EXTRA":
+                actual["items"].append({
+                    "tipo": fila.get("tipo") or "MATERIAL",
+                    "material_id": fila.get("material_id"),
+                    "peso_gramos": fila.get("peso_gramos"),
+                    "precio_por_gramo": fila.get("precio_por_gramo"),
+                    "descripcion": fila.get("descripcion"),
+                    "cantidad": fila.get("cantidad"),
+                    "subtotal": fila.get("subtotal"),
+                })
+    if actual is not None:
+        yield actual
+
+
+def leer_jsonl(ruta: Path) -> Iterator[Dict[str, Any]]:
+    with _abrir(ruta) as f:
+        for n, linea in enumerate(f, start=1):
+            if not linea.strip():
+                continue
+            try:
+                venta = json.loads(linea)
+            except json.JSONDecodeError as e:
+                # Se deja pasar para que quede en el reporte de errores
+                venta = {"ref": f"línea {n}", "error": f"JSON inválido: {e}"}
+            venta.setdefault("ref", venta.get("venta_id", f"línea {n}"))
+            yield venta
+
+
+def leer(ruta: str | Path) -> Iterator[Dict[str, Any]]:
+    ruta = Path(ruta)
+    return leer_jsonl(ruta) if formato_de(ruta) == "jsonl" else leer_csv(ruta)
+
+
+def importar_archivo(ruta: str | Path, *, solo_validar: bool = False):
+    """Lee el archivo e importa. Devuelve models.ResultadoImportacion."""
+    from .models import importar_ventas
+    return importar_ventas(leer(ruta), solo_validar=solo_validar)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Importa ventas desde CSV o JSONL")
+    parser.add_argument("archivo", help="archivo .csv o .jsonl (acepta .gz)")
+    parser.add_argument("--validar", action="store_true", help="solo validar, sin guardar nada")
+    parser.add_argument("--errores", help="guardar el reporte de errores en este CSV")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    res = importar_archivo(args.archivo, solo_validar=args.validar)
+    dt = time.perf_counter() - t0
+
+    accion = "válidas" if args.validar else "importadas"
+    print(f"✅ {len(res.importadas)} ventas {accion}, ❌ {len(res.errores)} con errores ({dt:.2f} s).")
+    for ref, motivo in res.errores[:20]:
+        print(f"   - {ref}: {motivo}")
+    if len(res.errores) > 20:
+        print(f"   ... y {len(res.errores) - 20} más")
+    if args.errores and res.errores:
+        with open(args.errores, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["ref", "motivo"])
+            w.writerows(res.errores)
+        print(f"📝 Reporte de errores: {args.errores}")
@@ -0,0 +1,403 @@
+# JoyApp/migraciones.py
+"""
+Migraciones de esquema numeradas.
+
+Cada paso es idempotente y, al aplicarse, deja su número en PRAGMA user_version.
+Al arrancar solo se compara ese entero con VERSION_ACTUAL: si la base ya está al día
+no se ejecuta ninguna consulta de esquema.
+
+Para agregar un cambio: escribir una función `_vN_algo(con)` y sumarla al final de
+MIGRACIONES. Nunca editar ni reordenar pasos ya publicados.
+"""
+import sqlite3
+from typing import Callable, List, Tuple
+
+from . import db
+from .db import get_conn
+from .respaldo import respaldar
+
+
+def _ejecutar_script(con: sqlite3.Connection, script: str):
+    """
+    Ejecuta sentencia por sentencia DENTRO de la transacción actual
+    (executescript haría COMMIT antes de empezar).
+    """
+    sentencia = ""
+    for linea in script.splitlines(keepends=True):
+        sentencia += linea
+        if sqlite3.complete_statement(sentencia):
+            con.execute(sentencia)
+            sentencia = ""
+    if sentencia.strip():
+        con.execute(sentencia)
+
+
+def _columnas(con: sqlite3.Connection, tabla: str) -> List[str]:
+    return [r[1] for r in con.execute(f"PRAGMA table_info({tabla})")]
+
+
+# --------- PASOS ---------
+ESQUEMA_BASE = """
+    -- Tablas base
+    CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        rol TEXT CHECK(rol IN ('JEFE','VENDEDOR')) NOT NULL,
+        activo INTEGER DEFAULT 1
+    );
+
+    CREATE TABLE IF NOT EXISTS materiales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL,
+        ley TEXT,
+        tipo TEXT,
+        precio_gramo_mayor REAL NOT NULL,
+        precio_gramo_menor REAL NOT NULL,
+        activo INTEGER DEFAULT 1
+    );
+
+    CREATE TABLE IF NOT EXISTS extras (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL,
+        precio REAL NOT NULL,
+        activo INTEGER DEFAULT 1
+    );
+
+    CREATE TABLE IF NOT EXISTS caja_sesiones (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha_apertura TEXT NOT NULL,
+        usuario_apertura INTEGER NOT NULL,
+        monto_inicial REAL NOT NULL,
+        fecha_cierre TEXT,
+        usuario_cierre INTEGER,
+        monto_cierre REAL
+    );
+
+    CREATE TABLE IF NOT EXISTS ventas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha TEXT NOT NULL,
+        usuario_id INTEGER NOT NULL,
+        modalidad TEXT CHECK(modalidad IN ('MAYOR','MENOR')) NOT NULL,
+        caja_sesion_id INTEGER,
+        total REAL NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS venta_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        venta_id INTEGER NOT NULL,
+        material_id INTEGER,
+        descripcion TEXT,
+        peso_gramos REAL,
+        precio_por_gramo REAL,
+        cantidad INTEGER DEFAULT 1,
+        subtotal REAL NOT NULL,
+        tipo TEXT CHECK(tipo IN ('MATERIAL','EXTRA')) NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS pagos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        venta_id INTEGER NOT NULL,
+        metodo TEXT CHECK(metodo IN ('EFECTIVO','TARJETA','TRANSFERENCIA')) NOT NULL,
+        monto REAL NOT NULL
+    );
+
+    -- Índices útiles
+    CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha);
+    CREATE INDEX IF NOT EXISTS idx_items_venta ON venta_items(venta_id);
+    CREATE INDEX IF NOT EXISTS idx_pagos_venta ON pagos(venta_id);
+"""
+
+
+def _v1_esquema_base(con):
+    _ejecutar_script(con, ESQUEMA_BASE)
+
+
+def _v2_materiales_precio_mayor_menor(con):
+    """Bases viejas: `materiales.precio_gramo` pasa a precio_gramo_mayor/menor (+ ley, activo)."""
+    columnas = _columnas(con, "materiales")
+    if all(col in columnas for col in ["precio_gramo_mayor", "precio_gramo_menor", "activo", "ley"]):
+        return
+
+    con.execute("ALTER TABLE materiales RENAME TO materiales_old")
+    con.execute("""
+        CREATE TABLE materiales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            ley TEXT,
+            tipo TEXT,
+            precio_gramo_mayor REAL NOT NULL,
+            precio_gramo_menor REAL NOT NULL,
+            activo INTEGER DEFAULT 1
+        )
+    """)
+    if "precio_gramo" in columnas:
+        # Una sola sentencia en lugar de copiar fila por fila desde Python
+        con.execute("""
+            INSERT INTO materiales (id, nombre, ley, tipo, precio_gramo_mayor, precio_gramo_menor, activo)
+            SELECT id, nombre, '', tipo, precio_gramo, precio_gramo, 1 FROM materiales_old
+        """)
+    else:
+        print("⚠️  Tabla vieja sin columna 'precio_gramo' — no se migraron datos.")
+    con.execute("DROP TABLE materiales_old")
+
+
+def _v3_stock_gramos(con):
+    if "stock_gramos" not in _columnas(con, "materiales"):
+        con.execute("ALTER TABLE materiales ADD COLUMN stock_gramos REAL NOT NULL DEFAULT 0")
+
+
+VENTAS_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS ventas_fts USING fts5(
+    ref, vendedor, modalidad, descripciones,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_ventas_fts_ai AFTER INSERT ON ventas BEGIN
+    INSERT INTO ventas_fts (rowid, ref, vendedor, modalidad, descripciones)
+    VALUES (new.id, new.id, (SELECT username FROM usuarios WHERE id = new.usuario_id), new.modalidad, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ventas_fts_au AFTER UPDATE OF usuario_id, modalidad ON ventas BEGIN
+    UPDATE ventas_fts
+    SET vendedor = (SELECT username FROM usuarios WHERE id = new.usuario_id), modalidad = new.modalidad
+    WHERE rowid = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_ventas_fts_ad AFTER DELETE ON ventas BEGIN
+    DELETE FROM ventas_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_fts_ai AFTER INSERT ON venta_items BEGIN
+    UPDATE ventas_fts SET descripciones = descripciones || ' ' || COALESCE(new.descripcion, '')
+    WHERE rowid = new.venta_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_fts_ad AFTER DELETE ON venta_items BEGIN
+    UPDATE ventas_fts
+    SET descripciones = COALESCE((SELECT group_concat(descripcion, ' ') FROM venta_items WHERE venta_id = old.venta_id), '')
+    WHERE rowid = old.venta_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_usuarios_fts_au AFTER UPDATE OF username ON usuarios BEGIN
+    UPDATE ventas_fts SET vendedor = new.username
+    WHERE rowid IN (SELECT id FROM ventas WHERE usuario_id = new.id);
+END;
+"""
+
+
+def _v4_ventas_fts(con):
+    """Índice de texto completo: id, vendedor, modalidad y descripciones de ítems de cada venta."""
+    try:
+        _ejecutar_script(con, VENTAS_FTS)
+    except sqlite3.OperationalError as e:
+        # SQLite compilado sin FTS5: el historial sigue usando LIKE
+        print(f"⚠️  Sin búsqueda de texto completo (FTS5 no disponible): {e}")
+        return
+    con.execute("DELETE FROM ventas_fts")
+    con.execute("""
+        INSERT INTO ventas_fts (rowid, ref, vendedor, modalidad, descripciones)
+        SELECT v.id, v.id, u.username, v.modalidad,
+               COALESCE((SELECT group_concat(i.descripcion, ' ') FROM venta_items i WHERE i.venta_id = v.id), '')
+        FROM ventas v
+        LEFT JOIN usuarios u ON u.id = v.usuario_id
+    """)
+
+
+def _v5_ventas_dia(con):
+    """
+    ventas.dia = días desde 1970-01-01 (de `fecha`), con índice cubriente (dia, id, total):
+    los reportes por fecha pasan a ser un rango sobre el índice en lugar de LIKE/BETWEEN sobre texto.
+    """
+    if "dia" not in _columnas(con, "ventas"):
+        con.execute("ALTER TABLE ventas ADD COLUMN dia INTEGER")
+    con.execute("UPDATE ventas SET dia = CAST(strftime('%s', fecha) AS INTEGER) / 86400 WHERE dia IS NULL")
+    _ejecutar_script(con, """
+        CREATE INDEX IF NOT EXISTS idx_ventas_dia ON ventas(dia, id, total);
+        DROP INDEX IF EXISTS idx_ventas_fecha;
+
+        -- Red de seguridad para INSERTs que no calculen `dia`
+        CREATE TRIGGER IF NOT EXISTS trg_ventas_dia_ai AFTER INSERT ON ventas WHEN new.dia IS NULL BEGIN
+            UPDATE ventas SET dia = CAST(strftime('%s', new.fecha) AS INTEGER) / 86400 WHERE id = new.id;
+        END;
+    """)
+
+
+def _v6_resumen_diario(con):
+    # DDL y carga inicial copiados acá (no importados de resumen_diario): una
+    # migración ya aplicada no debe cambiar si después cambia el módulo.
+    _ejecutar_script(con, """
+        CREATE TABLE IF NOT EXISTS ventas_diarias (
+            dia INTEGER NOT NULL,
+            modalidad TEXT NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, modalidad, usuario_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS pagos_diarios (
+            dia INTEGER NOT NULL,
+            metodo TEXT NOT NULL,
+            modalidad TEXT NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            monto REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, metodo, modalidad, usuario_id)
+        ) WITHOUT ROWID;
+    """)
+    con.execute("""
+        INSERT OR REPLACE INTO ventas_diarias (dia, modalidad, usuario_id, cantidad, total)
+        SELECT dia, modalidad, usuario_id, COUNT(*), COALESCE(SUM(total), 0)
+        FROM ventas
+        WHERE dia IS NOT NULL
+        GROUP BY dia, modalidad, usuario_id
+    """)
+    con.execute("""
+        INSERT OR REPLACE INTO pagos_diarios (dia, metodo, modalidad, usuario_id, cantidad, monto)
+        SELECT v.dia, p.metodo, v.modalidad, v.usuario_id, COUNT(*), COALESCE(SUM(p.monto), 0)
+        FROM ventas v
+        JOIN pagos p ON p.venta_id = v.id
+        WHERE v.dia IS NOT NULL
+        GROUP BY v.dia, p.metodo, v.modalidad, v.usuario_id
+    """)
+
+
+def _v7_caja_sesiones_totales(con):
+    """
+    caja_sesiones: terminal, totales acumulados por método y conciliación del cierre.
+    Una sola sesión abierta por terminal (índice único parcial).
+    """
+    existentes = _columnas(con, "caja_sesiones")
+    for columna, tipo in (
+        ("terminal", "TEXT"),
+        ("cantidad_ventas", "INTEGER NOT NULL DEFAULT 0"),
+        ("total_ventas", "REAL NOT NULL DEFAULT 0"),
+        ("total_efectivo", "REAL NOT NULL DEFAULT 0"),
+        ("total_tarjeta", "REAL NOT NULL DEFAULT 0"),
+        ("total_transferencia", "REAL NOT NULL DEFAULT 0"),
+        ("monto_esperado", "REAL"),
+        ("diferencia", "REAL"),
+    ):
+        if columna not in existentes:
+            con.execute(f"ALTER TABLE caja_sesiones ADD COLUMN {columna} {tipo}")
+    # Sesiones previas (si las hubiera): totales desde sus ventas
+    con.execute("""
+        UPDATE caja_sesiones SET
+            cantidad_ventas = (SELECT COUNT(*) FROM ventas v WHERE v.caja_sesion_id = caja_sesiones.id),
+            total_ventas = (SELECT COALESCE(SUM(total), 0) FROM ventas v WHERE v.caja_sesion_id = caja_sesiones.id),
+            total_efectivo = (SELECT COALESCE(SUM(p.monto), 0) FROM pagos p JOIN ventas v ON v.id = p.venta_id
+                              WHERE v.caja_sesion_id = caja_sesiones.id AND p.metodo = 'EFECTIVO'),
+            total_tarjeta = (SELECT COALESCE(SUM(p.monto), 0) FROM pagos p JOIN ventas v ON v.id = p.venta_id
+                             WHERE v.caja_sesion_id = caja_sesiones.id AND p.metodo = 'TARJETA'),
+            total_transferencia = (SELECT COALESCE(SUM(p.monto), 0) FROM pagos p JOIN ventas v ON v.id = p.venta_id
+                                   WHERE v.caja_sesion_id = caja_sesiones.id AND p.metodo = 'TRANSFERENCIA')
+    """)
+    _ejecutar_script(con, """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_caja_abierta ON caja_sesiones(terminal) WHERE fecha_cierre IS NULL;
+        CREATE INDEX IF NOT EXISTS idx_ventas_caja ON ventas(caja_sesion_id);
+    """)
+
+
+def _v8_cola_impresion(con):
+    _ejecutar_script(con, """
+        CREATE TABLE IF NOT EXISTS trabajos_impresion (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            venta_id INTEGER,
+            terminal TEXT NOT NULL,
+            modo TEXT NOT NULL,                 -- 'archivo' / 'escpos'
+            ruta TEXT,                          -- destino si modo = 'archivo'
+            datos TEXT NOT NULL,                -- JSON: encabezado, items, pagos, totales
+            estado TEXT NOT NULL DEFAULT 'PENDIENTE'
+                CHECK(estado IN ('PENDIENTE','IMPRIMIENDO','HECHO','ERROR')),
+            intentos INTEGER NOT NULL DEFAULT 0,
+            proximo_intento REAL NOT NULL DEFAULT 0,   -- time.time() desde el que se puede reintentar
+            ultimo_error TEXT,
+            creado TEXT NOT NULL,
+            impreso TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_trabajos_pendientes ON trabajos_impresion(terminal, estado, proximo_intento);
+        CREATE INDEX IF NOT EXISTS idx_trabajos_venta ON trabajos_impresion(venta_id);
+    """)
+
+
+def _v9_archivo_tickets(con):
+    _ejecutar_script(con, """
+        CREATE TABLE IF NOT EXISTS tickets_archivo (
+            venta_id INTEGER PRIMARY KEY,
+            segmento INTEGER NOT NULL,
+            desplazamiento INTEGER NOT NULL,   -- inicio del registro (cabecera incluida)
+            largo INTEGER NOT NULL,            -- bytes comprimidos, sin la cabecera
+            guardado TEXT NOT NULL
+        );
+    """)
+
+
+def _v10_configuracion(con):
+    # Ajustes propios de cada instalación (p. ej. el costo de bcrypt calibrado por auth.py)
+    _ejecutar_script(con, """
+        CREATE TABLE IF NOT EXISTS configuracion (
+            clave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL
+        );
+    """)
+
+
+# (número de versión, descripción, función)
+MIGRACIONES: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "Esquema base", _v1_esquema_base),
+    (2, "materiales: precio por gramo mayor/menor", _v2_materiales_precio_mayor_menor),
+    (3, "materiales: stock_gramos", _v3_stock_gramos),
+    (4, "ventas: índice de texto completo (FTS5)", _v4_ventas_fts),
+    (5, "ventas: columna dia e índice (dia, id, total)", _v5_ventas_dia),
+    (6, "resumen diario de ventas y pagos", _v6_resumen_diario),
+    (7, "caja_sesiones: terminal y totales por método", _v7_caja_sesiones_totales),
+    (8, "cola de impresión de tickets", _v8_cola_impresion),
+    (9, "índice del archivo de tickets", _v9_archivo_tickets),
+    (10, "tabla de configuración", _v10_configuracion),
+]
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+
+def version_actual(con: sqlite3.Connection) -> int:
+    return int(con.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrar(con: sqlite3.Connection | None = None) -> int:
+    """
+    Aplica los pasos pendientes, cada uno en su propia transacción.
+    Devuelve la versión final del esquema.
+    """
+    con = con or get_conn()
+    version = version_actual(con)
+    if version >= VERSION_ACTUAL:
+        return version
+
+    tiene_datos = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' LIMIT 1"
+    ).fetchone() is not None
+    if tiene_datos:
+        # Copia consistente antes de tocar una base con datos
+        ruta = respaldar(con=con)
+        print(f"🗃️  Copia de seguridad creada: {ruta.name}")
+
+    for numero, descripcion, paso in MIGRACIONES:
+        if numero <= version:
+            continue
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            paso(con)
+            con.execute(f"PRAGMA user_version = {int(numero)}")
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        print(f"🔄 Migración {numero} aplicada: {descripcion}")
+        version = numero
+
+    return version
+
+
+if __name__ == "__main__":
+    print(f"✅ Esquema en versión {migrar()} ({db.DB_PATH})")
@@ -1,6 +1,16 @@
 # JoyApp/models.py
-from typing import List, Tuple, Dict, Any
+import json
+import re
+from datetime import date, datetime
+from typing import List, Tuple, Dict, Any, Iterable, NamedTuple
+from . import db
 from .db import get_conn
+from .catalogo import CATALOGO, Material
+from .stock import STOCK
+from . import caja, resumen_diario
+from .pricing import MAYOR, MENOR, precios_materiales
+from .reportes import REPORTES
+from .auth import SIN_USUARIO, USUARIOS
 
 
 
@@ -8,30 +18,102 @@ from .db import get_conn
 def listar_materiales_activos() -> List[Tuple[int, str, str]]:
     """
     Devuelve [(id, nombre, ley)] de materiales activos, ordenados por nombre.
-    OJO: la UI (nueva_venta) espera exactamente estas 3 columnas.
+    Se sirve desde el catálogo en memoria (sin SQL si no hubo cambios).
     """
-    with get_conn() as con:
-        rows = con.execute(
-            "SELECT id, nombre, COALESCE(ley,'') "
-            "FROM materiales WHERE activo=1 ORDER BY nombre"
-        ).fetchall()
-    return rows
+    return [(m.id, m.nombre, m.ley) for m in CATALOGO.activos()]
+
+def listar_materiales() -> List[Material]:
+    """Todos los materiales (activos o no), del más nuevo al más viejo."""
+    return CATALOGO.todos()
 
 def obtener_precios_material(material_id: int) -> Tuple[float, float]:
     """
     Devuelve (precio_gramo_mayor, precio_gramo_menor) para el material.
     """
-    with get_conn() as con:
-        row = con.execute(
-            "SELECT precio_gramo_mayor, precio_gramo_menor "
-            "FROM materiales WHERE id=?",
-            (material_id,)
-        ).fetchone()
-    if not row:
+    mat = CATALOGO.obtener(material_id)
+    if not mat:
         raise ValueError("Material no encontrado")
-    return float(row[0]), float(row[1])
+    return mat.precio_mayor, mat.precio_menor
+
+def guardar_material(
+    nombre: str,
+    ley: str,
+    tipo: str,
+    precio_mayor: float,
+    precio_menor: float,
+    activo: int = 1,
+    stock_gramos: float = 0.0,
+    material_id: int | None = None,
+) -> int:
+    """
+    Inserta (material_id=None) o actualiza un material. Devuelve su id.
+    """
+    with get_conn() as con:
+        if material_id is None:
+            cur = con.execute(
+                "INSERT INTO materiales (nombre, ley, tipo, precio_gramo_mayor, precio_gramo_menor, activo, stock_gramos) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (nombre, ley, tipo, float(precio_mayor), float(precio_menor), int(activo), float(stock_gramos)),
+            )
+            material_id = int(cur.lastrowid)
+        else:
+            con.execute(
+                "UPDATE materiales "
+                "SET nombre=?, ley=?, tipo=?, precio_gramo_mayor=?, precio_gramo_menor=?, activo=?, stock_gramos=? "
+                "WHERE id=?",
+                (nombre, ley, tipo, float(precio_mayor), float(precio_menor), int(activo), float(stock_gramos), int(material_id)),
+            )
+    CATALOGO.invalidar()
+    STOCK.invalidar(material_id)
+    return int(material_id)
+
+def eliminar_material(material_id: int):
+    with get_conn() as con:
+        con.execute("DELETE FROM materiales WHERE id=?", (int(material_id),))
+    CATALOGO.invalidar()
+    STOCK.invalidar(material_id)
 
 # --------- VENTAS ---------
+# Holgura al comparar gramos (floats): 0.1 + 0.2 g tienen que entrar en 0.3 g de stock.
+# La usan TODAS las comparaciones de stock, previas y en el UPDATE, para que coincidan.
+HOLGURA_GRAMOS = 1e-9
+
+
+def _gramos_por_material(items: List[Dict[str, Any]]) -> Dict[int, float]:
+    """Suma los gramos pedidos por material (dos líneas del mismo material se validan juntas)."""
+    gramos: Dict[int, float] = {}
+    for it in items:
+        if (it.get("tipo") == "MATERIAL") and it.get("material_id") and it.get("peso_gramos") is not None:
+            mat_id = int(it["material_id"])
+            gramos[mat_id] = gramos.get(mat_id, 0.0) + float(it["peso_gramos"])
+    return gramos
+
+
+def _subconsulta_pedido(gramos: Dict[int, float]) -> Tuple[str, List[Any]]:
+    """
+    Subconsulta `(material_id, gramos)` con una fila VALUES por material.
+    (No usamos WITH: sqlite3 no trata `WITH ... UPDATE` como DML y no abriría la transacción.)
+    """
+    valores = ",".join("(?,?)" for _ in gramos)
+    params: List[Any] = [x for par in gramos.items() for x in par]
+    return f"(SELECT column1 AS material_id, column2 AS gramos FROM (VALUES {valores}))", params
+
+
+def _descontar_stock(cur, gramos: Dict[int, float]) -> bool:
+    """
+    Descuenta los gramos con un único UPDATE condicionado a que alcance el stock.
+    False si algún material no tenía suficiente (el llamador hace rollback).
+    """
+    pedido, params = _subconsulta_pedido(gramos)
+    cur.execute(
+        "UPDATE materiales SET stock_gramos = stock_gramos - p.gramos "
+        f"FROM {pedido} AS p "
+        "WHERE materiales.id = p.material_id AND materiales.stock_gramos + ? >= p.gramos",
+        params + [HOLGURA_GRAMOS],
+    )
+    return cur.rowcount == len(gramos)
+
+
 def crear_venta(
     usuario_id: int,
     modalidad: str,
@@ -42,43 +124,53 @@ def crear_venta(
     """
     Crea venta + items + pagos en una transacción.
     Además:
-      - Verifica stock para ítems tipo 'MATERIAL'.
-      - Descuenta stock_gramos = stock_gramos - peso_gramos.
-    Lanza ValueError si no hay stock suficiente.
+      - Verifica stock para ítems tipo 'MATERIAL' (una sola consulta agregada por material).
+      - Descuenta stock_gramos con un único UPDATE condicionado a stock_gramos >= pedido,
+        así dos terminales no pueden vender el mismo stock.
+      - Con caja_sesion_id, suma la venta a los totales de esa sesión de caja.
+    Lanza ValueError si no hay stock suficiente o la sesión de caja no está abierta.
     """
     total = sum(float(i["subtotal"]) for i in items)
+    gramos = _gramos_por_material(items)
 
     with get_conn() as con:
         cur = con.cursor()
 
-        # Verificar stock suficiente
-        for it in items:
-            if (it.get("tipo") == "MATERIAL") and it.get("material_id") and it.get("peso_gramos") is not None:
-                mat_id = int(it["material_id"])
-                peso = float(it["peso_gramos"])
-                row = cur.execute("SELECT stock_gramos FROM materiales WHERE id=?", (mat_id,)).fetchone()
-                if not row:
+        if gramos:
+            pedido, params = _subconsulta_pedido(gramos)
+
+            # Verificar stock suficiente (mensaje claro al usuario)
+            faltantes = cur.execute(
+                "SELECT p.material_id, p.gramos, m.id, COALESCE(m.stock_gramos, 0) "
+                f"FROM {pedido} AS p LEFT JOIN materiales m ON m.id = p.material_id "
+                "WHERE m.id IS NULL OR COALESCE(m.stock_gramos, 0) + ? < p.gramos",
+                params + [HOLGURA_GRAMOS],
+            ).fetchall()
+            for mat_id, peso, existe, stock_actual in faltantes:
+                if existe is None:
                     raise ValueError(f"Material #{mat_id} no encontrado.")
-                stock_actual = float(row[0] or 0)
-                if stock_actual < peso:
-                    raise ValueError(
-                        f"Stock insuficiente para material #{mat_id}. Disponible: {stock_actual} g, requerido: {peso} g."
-                    )
+                raise ValueError(
+                    f"Stock insuficiente para material #{mat_id}. Disponible: {stock_actual} g, requerido: {peso} g."
+                )
+
+            # Descontar stock: la guarda en el WHERE es la que realmente impide sobreventa
+            if not _descontar_stock(cur, gramos):
+                raise ValueError("Stock insuficiente: otra venta tomó el stock disponible. Intentá de nuevo.")
 
-        # Insertar venta
+        # Insertar venta ('now' es el mismo instante en toda la sentencia: fecha y dia coinciden)
         cur.execute(
-            "INSERT INTO ventas (fecha, usuario_id, modalidad, caja_sesion_id, total) "
-            "VALUES (datetime('now'), ?, ?, ?, ?)",
+            "INSERT INTO ventas (fecha, dia, usuario_id, modalidad, caja_sesion_id, total) "
+            "VALUES (datetime('now'), CAST(strftime('%s', 'now') AS INTEGER) / 86400, ?, ?, ?, ?)",
             (usuario_id, modalidad, caja_sesion_id, total)
         )
         venta_id = int(cur.lastrowid)
 
         # Insertar ítems
-        for it in items:
-            cur.execute(
-                "INSERT INTO venta_items "
-                "(venta_id, material_id, descripcion, peso_gramos, precio_por_gramo, cantidad, subtotal, tipo) "
-                "VALUES (?,?,?,?,?,?,?,?)",
+        cur.executemany(
+            "INSERT INTO venta_items "
+            "(venta_id, material_id, descripcion, peso_gramos, precio_por_gramo, cantidad, subtotal, tipo) "
+            "VALUES (?,?,?,?,?,?,?,?)",
+            [
                 (
                     venta_id,
                     it.get("material_id"),
@@ -88,24 +180,518 @@ def crear_venta(
                     it.get("cantidad", 1),
                     it["subtotal"],
                     it.get("tipo", "MATERIAL"),
-                ),
-            )
-
-        # Descontar stock
-        for it in items:
-            if (it.get("tipo") == "MATERIAL") and it.get("material_id") and it.get("peso_gramos") is not None:
-                cur.execute(
-                    "UPDATE materiales SET stock_gramos = stock_gramos - ? WHERE id=?",
-                    (float(it["peso_gramos"]), int(it["material_id"]))
                 )
+                for it in items
+            ],
+        )
 
         # Insertar pagos
+        cur.executemany(
+            "INSERT INTO pagos (venta_id, metodo, monto) VALUES (?,?,?)",
+            [(venta_id, p["metodo"], p["monto"]) for p in pagos],
+        )
+
+        # Resumen diario (misma transacción: o queda todo o nada)
+        dia = cur.execute("SELECT dia FROM ventas WHERE id=?", (venta_id,)).fetchone()[0]
+        por_metodo: Dict[str, Tuple[int, float]] = {}
         for p in pagos:
+            n, monto = por_metodo.get(p["metodo"], (0, 0.0))
+            por_metodo[p["metodo"]] = (n + 1, monto + float(p["monto"]))
+        resumen_diario.acumular(
+            cur,
+            [(dia, modalidad, usuario_id, 1, total)],
+            [(dia, metodo, modalidad, usuario_id, n, monto) for metodo, (n, monto) in por_metodo.items()],
+        )
+
+        # Totales de la sesión de caja (falla si la sesión se cerró mientras tanto)
+        if caja_sesion_id is not None:
+            caja.registrar_venta(cur, caja_sesion_id, total, pagos)
+
+    # Solo el stock: el catálogo ve el cambio por data_version (las ventas se guardan
+    # en el pool de tareas) sin rearmar nada, porque no cambian las etiquetas
+    if gramos:
+        STOCK.invalidar(gramos.keys())
+    REPORTES.venta_registrada(dia)
+    return venta_id
+
+# --------- IMPORTACIÓN MASIVA ---------
+METODOS_PAGO = ("EFECTIVO", "TARJETA", "TRANSFERENCIA")
+LOTE_IMPORTACION = 2000  # ventas por transacción
+
+
+class ResultadoImportacion(NamedTuple):
+    importadas: List[Tuple[Any, int]]  # [(ref, id de venta nuevo)]
+    errores: List[Tuple[Any, str]]     # [(ref, motivo)]
+
+
+def _normalizar_fecha(valor: Any) -> str:
+    """'YYYY-MM-DD', 'YYYY-MM-DD HH:MM' o 'YYYY-MM-DD HH:MM:SS' (también con 'T') -> 'YYYY-MM-DD HH:MM:SS'."""
+    texto = str(valor or "").strip().replace("T", " ")
+    for formato in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    raise ValueError(f"fecha inválida: {valor!r}")
+
+
+def _preparar_venta(v: Dict[str, Any], usuarios: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Valida una venta a importar y arma sus ítems como lo hace Nueva Venta.
+    Los ítems MATERIAL quedan sin subtotal: se cotizan todos juntos después (_cerrar_venta).
+    Lanza ValueError con el motivo si algo no cierra.
+    """
+    if v.get("error"):
+        raise ValueError(v["error"])  # el lector ya no la pudo interpretar
+    modalidad = str(v.get("modalidad") or "").strip().upper()
+    if modalidad not in (MAYOR, MENOR):
+        raise ValueError(f"modalidad inválida: {v.get('modalidad')!r}")
+    fecha = _normalizar_fecha(v.get("fecha"))
+
+    if v.get("usuario_id") not in (None, ""):
+        usuario_id = int(v["usuario_id"])
+        if usuario_id not in usuarios.values():
+            raise ValueError(f"usuario #{usuario_id} no existe")
+    else:
+        vendedor = str(v.get("vendedor") or "").strip()
+        if vendedor not in usuarios:
+            raise ValueError(f"vendedor desconocido: {vendedor!r}")
+        usuario_id = usuarios[vendedor]
+
+    items = []
+    for it in v.get("items") or []:
+        tipo = str(it.get("tipo") or "MATERIAL").strip().upper()
+        if tipo == "EXTRA":
+            subtotal = float(it.get("subtotal") or 0)
+            if subtotal <= 0:
+                raise ValueError("extra sin subtotal")
+            items.append({
+                "material_id": None, "descripcion": it.get("descripcion") or "Extra", "peso_gramos": None,
+                "precio_por_gramo": None, "cantidad": int(it.get("cantidad") or 1), "subtotal": subtotal, "tipo": "EXTRA",
+            })
+            continue
+        if tipo != "MATERIAL":
+            raise ValueError(f"tipo de ítem inválido: {it.get('tipo')!r}")
+        mat = CATALOGO.obtener(int(it.get("material_id") or 0))
+        if mat is None:
+            raise ValueError(f"material #{it.get('material_id')} no encontrado")
+        peso = float(str(it.get("peso_gramos") or 0).replace(",", "."))
+        if peso <= 0:
+            raise ValueError(f"peso inválido para material #{mat.id}")
+        # Precio anotado en el ticket de papel, o el vigente del catálogo
+        if it.get("precio_por_gramo") not in (None, ""):
+            pgr = float(it["precio_por_gramo"])
+        else:
+            pgr = mat.precio_mayor if modalidad == MAYOR else mat.precio_menor
+        items.append({
+            "material_id": mat.id,
+            "descripcion": f"{mat.nombre} {mat.ley or ''} {peso} g @ {int(pgr)}",
+            "peso_gramos": peso,
+            "precio_por_gramo": pgr,
+            "cantidad": 1,
+            "subtotal": None,
+            "tipo": "MATERIAL",
+        })
+    if not items:
+        raise ValueError("venta sin ítems")
+
+    pagos = []
+    for p in v.get("pagos") or ([{"metodo": v["metodo"]}] if v.get("metodo") else []):
+        metodo = str(p.get("metodo") or "").strip().upper()
+        if metodo not in METODOS_PAGO:
+            raise ValueError(f"método de pago inválido: {p.get('metodo')!r}")
+        monto = p.get("monto")
+        pagos.append({"metodo": metodo, "monto": None if monto in (None, "") else float(monto)})
+    if not pagos:
+        raise ValueError("venta sin pagos (falta pagos o metodo)")
+
+    return {
+        "fecha": fecha, "dia": numero_dia(fecha), "usuario_id": usuario_id,
+        "modalidad": modalidad, "items": items, "pagos": pagos, "total": None,
+    }
+
+
+def _cerrar_venta(v: Dict[str, Any]):
+    """Con los subtotales ya cotizados: total de la venta y control de los pagos."""
+    total = sum(float(i["subtotal"]) for i in v["items"])
+    pagos = v["pagos"]
+    if len(pagos) == 1 and pagos[0]["monto"] is None:
+        pagos[0]["monto"] = total
+    if any(p["monto"] is None for p in pagos):
+        raise ValueError("pagos sin monto")
+    if abs(sum(p["monto"] for p in pagos) - total) >= 1:
+        raise ValueError(f"los pagos ({sum(p['monto'] for p in pagos):.0f}) no suman el total ({total:.0f})")
+    v["total"] = total
+
+
+def importar_ventas(
+    ventas: Iterable[Dict[str, Any]],
+    *,
+    solo_validar: bool = False,
+    tam_lote: int = LOTE_IMPORTACION,
+) -> ResultadoImportacion:
+    """
+    Carga ventas hechas fuera del sistema (tickets de papel, otra máquina).
+
+    Cada venta: {"ref", "fecha", "vendedor" o "usuario_id", "modalidad",
+    "items": [{"material_id", "peso_gramos", ["precio_por_gramo"]} | {"tipo": "EXTRA", "descripcion", "subtotal"}],
+    "pagos": [{"metodo", "monto"}] (o "metodo" para un único pago por el total)}.
+
+    Se valida todo y se cotiza en una sola llamada a precios_materiales; el stock se controla una sola
+    vez para todo el archivo (en orden: la venta que ya no tiene stock va a
+    errores). Las válidas se insertan de a `tam_lote` por transacción con
+    executemany, descontando stock y sumando al resumen diario; si un lote
+    falla, sus ventas se reintentan de a una. Las ventas importadas no se
+    asocian a ninguna sesión de caja.
+    """
+    errores: List[Tuple[Any, str]] = []
+    usuarios = {u: int(i) for i, u in get_conn().execute("SELECT id, username FROM usuarios")}
+
+    leidas: List[Tuple[Any, Dict[str, Any]]] = []
+    for n, v in enumerate(ventas, start=1):
+        ref = v.get("ref", n)
+        try:
+            leidas.append((ref, _preparar_venta(v, usuarios)))
+        except (ValueError, TypeError) as e:
+            errores.append((ref, str(e)))
+
+    # Todas las líneas de material de todo el archivo se cotizan en una sola llamada
+    lineas = [it for _ref, v in leidas for it in v["items"] if it["subtotal"] is None]
+    subtotales = precios_materiales(
+        (it["precio_por_gramo"], it["peso_gramos"], v["modalidad"])
+        for _ref, v in leidas for it in v["items"] if it["subtotal"] is None
+    )
+    for it, subtotal in zip(lineas, subtotales):
+        it["subtotal"] = subtotal
+
+    preparadas: List[Tuple[Any, Dict[str, Any]]] = []
+    for ref, v in leidas:
+        try:
+            _cerrar_venta(v)
+            preparadas.append((ref, v))
+        except ValueError as e:
+            errores.append((ref, str(e)))
+
+    # Stock: una lectura para todos los materiales y descuento en memoria, venta por venta
+    pedido_total: Dict[int, float] = {}
+    for _ref, v in preparadas:
+        for mid, g in _gramos_por_material(v["items"]).items():
+            pedido_total[mid] = pedido_total.get(mid, 0.0) + g
+    disponible = dict(STOCK.leer_varios(pedido_total)) if pedido_total else {}
+    aceptadas: List[Tuple[Any, Dict[str, Any]]] = []
+    for ref, v in preparadas:
+        gramos = _gramos_por_material(v["items"])
+        falta = next((mid for mid, g in gramos.items() if g > disponible.get(mid, 0.0) + HOLGURA_GRAMOS), None)
+        if falta is not None:
+            errores.append((ref, f"stock insuficiente para material #{falta} ({disponible.get(falta, 0.0):.2f} g disponibles)"))
+            continue
+        for mid, g in gramos.items():
+            disponible[mid] -= g
+        aceptadas.append((ref, v))
+
+    if solo_validar:
+        return ResultadoImportacion([(ref, 0) for ref, _ in aceptadas], errores)
+
+    importadas: List[Tuple[Any, int]] = []
+    materiales: set = set()
+    dias: List[int] = []
+    for i in range(0, len(aceptadas), max(1, tam_lote)):
+        lote = aceptadas[i:i + tam_lote]
+        try:
+            insertadas = list(zip(lote, _insertar_lote([v for _ref, v in lote])))
+        except ValueError:
+            # Otra terminal tomó stock mientras tanto: el lote volvió atrás entero. Se
+            # reintenta de a una venta, así el reporte nombra solo las que de verdad fallan.
+            insertadas = []
+            for ref, v in lote:
+                try:
+                    insertadas.append(((ref, v), _insertar_lote([v])[0]))
+                except ValueError as e:
+                    errores.append((ref, str(e)))
+        for (ref, v), vid in insertadas:
+            importadas.append((ref, vid))
+            materiales.update(_gramos_por_material(v["items"]))
+            dias.append(v["dia"])
+
+    if materiales:
+        CATALOGO.invalidar()
+        STOCK.invalidar(materiales)
+    if dias:
+        REPORTES.invalidar(min(dias), max(dias) + 1)
+    return ResultadoImportacion(importadas, errores)
+
+
+def _insertar_lote(lote: List[Dict[str, Any]]) -> List[int]:
+    """Inserta un lote de ventas ya validadas en UNA transacción. Devuelve los ids asignados."""
+    gramos: Dict[int, float] = {}
+    for v in lote:
+        for mid, g in _gramos_por_material(v["items"]).items():
+            gramos[mid] = gramos.get(mid, 0.0) + g
+
+    con = get_conn()
+    con.execute("BEGIN IMMEDIATE")  # stock y resumen diario sin carreras con otras terminales
+    try:
+        cur = con.cursor()
+        if gramos and not _descontar_stock(cur, gramos):
+            raise ValueError("stock insuficiente: otra venta tomó el stock mientras se importaba")
+
+        # Los ids los asigna SQLite (AUTOINCREMENT: nunca reusa el de una venta borrada);
+        # con los ids en mano, ítems y pagos van en un solo executemany cada uno
+        ids = []
+        for v in lote:
             cur.execute(
-                "INSERT INTO pagos (venta_id, metodo, monto) VALUES (?,?,?)",
-                (venta_id, p["metodo"], p["monto"])
+                "INSERT INTO ventas (fecha, dia, usuario_id, modalidad, caja_sesion_id, total) "
+                "VALUES (?,?,?,?,NULL,?)",
+                (v["fecha"], v["dia"], v["usuario_id"], v["modalidad"], v["total"]),
             )
+            ids.append(int(cur.lastrowid))
+        cur.executemany(
+            "INSERT INTO venta_items "
+            "(venta_id, material_id, descripcion, peso_gramos, precio_por_gramo, cantidad, subtotal, tipo) "
+            "VALUES (?,?,?,?,?,?,?,?)",
+            [
+                (vid, it["material_id"], it["descripcion"], it["peso_gramos"], it["precio_por_gramo"],
+                 it["cantidad"], it["subtotal"], it["tipo"])
+                for vid, v in zip(ids, lote) for it in v["items"]
+            ],
+        )
+        cur.executemany(
+            "INSERT INTO pagos (venta_id, metodo, monto) VALUES (?,?,?)",
+            [(vid, p["metodo"], p["monto"]) for vid, v in zip(ids, lote) for p in v["pagos"]],
+        )
 
+        # Resumen diario: agregado en memoria, una fila por (día, modalidad, vendedor[, método])
+        por_venta: Dict[Tuple, List] = {}
+        por_pago: Dict[Tuple, List] = {}
+        for v in lote:
+            clave = (v["dia"], v["modalidad"], v["usuario_id"])
+            acc = por_venta.setdefault(clave, [0, 0.0])
+            acc[0] += 1
+            acc[1] += v["total"]
+            for p in v["pagos"]:
+                acc = por_pago.setdefault((v["dia"], p["metodo"], v["modalidad"], v["usuario_id"]), [0, 0.0])
+                acc[0] += 1
+                acc[1] += p["monto"]
+        resumen_diario.acumular(
+            cur,
+            [(*k, n, total) for k, (n, total) in por_venta.items()],
+            [(*k, n, monto) for k, (n, monto) in por_pago.items()],
+        )
         con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    return ids
 
-    return venta_id
+# --------- CONSULTAS (historial / cierre) ---------
+_EPOCA = date(1970, 1, 1)
+
+
+def numero_dia(d: date | str) -> int:
+    """Fecha ('YYYY-MM-DD', date o datetime) -> valor de ventas.dia (días desde 1970-01-01)."""
+    if isinstance(d, str):
+        d = datetime.strptime(d[:10], "%Y-%m-%d").date()
+    elif isinstance(d, datetime):
+        d = d.date()
+    return (d - _EPOCA).days
+
+
+def rango_dias(desde: date | str | None, hasta: date | str | None) -> Tuple[int | None, int | None]:
+    """
+    Rango semiabierto [desde, hasta + 1 día) en números de día; None = sin límite.
+    `hasta` es inclusivo para el usuario: incluye todas las ventas de ese día.
+    """
+    return (
+        numero_dia(desde) if desde else None,
+        numero_dia(hasta) + 1 if hasta else None,
+    )
+
+TAM_PAGINA = 200  # filas por ventana en el historial
+
+
+def _hay_fts() -> bool:
+    """True si la base tiene ventas_fts (la migración 4 la omite si SQLite no trae FTS5)."""
+    ruta = str(db.DB_PATH)
+    if ruta not in _FTS_POR_BASE:
+        _FTS_POR_BASE[ruta] = get_conn().execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'ventas_fts'"
+        ).fetchone() is not None
+    return _FTS_POR_BASE[ruta]
+
+_FTS_POR_BASE: Dict[str, bool] = {}
+
+
+def consulta_fts(texto: str) -> str:
+    """
+    "collar 750" -> '"collar"* "750"*' : todas las palabras, cada una como prefijo.
+    Las comillas evitan que el texto del usuario se interprete como sintaxis FTS.
+    """
+    palabras = re.findall(r"\w+", texto.lower())
+    return " ".join(f'"{p}"*' for p in palabras)
+
+
+def _filtro_ventas(desde: str | None, hasta: str | None, texto: str) -> Tuple[str, List[Any]]:
+    """
+    WHERE común al historial. Sin fechas ni texto no agrega condiciones,
+    así la paginación recorre la PK sin tocar el resto de la tabla.
+    """
+    condiciones: List[str] = []
+    params: List[Any] = []
+    dia_ini, dia_fin = rango_dias(desde, hasta)
+    if dia_ini is not None:
+        condiciones.append("v.dia >= ?")
+        params.append(dia_ini)
+    if dia_fin is not None:
+        condiciones.append("v.dia < ?")
+        params.append(dia_fin)
+    txt = texto.strip().lower()
+    if txt and _hay_fts():
+        fts = consulta_fts(txt)
+        if fts:
+            condiciones.append("v.id IN (SELECT rowid FROM ventas_fts WHERE ventas_fts MATCH ?)")
+            params.append(fts)
+    elif txt:
+        like = f"%{txt}%"
+        condiciones.append(
+            "(LOWER(COALESCE(u.username,'')) LIKE ? "
+            "OR LOWER(COALESCE(v.modalidad,'')) LIKE ? "
+            "OR CAST(v.id AS TEXT) LIKE ?)"
+        )
+        params += [like, like, like]
+    return " AND ".join(condiciones), params
+
+
+def pagina_ventas(
+    desde: str | None = None,
+    hasta: str | None = None,
+    texto: str = "",
+    antes_de_id: int | None = None,
+    limite: int = TAM_PAGINA,
+) -> List[Tuple]:
+    """
+    Una ventana de [(id, fecha, vendedor, modalidad, total)] ordenada por id DESC.
+    `texto` busca en id, vendedor, modalidad y descripción de los ítems (FTS5).
+    Para la siguiente, pasar antes_de_id = id de la última fila recibida
+    (cursor por clave: no usa OFFSET, cuesta lo mismo en la página 1 que en la 500).
+    """
+    where, params = _filtro_ventas(desde, hasta, texto)
+    if antes_de_id is not None:
+        where = f"{where} AND v.id < ?" if where else "v.id < ?"
+        params.append(int(antes_de_id))
+    # El JOIN a usuarios solo hace falta para buscar por vendedor sin FTS; el nombre sale del caché
+    join = "LEFT JOIN usuarios u ON u.id = v.usuario_id" if texto.strip() and not _hay_fts() else ""
+    rows = get_conn().execute(f"""
+        SELECT v.id, v.fecha, v.usuario_id, v.modalidad, v.total
+        FROM ventas v
+        {join}
+        {"WHERE " + where if where else ""}
+        ORDER BY v.id DESC
+        LIMIT ?
+    """, (*params, int(limite))).fetchall()
+    nombres = USUARIOS.nombres()
+    return [(vid, fecha, nombres.get(uid, SIN_USUARIO), mod, tot) for vid, fecha, uid, mod, tot in rows]
+
+
+def resumen_ventas(desde: str | None = None, hasta: str | None = None, texto: str = "") -> Tuple[int, float]:
+    """(cantidad, total) de las ventas que cumplen el filtro, calculado en SQL."""
+    if not texto.strip():
+        # Solo fechas: alcanza con el resumen diario (unas pocas filas por día)
+        return resumen_diario.totales(*rango_dias(desde, hasta))
+    where, params = _filtro_ventas(desde, hasta, texto)
+    join = "LEFT JOIN usuarios u ON u.id = v.usuario_id" if texto.strip() and not _hay_fts() else ""
+    cant, total = get_conn().execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(v.total), 0)
+        FROM ventas v
+        {join}
+        {"WHERE " + where if where else ""}
+    """, params).fetchone()
+    return int(cant), float(total)
+
+def detalle_venta(venta_id: int) -> Tuple[List[Tuple], List[Tuple]]:
+    """
+    (items, pagos) de una venta:
+      items = [(descripcion, peso_gramos, precio_por_gramo, cantidad, subtotal, tipo)]
+      pagos = [(metodo, monto)]
+    """
+    con = get_conn()
+    items = con.execute("""
+        SELECT descripcion, IFNULL(peso_gramos,0), IFNULL(precio_por_gramo,0),
+               IFNULL(cantidad,1), subtotal, tipo
+        FROM venta_items
+        WHERE venta_id = ?
+        ORDER BY id ASC
+    """, (venta_id,)).fetchall()
+    pagos = con.execute("""
+        SELECT metodo, monto FROM pagos
+        WHERE venta_id = ?
+        ORDER BY id ASC
+    """, (venta_id,)).fetchall()
+    return items, pagos
+
+def obtener_venta(venta_id: int) -> Tuple | None:
+    """(id, fecha, modalidad, total, vendedor) o None si no existe."""
+    row = get_conn().execute(
+        "SELECT id, fecha, modalidad, total, usuario_id FROM ventas WHERE id = ?", (venta_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return (*row[:4], USUARIOS.nombre(row[4]))
+
+def datos_tickets(
+    venta_ids: Iterable[int] | None = None,
+    desde: str | None = None,
+    hasta: str | None = None,
+    encabezado: Dict[str, Any] | None = None,
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    [(venta_id, {encabezado, items, pagos, totales})] listos para Printer, por id
+    ascendente, de las ventas indicadas o (sin venta_ids) del rango [desde, hasta].
+    Tres consultas en total (ventas, ítems, pagos), sin importar cuántas ventas sean.
+    `encabezado` aporta los datos fijos del ticket (nombre, teléfono).
+    """
+    if venta_ids is not None:
+        where, params = "v.id IN (SELECT value FROM json_each(?))", [json.dumps([int(i) for i in venta_ids])]
+    else:
+        where, params = _filtro_ventas(desde, hasta, "")
+    con = get_conn()
+    ventas = con.execute(f"""
+        SELECT v.id, v.fecha, v.modalidad, v.total, v.usuario_id
+        FROM ventas v
+        {"WHERE " + where if where else ""}
+        ORDER BY v.id
+    """, params).fetchall()
+    if not ventas:
+        return []
+
+    subconsulta = f"SELECT v.id FROM ventas v {'WHERE ' + where if where else ''}"
+    items: Dict[int, List[Dict[str, Any]]] = {}
+    for vid, desc, subt in con.execute(f"""
+        SELECT venta_id, descripcion, subtotal FROM venta_items
+        WHERE venta_id IN ({subconsulta}) ORDER BY venta_id, id
+    """, params):
+        items.setdefault(vid, []).append({"descripcion": desc or "", "detalle": None, "subtotal": float(subt or 0)})
+    pagos: Dict[int, List[Dict[str, Any]]] = {}
+    for vid, metodo, monto in con.execute(f"""
+        SELECT venta_id, metodo, monto FROM pagos
+        WHERE venta_id IN ({subconsulta}) ORDER BY venta_id, id
+    """, params):
+        pagos.setdefault(vid, []).append({"metodo": metodo, "monto": float(monto or 0)})
+
+    base = dict(encabezado or {})
+    nombres = USUARIOS.nombres()
+    return [
+        (vid, {
+            "encabezado": {**base, "ticket_id": f"{vid} (reimpreso)", "vendedor": nombres.get(uid, SIN_USUARIO),
+                           "modalidad": modalidad, "emitido": str(fecha)[:16]},
+            "items": items.get(vid, []),
+            "pagos": pagos.get(vid, []),
+            "totales": {"total": float(total or 0)},
+        })
+        for vid, fecha, modalidad, total, uid in ventas
+    ]
+
+def resumen_caja_dia(dia: date | str) -> Tuple[int, float, List[Tuple[str, float]]]:
+    """(cantidad de ventas, total, [(metodo, monto)]) del día, leído del resumen diario."""
+    d0 = numero_dia(dia)
+    cant, total = resumen_diario.totales(d0, d0 + 1)
+    return cant, total, resumen_diario.por_metodo(d0, d0 + 1)
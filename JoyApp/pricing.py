@@ -1,21 +1,73 @@
         # JoyApp/pricing.py
-from math import ceil
-from typing import Literal
+from decimal import ROUND_CEILING, ROUND_HALF_EVEN, Decimal
+from typing import Dict, Iterable, List, Literal, Tuple
 
 MENOR: Literal["MENOR"] = "MENOR"
 MAYOR: Literal["MAYOR"] = "MAYOR"
+REDONDEO_MENOR = 1000  # MENOR: precio por gramo al alza a múltiplos de esto (Gs)
+
+_UNO = Decimal(1)
+_PASO_MENOR = Decimal(REDONDEO_MENOR)
+
+# (precio por gramo, peso en gramos, modalidad)
+Linea = Tuple[float, float, str]
+
+
+def _decimal(valor) -> Decimal:
+    """Número -> Decimal exacto tal como se escribió (0.1 -> '0.1', no 0.1000000000000000055...)."""
+    if isinstance(valor, Decimal):
+        return valor
+    if isinstance(valor, int):
+        return Decimal(valor)
+    return Decimal(str(valor))
+
+
+def precio_gramo_aplicado(precio_gramo, modalidad: str) -> Decimal:
+    """
+    Precio por gramo que se cobra:
+    - MAYOR: tal cual.
+    - MENOR: al alza a múltiplos de REDONDEO_MENOR.
+    """
+    p = _decimal(precio_gramo)
+    if modalidad == MENOR:
+        return (p / _PASO_MENOR).to_integral_value(rounding=ROUND_CEILING) * _PASO_MENOR
+    return p
+
+
+def precios_gramo_aplicados(precios_gramo: Iterable, modalidad: str) -> List[Decimal]:
+    """precio_gramo_aplicado para muchos precios de una misma modalidad."""
+    return [precio_gramo_aplicado(p, modalidad) for p in precios_gramo]
+
+
+def precios_materiales(lineas: Iterable[Linea]) -> List[int]:
+    """
+    Subtotales (Gs, enteros) de muchas líneas (precio_gramo, peso_gramos, modalidad) en una llamada.
+    Aritmética decimal exacta: precio aplicado × gramos, redondeado al guaraní
+    (mitad al par, como round()). El precio aplicado se calcula una vez por
+    (precio, modalidad) distinto, no por línea.
+    """
+    aplicados: Dict[Tuple, Decimal] = {}
+    res: List[int] = []
+    for precio_gramo, peso_gramos, modalidad in lineas:
+        clave = (precio_gramo, modalidad)
+        p = aplicados.get(clave)
+        if p is None:
+            p = aplicados[clave] = precio_gramo_aplicado(precio_gramo, modalidad)
+        res.append(int((p * _decimal(peso_gramos)).quantize(_UNO, rounding=ROUND_HALF_EVEN)))
+    return res
+
 
 def precio_material(precio_gramo: float, peso_gramos: float, modalidad: str) -> int:
     """
     - MAYOR: usa el precio por gramo tal cual.
     - MENOR: redondea el precio por gramo al alza a múltiplos de 1000.
     Devuelve el subtotal redondeado a entero (Gs).
+    Es precios_materiales con una sola línea: los dos dan siempre lo mismo.
     """
-    if modalidad == MENOR:
-        precio_aj = ceil(precio_gramo / 1000) * 1000
-    else:
-        precio_aj = precio_gramo
-    subtotal = precio_aj * float(peso_gramos)
-    return int(round(subtotal))
+    return precios_materiales([(precio_gramo, peso_gramos, modalidad)])[0]
+
 
-__all__ = ["MENOR", "MAYOR", "precio_material"]
+__all__ = [
+    "MENOR", "MAYOR", "REDONDEO_MENOR",
+    "precio_material", "precios_materiales", "precio_gramo_aplicado", "precios_gramo_aplicados",
+]
@@ -1,62 +1,375 @@
 # JoyApp/printing.py
+"""
+Impresión de tickets.
+
+`Printer` arma el ticket, lo guarda en el archivo de tickets (archivo_tickets)
+y lo imprime (impresora ESC/POS, o un .txt si se pide una ruta).
+`COLA` es el spooler: la venta solo encola el ticket (una fila en
+trabajos_impresion) y un hilo de fondo lo imprime. Si la impresora falla,
+reintenta con espera creciente; si la app se cierra a mitad de camino, los
+pendientes se retoman al volver a abrir. Cada terminal imprime solo lo suyo.
+"""
+import json
+import os
+import threading
+import time
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .archivo_tickets import ARCHIVO
+from .caja import TERMINAL
+from .db import get_conn
+
+# --------- PLANTILLA DE TICKET ---------
+ANCHO = 30
+
+# Comandos ESC/POS
+ESC_INICIAR = b"\x1b@"            # ESC @: reinicia la impresora
+ESC_CP850 = b"\x1bt\x02"          # ESC t 2: tabla de caracteres PC850 (acentos y ñ)
+ESC_NEGRITA = b"\x1bE\x01"
+ESC_NORMAL = b"\x1bE\x00"
+GS_CORTE = b"\n\n\n\x1dV\x01"    # avanza y corte parcial
+
+class PlantillaTicket:
+    """
+    Diseño del ticket compilado una sola vez en plantillas de texto con los
+    separadores y los comandos ESC/POS ya incrustados. renderizar() solo
+    completa los datos variables y codifica el ticket entero de una vez en un
+    bytearray (los comandos son ASCII, iguales en UTF-8 y en PC850).
+
+    escpos=False da el texto plano de modo "archivo" (mismo formato de siempre);
+    escpos=True agrega inicio, tabla PC850, TOTAL en negrita y corte.
+    """
+
+    def __init__(self, codificacion: str = "utf-8", escpos: bool = False, ancho: int = ANCHO):
+        self.codificacion = codificacion
+        self.escpos = escpos
+        regla = "-" * ancho + "\n"
+        comando = (lambda b: b.decode("ascii")) if escpos else (lambda b: "")
+
+        self._inicio = comando(ESC_INICIAR + ESC_CP850)
+        self._regla = regla
+        self._cabecera = "Ticket: %s %s\nVendedor: %s\nModalidad: %s\n" + regla
+        self._item = "%s\nSubt: $ %s\n" + regla
+        self._item_detalle = "%s\n%s\nSubt: $ %s\n" + regla
+        self._total = comando(ESC_NEGRITA) + "TOTAL: $ %s" + comando(ESC_NORMAL) + "\n"
+        self._pago = "Pago %s: $ %s\n"
+        self._fin = comando(GS_CORTE)
+
+    @staticmethod
+    def _gs(valor) -> str:
+        return format(int(valor), ",").replace(",", ".")
+
+    def renderizar(self, encabezado, items, pagos, totales, ahora: str | None = None) -> bytearray:
+        gs = self._gs
+        partes = [self._inicio, str(encabezado.get("nombre", "TIENDA")), "\n"]
+        if encabezado.get("telefono"):
+            partes.append(f"Tel: {encabezado['telefono']}\n")
+        partes.append(self._regla)
+
+        ahora = ahora or encabezado.get("emitido") or datetime.now().strftime("%Y-%m-%d %H:%M")
+        partes.append(self._cabecera % (
+            encabezado.get("ticket_id", ""), ahora, encabezado.get("vendedor", ""), encabezado.get("modalidad", ""),
+        ))
+
+        item, item_detalle = self._item, self._item_detalle
+        partes.extend(
+            item_detalle % (it["descripcion"], it["detalle"], gs(it["subtotal"])) if it.get("detalle")
+            else item % (it["descripcion"], gs(it["subtotal"]))
+            for it in items
+        )
+
+        partes.append(self._total % gs(totales["total"]))
+        pago = self._pago
+        partes.extend(pago % (p["metodo"], gs(p["monto"])) for p in pagos)
+        partes.append(self._fin)
+        texto = "".join(partes)
+        # Sin acentos (lo habitual) el texto es ASCII puro, igual en cualquier tabla y mucho más rápido de codificar
+        return bytearray(texto, "ascii") if texto.isascii() else bytearray(texto, self.codificacion, "replace")
+
+
+# Compiladas una vez para toda la app
+PLANTILLA_TEXTO = PlantillaTicket("utf-8", escpos=False)
+PLANTILLA_ESCPOS = PlantillaTicket("cp850", escpos=True)
+
 
 class Printer:
-    def __init__(self, modo="archivo", ruta="ticket.txt", escpos_device=None):
+    def __init__(self, modo="archivo", ruta=None, escpos_device=None):
         """
-        modo: 'archivo' (genera .txt) o 'escpos' (impresora térmica)
-        ruta: nombre del archivo si modo = 'archivo'
+        modo: 'archivo' (sin impresora: el ticket queda en el archivo de tickets) o 'escpos' (impresora térmica)
+        ruta: si modo = 'archivo', además se escribe este .txt (None = ninguno)
         escpos_device: instancia de printer (python-escpos) si modo = 'escpos'
         """
         self.modo = modo
         self.ruta = ruta
         self.escpos_device = escpos_device
 
-    def print_ticket(self, encabezado, items, pagos, totales):
+    def print_ticket(self, encabezado, items, pagos, totales, venta_id=None):
         """
         encabezado: dict(nombre, telefono, ticket_id, vendedor, modalidad)
         items: lista de dict(descripcion, detalle, subtotal)
         pagos: lista de dict(metodo, monto)
         totales: dict(total)
+        venta_id: si se indica, el ticket se guarda en el archivo de tickets (solo el primero de cada venta)
+        Devuelve el ticket como texto plano.
         """
-        lines = []
-        lines.append(encabezado.get("nombre", "TIENDA"))
-        if encabezado.get("telefono"):
-            lines.append(f"Tel: {encabezado['telefono']}")
-        lines.append("-" * 30)
+        # Una sola hora para las dos versiones (texto devuelto y bytes a la impresora)
+        ahora = encabezado.get("emitido") or datetime.now().strftime("%Y-%m-%d %H:%M")
+        output = PLANTILLA_TEXTO.renderizar(encabezado, items, pagos, totales, ahora).decode("utf-8")
 
-        now = datetime.now().strftime("%Y-%m-%d %H:%M")
-        lines.append(f"Ticket: {encabezado.get('ticket_id','')} {now}")
-        lines.append(f"Vendedor: {encabezado.get('vendedor','')}")
-        lines.append(f"Modalidad: {encabezado.get('modalidad','')}")
-        lines.append("-" * 30)
+        if venta_id is not None:
+            ARCHIVO.guardar(venta_id, {
+                "encabezado": {**encabezado, "emitido": ahora},
+                "items": items, "pagos": pagos, "totales": totales,
+            })
 
-        # Ítems
-        for it in items:
-            lines.append(it["descripcion"])
-            if it.get("detalle"):
-                lines.append(it["detalle"])
-            lines.append(f"Subt: $ {int(it['subtotal']):,}".replace(",", "."))
-            lines.append("-" * 30)
+        if self.modo == "archivo":
+            if self.ruta:
+                with open(self.ruta, "w", encoding="utf-8") as f:
+                    f.write(output)
+        else:
+            # En producción: usar escpos
+            if not self.escpos_device:
+                raise RuntimeError("No hay impresora ESC/POS configurada")
+            datos = PLANTILLA_ESCPOS.renderizar(encabezado, items, pagos, totales, ahora)
+            crudo = getattr(self.escpos_device, "_raw", None)
+            if crudo is not None:
+                crudo(bytes(datos))  # python-escpos: los bytes tal cual, en un solo envío
+            else:
+                self.escpos_device.text(output)
+                self.escpos_device.cut()
 
-        # Totales
-        lines.append(f"TOTAL: $ {int(totales['total']):,}".replace(",", "."))
+        return output
 
-        # Pagos
-        for p in pagos:
-            lines.append(f"Pago {p['metodo']}: $ {int(p['monto']):,}".replace(",", "."))
+    def print_lote(self, tickets) -> int:
+        """
+        Imprime varios tickets como UN solo trabajo: un único .txt (separados por una
+        línea en blanco) o un único envío ESC/POS (cada ticket con su corte).
+        tickets: iterable de dict(encabezado, items, pagos, totales). Devuelve cuántos imprimió.
+        """
+        tickets = list(tickets)
+        if self.modo == "archivo":
+            plantilla = PLANTILLA_TEXTO
+            if not self.ruta:
+                raise RuntimeError("Falta la ruta del archivo para imprimir el lote")
+        else:
+            plantilla = PLANTILLA_ESCPOS
+            if not self.escpos_device:
+                raise RuntimeError("No hay impresora ESC/POS configurada")
 
-        output = "\n".join(lines) + "\n"
+        datos = bytearray()
+        for i, t in enumerate(tickets):
+            if i and plantilla is PLANTILLA_TEXTO:
+                datos += b"\n"
+            datos += plantilla.renderizar(t["encabezado"], t["items"], t["pagos"], t["totales"])
 
         if self.modo == "archivo":
             with open(self.ruta, "w", encoding="utf-8") as f:
-                f.write(output)
+                f.write(datos.decode("utf-8"))
         else:
-            # En producción: usar escpos
-            if not self.escpos_device:
-                raise RuntimeError("No hay impresora ESC/POS configurada")
-            self.escpos_device.text(output)
-            self.escpos_device.cut()
+            crudo = getattr(self.escpos_device, "_raw", None)
+            if crudo is not None:
+                crudo(bytes(datos))
+            else:
+                for t in tickets:
+                    self.escpos_device.text(PLANTILLA_TEXTO.renderizar(
+                        t["encabezado"], t["items"], t["pagos"], t["totales"]).decode("utf-8"))
+                    self.escpos_device.cut()
+        return len(tickets)
 
-        return output
-    
\ No newline at end of file
+
+# --------- COLA DE IMPRESIÓN ---------
+# La tabla trabajos_impresion la crea migraciones (v8).
+MAX_INTENTOS = 8
+ESPERA_BASE = 2.0      # segundos; se duplica en cada intento fallido
+ESPERA_MAXIMA = 300.0
+SONDEO = 5.0           # sin avisos, el hilo igual revisa la cola cada tantos segundos
+
+
+class ColaImpresion:
+    def __init__(self, terminal: str | None = None):
+        self.terminal = terminal or TERMINAL
+        self.escpos_device = None    # impresora térmica (python-escpos), si se configura
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # al_imprimir(trabajo_id, venta_id, error | None) — p. ej. para avisar en la UI
+        self.al_imprimir: Optional[Callable[[int, Optional[int], Optional[str]], None]] = None
+
+    # ---- encolar ----
+    def encolar(
+        self,
+        encabezado: Dict[str, Any],
+        items: List[Dict[str, Any]],
+        pagos: List[Dict[str, Any]],
+        totales: Dict[str, Any],
+        *,
+        venta_id: int | None = None,
+        modo: str | None = None,
+        ruta: str | None = None,
+    ) -> int:
+        """
+        Guarda el ticket en la cola y despierta al hilo. Devuelve el id del trabajo.
+        Sin `modo`, sale por la impresora térmica si hay una configurada (escpos_device)
+        y si no a archivo: ventas nuevas y reimpresiones van al mismo lado.
+        """
+        modo = modo or self.modo_actual()
+        encabezado = dict(encabezado)
+        encabezado.setdefault("emitido", datetime.now().strftime("%Y-%m-%d %H:%M"))
+        datos = json.dumps(
+            {"encabezado": encabezado, "items": items, "pagos": pagos, "totales": totales},
+            ensure_ascii=False,
+        )
+        with get_conn() as con:
+            cur = con.execute(
+                "INSERT INTO trabajos_impresion (venta_id, terminal, modo, ruta, datos, creado) "
+                "VALUES (?, ?, ?, ?, ?, datetime('now'))",
+                (venta_id, self.terminal, modo, os.path.abspath(ruta) if ruta else None, datos),
+            )
+            trabajo_id = int(cur.lastrowid)
+        self.iniciar()
+        self._despertar.set()
+        return trabajo_id
+
+    def modo_actual(self) -> str:
+        return "escpos" if self.escpos_device else "archivo"
+
+    def reimprimir(self, venta_id: int, ruta: str | None = None) -> int | None:
+        """
+        Vuelve a encolar el ticket de la venta, marcado "(reimpreso)", sin consultar
+        ventas/ítems/pagos: primero del archivo de tickets, si no de la cola.
+        None si la venta no está en ninguno de los dos.
+        """
+        d = ARCHIVO.leer(venta_id)
+        modo, ruta_original = None, None  # archivado: el modo lo elige encolar
+        if d is None:
+            row = get_conn().execute(
+                "SELECT modo, ruta, datos FROM trabajos_impresion WHERE venta_id = ? ORDER BY id DESC LIMIT 1",
+                (venta_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            modo, ruta_original, datos = row
+            d = json.loads(datos)
+        enc = d["encabezado"]
+        if not str(enc.get("ticket_id", "")).endswith("(reimpreso)"):
+            enc["ticket_id"] = f"{enc.get('ticket_id', venta_id)} (reimpreso)"
+        enc.pop("emitido", None)
+        return self.encolar(enc, d["items"], d["pagos"], d["totales"], venta_id=venta_id,
+                            modo=modo, ruta=ruta or ruta_original)
+
+    def reintentar(self, trabajo_id: int | None = None) -> int:
+        """Pasa a PENDIENTE los trabajos en ERROR (uno o todos los de esta terminal). Devuelve cuántos."""
+        with get_conn() as con:
+            if trabajo_id is None:
+                cur = con.execute(
+                    "UPDATE trabajos_impresion SET estado='PENDIENTE', intentos=0, proximo_intento=0 "
+                    "WHERE terminal = ? AND estado = 'ERROR'", (self.terminal,))
+            else:
+                cur = con.execute(
+                    "UPDATE trabajos_impresion SET estado='PENDIENTE', intentos=0, proximo_intento=0 "
+                    "WHERE id = ? AND estado = 'ERROR'", (trabajo_id,))
+            n = cur.rowcount
+        if n:
+            self.iniciar()
+            self._despertar.set()
+        return n
+
+    def resumen(self) -> Dict[str, int]:
+        """{estado: cantidad} de los trabajos de esta terminal."""
+        return dict(get_conn().execute(
+            "SELECT estado, COUNT(*) FROM trabajos_impresion WHERE terminal = ? GROUP BY estado",
+            (self.terminal,),
+        ).fetchall())
+
+    # ---- hilo de impresión ----
+    def iniciar(self):
+        """Arranca el hilo (una sola vez). Los trabajos que quedaron a medias se vuelven a encolar."""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            with get_conn() as con:
+                con.execute(
+                    "UPDATE trabajos_impresion SET estado='PENDIENTE' WHERE terminal = ? AND estado = 'IMPRIMIENDO'",
+                    (self.terminal,),
+                )
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, name="joyapp-impresion", daemon=True)
+            self._hilo.start()
+
+    def detener(self, espera: float = 2.0):
+        self._detener.set()
+        self._despertar.set()
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(espera)
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                hubo_trabajo = self._procesar_siguiente()
+            except Exception as e:  # la base no disponible, etc.: esperar y seguir
+                print(f"[ERROR] Cola de impresión: {e}")
+                hubo_trabajo = False
+            if not hubo_trabajo:
+                self._despertar.wait(self._espera_hasta_proximo())
+                self._despertar.clear()
+
+    def _espera_hasta_proximo(self) -> float:
+        proximo = get_conn().execute(
+            "SELECT MIN(proximo_intento) FROM trabajos_impresion WHERE terminal = ? AND estado = 'PENDIENTE'",
+            (self.terminal,),
+        ).fetchone()[0]
+        if proximo is None:
+            return SONDEO
+        return min(SONDEO, max(0.05, proximo - time.time()))
+
+    def _procesar_siguiente(self) -> bool:
+        """Toma el trabajo pendiente más viejo y lo imprime. False si no había ninguno listo."""
+        with get_conn() as con:
+            row = con.execute(
+                "UPDATE trabajos_impresion SET estado = 'IMPRIMIENDO', intentos = intentos + 1 "
+                "WHERE id = (SELECT id FROM trabajos_impresion "
+                "            WHERE terminal = ? AND estado = 'PENDIENTE' AND proximo_intento <= ? "
+                "            ORDER BY id LIMIT 1) "
+                "RETURNING id, venta_id, modo, ruta, datos, intentos",
+                (self.terminal, time.time()),
+            ).fetchone()
+        if row is None:
+            return False
+        trabajo_id, venta_id, modo, ruta, datos, intentos = row
+
+        error = None
+        try:
+            d = json.loads(datos)
+            printer = Printer(modo=modo, ruta=ruta, escpos_device=self.escpos_device)
+            printer.print_ticket(d["encabezado"], d["items"], d["pagos"], d["totales"], venta_id=venta_id)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+
+        with get_conn() as con:
+            if error is None:
+                con.execute(
+                    "UPDATE trabajos_impresion SET estado = 'HECHO', impreso = datetime('now'), ultimo_error = NULL "
+                    "WHERE id = ?", (trabajo_id,))
+            elif intentos >= MAX_INTENTOS:
+                con.execute(
+                    "UPDATE trabajos_impresion SET estado = 'ERROR', ultimo_error = ? WHERE id = ?",
+                    (error, trabajo_id))
+            else:
+                espera = min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** (intentos - 1))
+                con.execute(
+                    "UPDATE trabajos_impresion SET estado = 'PENDIENTE', ultimo_error = ?, proximo_intento = ? "
+                    "WHERE id = ?", (error, time.time() + espera, trabajo_id))
+
+        if self.al_imprimir:
+            try:
+                self.al_imprimir(trabajo_id, venta_id, error)
+            except Exception:
+                pass
+        return True
+
+
+# Instancia única para toda la app
+COLA = ColaImpresion()
@@ -0,0 +1,167 @@
+# JoyApp/reportes.py
+"""
+Reportes de ventas: gramos vendidos, ingresos y precio promedio por gramo,
+agrupados por material, ley, tipo, vendedor, modalidad, día, semana o mes.
+
+Cada reporte es UNA consulta agrupada que recorre el rango de días por
+idx_ventas_dia y llega a los ítems por idx_items_venta. Los resultados se
+guardan por (agrupación, rango) y se descartan cuando entra una venta en ese
+rango: crear_venta avisa con `venta_registrada(dia)`, y las ventas de otras
+terminales se detectan comparando el último id de ventas (consulta por la PK).
+
+    python -m JoyApp.reportes material --desde 2025-01-01 --hasta 2025-01-31
+"""
+import threading
+from typing import Dict, List, NamedTuple, Tuple
+
+from . import db
+from .db import get_conn
+
+
+class FilaReporte(NamedTuple):
+    grupo: str
+    ventas: int          # ventas distintas que aportan al grupo
+    gramos: float        # gramos de ítems MATERIAL
+    ingresos: float      # suma de subtotales (material + extras)
+    precio_gramo: float  # ingresos de ítems MATERIAL / gramos (0 si no hubo gramos)
+
+
+# agrupación -> (expresión del grupo, GROUP BY si difiere de la expresión, JOINs extra)
+_DIA_A_FECHA = "v.dia * 86400, 'unixepoch'"
+AGRUPACIONES: Dict[str, Tuple[str, str | None, str]] = {
+    "material": (
+        "COALESCE(TRIM(m.nombre || ' ' || COALESCE(m.ley, '')), '(sin material)')",
+        "i.material_id",
+        "LEFT JOIN materiales m ON m.id = i.material_id",
+    ),
+    "ley": (
+        "COALESCE(NULLIF(m.ley, ''), '(sin ley)')",
+        None,
+        "LEFT JOIN materiales m ON m.id = i.material_id",
+    ),
+    "tipo": (
+        "COALESCE(NULLIF(m.tipo, ''), CASE i.tipo WHEN 'EXTRA' THEN '(extras)' ELSE '(sin tipo)' END)",
+        None,
+        "LEFT JOIN materiales m ON m.id = i.material_id",
+    ),
+    "vendedor": (
+        "COALESCE(u.username, '(sin usuario)')",
+        "v.usuario_id",
+        "LEFT JOIN usuarios u ON u.id = v.usuario_id",
+    ),
+    "modalidad": ("v.modalidad", "v.modalidad", ""),
+    "dia": (f"date({_DIA_A_FECHA})", "v.dia", ""),
+    "semana": (f"strftime('%Y-S%W', {_DIA_A_FECHA})", None, ""),
+    "mes": (f"strftime('%Y-%m', {_DIA_A_FECHA})", None, ""),
+}
+
+# Períodos en orden cronológico; el resto, de mayor a menor ingreso
+_CRONOLOGICOS = {"dia", "semana", "mes"}
+
+
+def _rango(dia_ini: int | None, dia_fin: int | None) -> Tuple[str, list]:
+    condiciones, params = [], []
+    if dia_ini is not None:
+        condiciones.append("v.dia >= ?")
+        params.append(dia_ini)
+    if dia_fin is not None:
+        condiciones.append("v.dia < ?")
+        params.append(dia_fin)
+    return " AND ".join(condiciones), params
+
+
+def _sql(agrupacion: str, dia_ini: int | None, dia_fin: int | None) -> Tuple[str, list]:
+    expr, grupo, joins = AGRUPACIONES[agrupacion]
+    grupo = grupo or expr
+    where, params = _rango(dia_ini, dia_fin)
+    orden = "MIN(v.dia)" if agrupacion in _CRONOLOGICOS else "ingresos DESC"
+    return f"""
+        SELECT {expr} AS grupo,
+               COUNT(DISTINCT v.id),
+               COALESCE(SUM(CASE WHEN i.tipo = 'MATERIAL' THEN i.peso_gramos END), 0) AS gramos,
+               COALESCE(SUM(i.subtotal), 0) AS ingresos,
+               COALESCE(SUM(CASE WHEN i.tipo = 'MATERIAL' AND i.peso_gramos > 0 THEN i.subtotal END), 0)
+        FROM ventas v
+        JOIN venta_items i ON i.venta_id = v.id
+        {joins}
+        {" WHERE " + where if where else ""}
+        GROUP BY {grupo}
+        ORDER BY {orden}
+    """, params
+
+
+class Reportes:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (ruta de la base, agrupación, dia_ini, dia_fin) -> (último id de ventas al calcular, filas)
+        self._cache: Dict[tuple, Tuple[int, List[FilaReporte]]] = {}
+
+    def consultar(self, agrupacion: str, dia_ini: int | None = None, dia_fin: int | None = None) -> List[FilaReporte]:
+        """Reporte para [dia_ini, dia_fin) (None = sin límite). ValueError si la agrupación no existe."""
+        if agrupacion not in AGRUPACIONES:
+            raise ValueError(f"Agrupación desconocida: {agrupacion}. Opciones: {', '.join(AGRUPACIONES)}")
+        con = get_conn()
+        clave = (str(db.DB_PATH), agrupacion, dia_ini, dia_fin)
+        ultimo_id = con.execute("SELECT COALESCE(MAX(id), 0) FROM ventas").fetchone()[0]
+
+        with self._lock:
+            hit = self._cache.get(clave)
+        if hit is not None:
+            marca, filas = hit
+            if marca == ultimo_id or not self._hay_ventas_nuevas(con, marca, dia_ini, dia_fin):
+                with self._lock:
+                    self._cache[clave] = (ultimo_id, filas)
+                return filas
+
+        sql, params = _sql(agrupacion, dia_ini, dia_fin)
+        filas = []
+        for grupo, ventas, gramos, ingresos, ingresos_material in con.execute(sql, params):
+            gramos, ingresos_material = float(gramos), float(ingresos_material)
+            filas.append(FilaReporte(
+                str(grupo), int(ventas), gramos, float(ingresos),
+                ingresos_material / gramos if gramos > 0 else 0.0,
+            ))
+        with self._lock:
+            self._cache[clave] = (ultimo_id, filas)
+        return filas
+
+    @staticmethod
+    def _hay_ventas_nuevas(con, desde_id: int, dia_ini: int | None, dia_fin: int | None) -> bool:
+        """¿Alguna venta con id > desde_id cae en el rango? (recorre solo las ventas nuevas por la PK)"""
+        where, params = _rango(dia_ini, dia_fin)
+        return con.execute(
+            f"SELECT 1 FROM ventas v WHERE v.id > ?{' AND ' + where if where else ''} LIMIT 1",
+            (desde_id, *params),
+        ).fetchone() is not None
+
+    def venta_registrada(self, dia: int):
+        """Descarta los reportes cuyo rango incluye `dia`."""
+        self.invalidar(dia, dia + 1)
+
+    def invalidar(self, dia_ini: int | None = None, dia_fin: int | None = None):
+        """Descarta los reportes que se superponen con [dia_ini, dia_fin) (sin argumentos: todos)."""
+        with self._lock:
+            for clave in list(self._cache):
+                _, _, ini, fin = clave
+                if (dia_fin is None or ini is None or ini < dia_fin) and (dia_ini is None or fin is None or fin > dia_ini):
+                    del self._cache[clave]
+
+
+# Instancia única para toda la app
+REPORTES = Reportes()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .models import rango_dias
+
+    parser = argparse.ArgumentParser(description="Reporte de ventas agrupado")
+    parser.add_argument("agrupacion", choices=list(AGRUPACIONES))
+    parser.add_argument("--desde", help="YYYY-MM-DD")
+    parser.add_argument("--hasta", help="YYYY-MM-DD inclusive")
+    args = parser.parse_args()
+
+    print(f"{'Grupo':<30} {'Ventas':>7} {'Gramos':>10} {'Ingresos':>14} {'Gs/g':>10}")
+    for f in REPORTES.consultar(args.agrupacion, *rango_dias(args.desde, args.hasta)):
+        print(f"{f.grupo[:30]:<30} {f.ventas:>7} {f.gramos:>10.2f} {f.ingresos:>14,.0f} {f.precio_gramo:>10,.0f}")
@@ -0,0 +1,161 @@
+# JoyApp/reprecio.py
+"""
+Repreciado masivo del catálogo a partir de la cotización del metal.
+
+Entrada: cotización por gramo de metal puro para cada `tipo` (Oro, Plata...)
+y margen por `ley` (mayorista y minorista, en fracción: 0.25 = +25 %).
+Para cada material:
+
+    base  = cotización[tipo] * pureza(ley)
+    mayor = base * (1 + margen_mayor)                    (redondeado a Gs)
+    menor = base * (1 + margen_menor), al alza a múltiplos de 1000 (pricing)
+
+Se calcula todo el catálogo en una pasada vectorizada (NumPy si está
+instalado; si no, el mismo cálculo en Python puro), se muestra la vista
+previa y se aplica en UNA transacción.
+"""
+import re
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sin NumPy se usa el cálculo en Python
+    np = None
+
+from .busqueda import normalizar
+from .catalogo import CATALOGO, Material, etiqueta
+from .db import get_conn
+from .pricing import MENOR, precios_gramo_aplicados
+
+CLAVE_POR_DEFECTO = "*"  # margen para las leyes que no tienen uno propio
+MARGEN_MAXIMO = 3.0      # +300 %: un margen mayor es casi seguro un error de tipeo
+
+
+class CambioPrecio(NamedTuple):
+    id: int
+    material: str
+    tipo: str
+    ley: str
+    mayor_actual: float
+    menor_actual: float
+    mayor_nuevo: float
+    menor_nuevo: float
+
+    @property
+    def cambia(self) -> bool:
+        return self.mayor_nuevo != self.mayor_actual or self.menor_nuevo != self.menor_actual
+
+
+def pureza(ley: str) -> float | None:
+    """
+    '750' -> 0.750 (milésimas), '18k' / '18 K' -> 0.75 (quilates), '24' -> 1.0.
+    None si no se puede interpretar.
+    """
+    texto = (ley or "").strip().lower().replace(",", ".")
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(k|kt|qt|quilates?)?", texto)
+    if not m:
+        return None
+    valor = float(m.group(1))
+    if m.group(2) or valor <= 24:
+        valor = valor / 24
+    else:
+        valor = valor / 1000
+    return valor if 0 < valor <= 1 else None
+
+
+def _margenes_de(ley: str, margenes: Dict[str, Tuple[float, float]]) -> Tuple[float, float] | None:
+    ley = (ley or "").strip()
+    return margenes.get(ley) or margenes.get(CLAVE_POR_DEFECTO)
+
+
+def calcular(
+    cotizaciones: Dict[str, float],
+    margenes: Dict[str, Tuple[float, float]],
+    materiales: Sequence[Material] | None = None,
+) -> Tuple[List[CambioPrecio], List[Tuple[Material, str]]]:
+    """
+    cotizaciones: {tipo: Gs por gramo de metal puro} (tipo sin distinguir mayúsculas/tildes).
+    margenes: {ley: (margen_mayor, margen_menor)}; la clave "*" vale para el resto.
+    Devuelve (cambios para todos los materiales calculables, [(material, motivo)] omitidos).
+    """
+    materiales = CATALOGO.todos() if materiales is None else materiales
+    spot = {normalizar(t): float(v) for t, v in cotizaciones.items() if v is not None}
+
+    calculables: List[Material] = []
+    filas: List[Tuple[float, float, float, float]] = []  # (cotización, pureza, margen_mayor, margen_menor)
+    omitidos: List[Tuple[Material, str]] = []
+    for m in materiales:
+        cot = spot.get(normalizar(m.tipo))
+        if cot is None:
+            omitidos.append((m, f"sin cotización para el tipo '{m.tipo}'"))
+            continue
+        p = pureza(m.ley)
+        if p is None:
+            omitidos.append((m, f"ley '{m.ley}' no reconocida"))
+            continue
+        mg = _margenes_de(m.ley, margenes)
+        if mg is None:
+            omitidos.append((m, f"sin margen para la ley '{m.ley}'"))
+            continue
+        calculables.append(m)
+        filas.append((cot, p, float(mg[0]), float(mg[1])))
+
+    mayores, menores = _precios(filas)
+    cambios = [
+        CambioPrecio(m.id, etiqueta(m), m.tipo, m.ley, m.precio_mayor, m.precio_menor, mayor, menor)
+        for m, mayor, menor in zip(calculables, mayores, menores)
+    ]
+    return cambios, omitidos
+
+
+def _precios(filas: List[Tuple[float, float, float, float]]) -> Tuple[List[float], List[float]]:
+    """(precios mayoristas, precios minoristas) por gramo para cada fila."""
+    if not filas:
+        return [], []
+    if np is not None:
+        cot, pur, mg_mayor, mg_menor = np.asarray(filas, dtype=np.float64).T
+        base = cot * pur
+        mayores = np.rint(base * (1 + mg_mayor)).tolist()
+        menores = np.rint(base * (1 + mg_menor)).tolist()
+    else:
+        mayores, menores = [], []
+        for cot, pur, mg_mayor, mg_menor in filas:
+            base = cot * pur
+            mayores.append(float(round(base * (1 + mg_mayor))))
+            menores.append(float(round(base * (1 + mg_menor))))
+    # La regla de MENOR (al alza a múltiplos de 1000) la aplica pricing, en aritmética exacta
+    return mayores, [float(p) for p in precios_gramo_aplicados(menores, MENOR)]
+
+
+def aplicar(cambios: Sequence[CambioPrecio]) -> Tuple[int, List[CambioPrecio]]:
+    """
+    Guarda los precios nuevos en una sola transacción.
+    Solo pisa un material si sus precios siguen siendo los de la vista previa
+    (si alguien lo editó mientras tanto, queda en la lista de conflictos).
+    Devuelve (materiales actualizados, conflictos).
+    """
+    pendientes = [c for c in cambios if c.cambia]
+    if not pendientes:
+        return 0, []
+    con = get_conn()
+    with con:
+        cur = con.executemany(
+            "UPDATE materiales SET precio_gramo_mayor = ?, precio_gramo_menor = ? "
+            "WHERE id = ? AND precio_gramo_mayor = ? AND precio_gramo_menor = ?",
+            [(c.mayor_nuevo, c.menor_nuevo, c.id, c.mayor_actual, c.menor_actual) for c in pendientes],
+        )
+        actualizados = cur.rowcount
+        conflictos: List[CambioPrecio] = []
+        if actualizados != len(pendientes):
+            # Los que no quedaron con el precio nuevo cambiaron por otro lado
+            marcas = ",".join("?" for _ in pendientes)
+            actuales = {
+                int(r[0]): (float(r[1]), float(r[2]))
+                for r in cur.execute(
+                    f"SELECT id, precio_gramo_mayor, precio_gramo_menor FROM materiales WHERE id IN ({marcas})",
+                    [c.id for c in pendientes],
+                )
+            }
+            conflictos = [c for c in pendientes if actuales.get(c.id) != (c.mayor_nuevo, c.menor_nuevo)]
+    CATALOGO.invalidar()
+    return actualizados, conflictos
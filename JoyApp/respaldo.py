@@ -0,0 +1,160 @@
+# JoyApp/respaldo.py
+"""
+Copias de seguridad en caliente de data.db con la API de backup de SQLite.
+
+La copia se hace por tramos de páginas, así que las ventas pueden seguir
+mientras tanto (y si alguien escribe a mitad de camino, SQLite reinicia el
+tramo y el resultado sigue siendo consistente, cosa que `cp` no garantiza).
+"""
+import gzip
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from . import db
+
+PAGINAS_POR_PASO = 1024     # ~4 MB por tramo con páginas de 4 KB
+PAUSA_ENTRE_PASOS = 0.005   # cede el disco a las ventas entre tramos
+RETENER = 10                # cuántos respaldos conservar al rotar
+PATRONES = ("data_backup_*.db", "data_backup_*.db.gz")
+
+# progreso(copiadas, total) — se llama después de cada tramo
+Progreso = Callable[[int, int], None]
+
+
+def _directorio() -> Path:
+    return Path(db.DB_PATH).parent
+
+
+def _nombre_respaldo(comprimir: bool) -> str:
+    nombre = f"data_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+    return nombre + ".gz" if comprimir else nombre
+
+
+def _comprimir(origen: Path, destino: Path):
+    with open(origen, "rb") as f_in, gzip.open(destino, "wb", compresslevel=6) as f_out:
+        shutil.copyfileobj(f_in, f_out, length=1024 * 1024)
+
+
+def rotar_respaldos(directorio: Path | None = None, retener: int = RETENER) -> List[Path]:
+    """Borra los respaldos más viejos dejando los `retener` más nuevos. Devuelve los borrados."""
+    directorio = Path(directorio or _directorio())
+    respaldos = sorted(
+        {p for patron in PATRONES for p in directorio.glob(patron)},
+        key=lambda p: p.name,  # el nombre lleva fecha y hora: orden alfabético = cronológico
+        reverse=True,
+    )
+    borrados = []
+    for viejo in respaldos[max(retener, 0):]:
+        try:
+            viejo.unlink()
+            borrados.append(viejo)
+        except OSError:
+            pass
+    return borrados
+
+
+def respaldar(
+    destino: Path | str | None = None,
+    *,
+    con: sqlite3.Connection | None = None,
+    paginas: int = PAGINAS_POR_PASO,
+    progreso: Optional[Progreso] = None,
+    comprimir: bool = False,
+    retener: int | None = RETENER,
+) -> Path:
+    """
+    Copia la base abierta (o `con`, si se pasa) a `destino`.
+    Por defecto: JoyApp/data_backup_YYYYmmdd_HHMMSS.db[.gz] y rotación de viejos.
+    Devuelve la ruta del archivo generado.
+    """
+    destino = Path(destino) if destino else _directorio() / _nombre_respaldo(comprimir)
+    temporal = destino.with_name(destino.name + ".tmp")
+
+    propia = con is None
+    if propia:
+        # Conexión aparte (no la del pool) para poder correr en cualquier hilo
+        con = sqlite3.connect(str(db.DB_PATH))
+
+    def _tramo(_status, restantes, total):
+        if progreso:
+            progreso(total - restantes, total)
+        if restantes:
+            time.sleep(PAUSA_ENTRE_PASOS)
+
+    try:
+        copia = sqlite3.connect(str(temporal))
+        try:
+            con.backup(copia, pages=paginas, progress=_tramo)
+        finally:
+            copia.close()
+    finally:
+        if propia:
+            con.close()
+
+    if comprimir:
+        _comprimir(temporal, destino)
+        temporal.unlink()
+    else:
+        temporal.replace(destino)
+
+    if retener is not None:
+        rotar_respaldos(destino.parent, retener)
+    return destino
+
+
+def respaldar_en_segundo_plano(
+    al_terminar: Callable[[Path], None] | None = None,
+    al_fallar: Callable[[Exception], None] | None = None,
+    **kwargs,
+) -> threading.Thread:
+    """Igual que respaldar(), pero en un hilo daemon. Los callbacks corren en ese hilo."""
+    def _trabajo():
+        try:
+            ruta = respaldar(**kwargs)
+        except Exception as e:
+            if al_fallar:
+                al_fallar(e)
+            else:
+                print(f"[ERROR] No se pudo crear el respaldo: {e}")
+            return
+        if al_terminar:
+            al_terminar(ruta)
+
+    hilo = threading.Thread(target=_trabajo, name="respaldo-db", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def ultimo_respaldo(directorio: Path | None = None) -> Path | None:
+    directorio = Path(directorio or _directorio())
+    respaldos = sorted((p for patron in PATRONES for p in directorio.glob(patron)), key=lambda p: p.name)
+    return respaldos[-1] if respaldos else None
+
+
+def respaldar_si_corresponde(horas: float = 24, **kwargs) -> threading.Thread | None:
+    """Lanza un respaldo en segundo plano si el último tiene más de `horas` horas."""
+    ultimo = ultimo_respaldo()
+    if ultimo and (time.time() - ultimo.stat().st_mtime) < horas * 3600:
+        return None
+    return respaldar_en_segundo_plano(**kwargs)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Respaldo en caliente de data.db")
+    parser.add_argument("destino", nargs="?", help="archivo de salida (por defecto junto a data.db)")
+    parser.add_argument("--gzip", action="store_true", help="comprimir la copia")
+    parser.add_argument("--retener", type=int, default=RETENER, help="respaldos a conservar")
+    args = parser.parse_args()
+
+    def _mostrar(copiadas, total):
+        print(f"\r📦 {copiadas}/{total} páginas", end="", flush=True)
+
+    ruta = respaldar(args.destino, comprimir=args.gzip, retener=args.retener, progreso=_mostrar)
+    print(f"\n🗃️  Copia de seguridad creada: {ruta}")
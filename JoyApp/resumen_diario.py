@@ -0,0 +1,123 @@
+# JoyApp/resumen_diario.py
+"""
+Resumen diario de ventas (tablas ventas_diarias y pagos_diarios).
+
+crear_venta lo actualiza en la misma transacción que la venta, así el cierre
+de caja y los totales del historial leen unas pocas filas por día en lugar de
+agregar todas las ventas. Si alguna vez se desincroniza (ventas cargadas a
+mano, restauración parcial), se repara desde las tablas originales con:
+
+    python -m JoyApp.resumen_diario [--desde YYYY-MM-DD] [--hasta YYYY-MM-DD]
+"""
+import sqlite3
+from typing import Iterable, List, Tuple
+
+from .db import get_conn
+
+# Las tablas las crea migraciones (v6).
+
+# (dia, modalidad, usuario_id, cantidad, total)
+FilaVentas = Tuple[int, str, int, int, float]
+# (dia, metodo, modalidad, usuario_id, cantidad, monto)
+FilaPagos = Tuple[int, str, str, int, int, float]
+
+
+def acumular(cur: sqlite3.Cursor, ventas: Iterable[FilaVentas], pagos: Iterable[FilaPagos]):
+    """Suma filas al resumen (dentro de la transacción de quien llama)."""
+    cur.executemany(
+        "INSERT INTO ventas_diarias (dia, modalidad, usuario_id, cantidad, total) VALUES (?,?,?,?,?) "
+        "ON CONFLICT (dia, modalidad, usuario_id) DO UPDATE SET "
+        "cantidad = cantidad + excluded.cantidad, total = total + excluded.total",
+        list(ventas),
+    )
+    cur.executemany(
+        "INSERT INTO pagos_diarios (dia, metodo, modalidad, usuario_id, cantidad, monto) VALUES (?,?,?,?,?,?) "
+        "ON CONFLICT (dia, metodo, modalidad, usuario_id) DO UPDATE SET "
+        "cantidad = cantidad + excluded.cantidad, monto = monto + excluded.monto",
+        list(pagos),
+    )
+
+
+def reconstruir(con: sqlite3.Connection | None = None, dia_ini: int | None = None, dia_fin: int | None = None):
+    """
+    Recalcula el resumen desde ventas/pagos para [dia_ini, dia_fin) (None = sin límite).
+    Si no se pasa `con`, hace su propio commit.
+    """
+    propia = con is None
+    con = con or get_conn()
+    rango, params = "", []
+    if dia_ini is not None:
+        rango += " AND dia >= ?"
+        params.append(dia_ini)
+    if dia_fin is not None:
+        rango += " AND dia < ?"
+        params.append(dia_fin)
+
+    def _hacer():
+        con.execute(f"DELETE FROM ventas_diarias WHERE 1=1{rango}", params)
+        con.execute(f"DELETE FROM pagos_diarios WHERE 1=1{rango}", params)
+        con.execute(f"""
+            INSERT INTO ventas_diarias (dia, modalidad, usuario_id, cantidad, total)
+            SELECT dia, modalidad, usuario_id, COUNT(*), COALESCE(SUM(total), 0)
+            FROM ventas
+            WHERE dia IS NOT NULL{rango}
+            GROUP BY dia, modalidad, usuario_id
+        """, params)
+        con.execute(f"""
+            INSERT INTO pagos_diarios (dia, metodo, modalidad, usuario_id, cantidad, monto)
+            SELECT v.dia, p.metodo, v.modalidad, v.usuario_id, COUNT(*), COALESCE(SUM(p.monto), 0)
+            FROM ventas v
+            JOIN pagos p ON p.venta_id = v.id
+            WHERE v.dia IS NOT NULL{rango.replace("dia", "v.dia")}
+            GROUP BY v.dia, p.metodo, v.modalidad, v.usuario_id
+        """, params)
+
+    if propia:
+        with con:
+            _hacer()
+    else:
+        _hacer()
+
+
+def totales(dia_ini: int | None = None, dia_fin: int | None = None) -> Tuple[int, float]:
+    """(cantidad de ventas, total) en [dia_ini, dia_fin)."""
+    where, params = _rango(dia_ini, dia_fin)
+    cant, total = get_conn().execute(
+        f"SELECT COALESCE(SUM(cantidad), 0), COALESCE(SUM(total), 0) FROM ventas_diarias{where}", params
+    ).fetchone()
+    return int(cant), float(total)
+
+
+def por_metodo(dia_ini: int | None = None, dia_fin: int | None = None) -> List[Tuple[str, float]]:
+    """[(metodo, monto)] en [dia_ini, dia_fin), de mayor a menor."""
+    where, params = _rango(dia_ini, dia_fin)
+    return get_conn().execute(
+        f"SELECT metodo, SUM(monto) AS monto FROM pagos_diarios{where} GROUP BY metodo ORDER BY monto DESC",
+        params,
+    ).fetchall()
+
+
+def _rango(dia_ini: int | None, dia_fin: int | None) -> Tuple[str, list]:
+    condiciones, params = [], []
+    if dia_ini is not None:
+        condiciones.append("dia >= ?")
+        params.append(dia_ini)
+    if dia_fin is not None:
+        condiciones.append("dia < ?")
+        params.append(dia_fin)
+    return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), params
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .models import rango_dias
+
+    parser = argparse.ArgumentParser(description="Reconstruye el resumen diario de ventas desde los datos crudos")
+    parser.add_argument("--desde", help="YYYY-MM-DD (por defecto: desde el principio)")
+    parser.add_argument("--hasta", help="YYYY-MM-DD inclusive (por defecto: hasta hoy)")
+    args = parser.parse_args()
+
+    ini, fin = rango_dias(args.desde, args.hasta)
+    reconstruir(dia_ini=ini, dia_fin=fin)
+    print(f"✅ Resumen diario reconstruido ({args.desde or 'inicio'} → {args.hasta or 'hoy'}).")
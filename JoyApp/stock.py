@@ -0,0 +1,67 @@
+# JoyApp/stock.py
+"""
+Lecturas de stock para la pantalla de venta, con caché de vida corta.
+
+El cajero escribe el peso carácter por carácter ("1", "12", "12,", "12,3"...):
+todas esas lecturas del mismo material dentro de `ttl` segundos salen de
+memoria. models invalida la entrada cuando una venta o la gestión de
+materiales cambian el stock, así que el TTL solo cubre cambios hechos por
+otras terminales (y crear_venta igual valida el stock con su UPDATE guardado).
+"""
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+from .db import get_conn
+
+
+class ServicioStock:
+    def __init__(self, ttl: float = 2.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: Dict[int, Tuple[float, float]] = {}  # material_id -> (stock, vence)
+
+    def leer(self, material_id: int) -> float:
+        """Stock en gramos (0.0 si el material no existe)."""
+        return self.leer_varios([material_id])[int(material_id)]
+
+    def leer_varios(self, ids: Iterable[int]) -> Dict[int, float]:
+        """Stock de varios materiales; los que no están en caché se leen en UNA consulta."""
+        ids = [int(i) for i in ids]
+        ahora = time.monotonic()
+        res: Dict[int, float] = {}
+        faltan = []
+        with self._lock:
+            for mid in ids:
+                hit = self._cache.get(mid)
+                if hit and hit[1] > ahora:
+                    res[mid] = hit[0]
+                else:
+                    faltan.append(mid)
+        if faltan:
+            marcas = ",".join("?" for _ in faltan)
+            rows = get_conn().execute(
+                f"SELECT id, COALESCE(stock_gramos, 0) FROM materiales WHERE id IN ({marcas})", faltan
+            ).fetchall()
+            leidos = {int(r[0]): float(r[1]) for r in rows}
+            vence = time.monotonic() + self.ttl
+            with self._lock:
+                for mid in faltan:
+                    res[mid] = leidos.get(mid, 0.0)
+                    self._cache[mid] = (res[mid], vence)
+        return res
+
+    def invalidar(self, material_ids: Iterable[int] | int | None = None):
+        """Descarta la caché de esos materiales (o de todos si es None)."""
+        with self._lock:
+            if material_ids is None:
+                self._cache.clear()
+                return
+            if isinstance(material_ids, int):
+                material_ids = [material_ids]
+            for mid in material_ids:
+                self._cache.pop(int(mid), None)
+
+
+# Instancia única para toda la app
+STOCK = ServicioStock()
@@ -0,0 +1,118 @@
+# JoyApp/tareas.py
+"""
+Ejecutor de tareas en segundo plano para la UI.
+
+Las consultas, el bcrypt del login y la impresión corren en un pool de hilos
+compartido (cada hilo con su propia conexión del pool de db.py). Los
+resultados vuelven por una cola que el hilo de Tk revisa con `after()`, así
+los callbacks siempre corren en el hilo de la interfaz y pueden tocar widgets.
+
+Con `clave=` una tarea nueva reemplaza a la anterior de la misma clave: si la
+vieja no arrancó se cancela, y si ya terminó su resultado se descarta (p. ej.
+una búsqueda nueva pisa a la que se estaba escribiendo).
+"""
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import tkinter as tk
+
+MAX_HILOS = 4
+
+# Un único pool para toda la app: los hilos (y sus conexiones) se reutilizan
+_POOL = ThreadPoolExecutor(max_workers=MAX_HILOS, thread_name_prefix="joyapp-tarea")
+
+
+def enviar_en_segundo_plano(fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """Corre fn en el pool compartido sin callbacks de UI (p. ej. desde módulos sin Tk)."""
+    return _POOL.submit(fn, *args, **kwargs)
+
+
+class EjecutorTareas:
+    INTERVALO_MS = 30
+
+    def __init__(self, widget: tk.Misc):
+        self.widget = widget
+        self._resultados: "queue.Queue[tuple]" = queue.Queue()
+        self._generacion: Dict[Hashable, int] = {}
+        self._futuros: Dict[Hashable, Future] = {}
+        self._pendientes = 0
+        self._sondeando = False
+
+    def enviar(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        al_terminar: Optional[Callable[[Any], None]] = None,
+        al_fallar: Optional[Callable[[Exception], None]] = None,
+        clave: Hashable | None = None,
+        **kwargs,
+    ) -> Future:
+        """
+        Corre fn(*args, **kwargs) en el pool. al_terminar(resultado) o
+        al_fallar(excepción) se llaman después en el hilo de Tk.
+        """
+        gen = None
+        if clave is not None:
+            gen = self._generacion.get(clave, 0) + 1
+            self._generacion[clave] = gen
+            anterior = self._futuros.get(clave)
+            if anterior is not None:
+                anterior.cancel()  # solo tiene efecto si todavía no arrancó
+
+        futuro = _POOL.submit(fn, *args, **kwargs)
+        if clave is not None:
+            self._futuros[clave] = futuro
+        self._pendientes += 1
+        futuro.add_done_callback(
+            lambda f: self._resultados.put((clave, gen, f, al_terminar, al_fallar))
+        )
+        self._programar_sondeo()
+        return futuro
+
+    def cancelar(self, clave: Hashable):
+        """Descarta la tarea vigente de esa clave (su resultado no llegará a la UI)."""
+        self._generacion[clave] = self._generacion.get(clave, 0) + 1
+        futuro = self._futuros.pop(clave, None)
+        if futuro is not None:
+            futuro.cancel()
+
+    def _programar_sondeo(self):
+        if self._sondeando:
+            return
+        try:
+            self.widget.after(self.INTERVALO_MS, self._sondear)
+            self._sondeando = True
+        except tk.TclError:
+            pass  # ventana cerrada
+
+    def _sondear(self):
+        self._sondeando = False
+        try:
+            if not self.widget.winfo_exists():
+                return  # se cerró la ventana: los resultados ya no tienen dónde mostrarse
+        except tk.TclError:
+            return
+        while True:
+            try:
+                clave, gen, futuro, al_terminar, al_fallar = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            self._pendientes -= 1
+            if clave is not None:
+                if self._generacion.get(clave) != gen:
+                    continue  # la reemplazó una más nueva
+                self._futuros.pop(clave, None)
+            if futuro.cancelled():
+                continue
+            exc = futuro.exception()
+            if exc is not None:
+                if al_fallar:
+                    al_fallar(exc)
+                else:
+                    print(f"[ERROR] Tarea en segundo plano: {exc}")
+            elif al_terminar:
+                al_terminar(futuro.result())
+
+        if self._pendientes > 0:
+            self._programar_sondeo()
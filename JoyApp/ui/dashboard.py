@@ -1,8 +1,12 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 from ..ui_theme import aplicar_tema_base, fondo_degradado, crear_logo, boton_estilo
-import sqlite3
 import os
+from .. import caja, exportar, models, reprecio
+from ..reportes import AGRUPACIONES, REPORTES
+from ..printing import COLA, Printer
+from ..tareas import EjecutorTareas
+from .login import Login
 from .nueva_venta import NuevaVenta
 from ..themes.goldwine import (
     aplicar_tema_base,
@@ -14,9 +18,11 @@ from ..themes.goldwine import (
 
 
 class Dashboard(tk.Frame):
-    def __init__(self, master, user):
+    def __init__(self, master, user, al_cambiar_usuario=None):
         super().__init__(master)
         self.user = user
+        # al_cambiar_usuario(user): otro usuario desbloqueó la terminal (cambio de turno)
+        self.al_cambiar_usuario = al_cambiar_usuario
 
         # 1) Tema y estética (deben ir DENTRO del __init__, no al nivel de clase)
         self.colors = aplicar_tema_base(self.winfo_toplevel())
@@ -32,7 +38,7 @@ class Dashboard(tk.Frame):
         # 4) Encabezado
         tk.Label(
             self,
-            text=f"Bienvenido, {user['rol']}",
+            text=f"Bienvenido, {user.rol}",
             bg=self.colors.get("bg", None),
             fg=self.colors.get("fg", None),
             font=("Segoe UI", 12, "bold")
@@ -40,70 +46,47 @@ class Dashboard(tk.Frame):
 
         # 5) Botones principales (sin cambiar callbacks)
         tk.Button(self, text="Nueva venta",            command=self.open_nueva_venta,        **btn_style).pack(fill="x", padx=12, pady=6)
-        tk.Button(self, text="Gestión de Materiales",  command=self.open_gestion_materiales, **btn_style).pack(fill="x", padx=12, pady=6)
+        tk.Button(self, text="Gestión de Materiales",  command=self.open_gestion_materiales, **btn_style,
+                  state="normal" if user.puede("materiales") else "disabled").pack(fill="x", padx=12, pady=6)
         tk.Button(self, text="Historial de Ventas",    command=self.open_historial_ventas,   **btn_style).pack(fill="x", padx=12, pady=6)
         tk.Button(self, text="Cierre de Caja",         command=self.open_cierre_caja,        **btn_style).pack(fill="x", padx=12, pady=6)
+        tk.Button(self, text="Reportes",               command=self.open_reportes,           **btn_style).pack(fill="x", padx=12, pady=6)
+        tk.Button(self, text="🔒 Bloquear terminal",   command=self.bloquear,                **btn_style).pack(fill="x", padx=12, pady=6)
+
+    # ---- Bloqueo de la terminal ----
+    def bloquear(self):
+        """Tapa la app con la pantalla de bloqueo; el desbloqueo del mismo usuario no pasa por bcrypt."""
+        Login(self.winfo_toplevel(), self._desbloqueada, usuario=self.user.username)
+
+    def _desbloqueada(self, user):
+        if user.id != self.user.id and self.al_cambiar_usuario:
+            self.al_cambiar_usuario(user)
 
       # ---- Ventana de Nueva Venta ----
     def open_nueva_venta(self):
         """
-        Abre la ventana de Nueva Venta y actualiza el listado de materiales antes de mostrarla.
-        Esto asegura que se vean los materiales agregados recientemente sin reiniciar la app.
+        Abre la ventana de Nueva Venta con el listado de materiales al día.
+        El catálogo se invalida al guardar materiales, así que se ven los recién agregados sin reiniciar la app.
         """
         win = tk.Toplevel(self.master)
         win.title("Nueva venta")
         estilizar_toplevel(win)
 
-        try:
-            from ..models import listar_materiales_activos
-            materiales_actualizados = listar_materiales_activos()
-            print(f"[INFO] {len(materiales_actualizados)} materiales cargados (actualizados).")
-        except Exception as e:
-            print(f"[ERROR] No se pudieron cargar materiales actualizados: {e}")
-            materiales_actualizados = []
-
+        # NuevaVenta lee del catálogo en memoria: solo va a la base si hubo cambios
         venta_ui = NuevaVenta(win, self.user)
-
-        # 🔄 Si la clase NuevaVenta tiene el atributo materiales, lo actualizamos
-        if hasattr(venta_ui, "materiales"):
-            venta_ui.materiales = materiales_actualizados
-            venta_ui.cbo_mat["values"] = [f"{m[1]} {m[2] or ''}".strip() for m in materiales_actualizados]
-
-        # 🔇 Mantengo tu línea intacta pero anulo temporalmente el popup
-        _orig_showinfo = messagebox.showinfo
-        try:
-            messagebox.showinfo = lambda *a, **k: None  # desactiva el cuadro solo aquí
-            # Mensaje visual opcional (línea original, NO modificada)
-            messagebox.showinfo("Actualizado", f"Se cargaron {len(materiales_actualizados)} materiales disponibles.")
-        finally:
-            messagebox.showinfo = _orig_showinfo  # restaurar para el resto de la app
+        print(f"[INFO] {len(venta_ui.indice.entradas)} materiales cargados (actualizados).")
 
     # ---- Gestión de materiales ----
     def open_gestion_materiales(self):
+        if not self.user.puede("materiales"):
+            messagebox.showwarning("Atención", "Solo el jefe puede modificar materiales, precios y stock.")
+            return
         ventana = tk.Toplevel(self.master)
         ventana.title("Gestión de Materiales")
         estilizar_toplevel(ventana)
         ventana.geometry("850x550")
         ventana.resizable(False, False)
-        
-
-        # Ruta absoluta a la base de datos
-        db_path = os.path.join(os.path.dirname(__file__), "..", "data.db")
-        db_path = os.path.abspath(db_path)
-
-        # >>> ADDED: Migración suave para columna de stock
-        try:
-            conn_mig = sqlite3.connect(db_path)
-            c_mig = conn_mig.cursor()
-            cols = [r[1] for r in c_mig.execute("PRAGMA table_info(materiales)")]
-            if "stock_gramos" not in cols:
-                c_mig.execute("ALTER TABLE materiales ADD COLUMN stock_gramos REAL NOT NULL DEFAULT 0")
-                conn_mig.commit()
-            conn_mig.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo preparar la columna de stock: {e}")
-            return
-        # <<< ADDED
+        # La columna stock_gramos la garantiza la migración 3 (JoyApp/migraciones.py)
 
         # --- FORMULARIO ---
         frame_form = tk.LabelFrame(ventana, text="Formulario de Material", padx=10, pady=10)
@@ -163,37 +146,15 @@ class Dashboard(tk.Frame):
                 return
 
             try:
-                conn = sqlite3.connect(db_path)
-                c = conn.cursor()
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS materiales (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        nombre TEXT NOT NULL,
-                        ley TEXT,
-                        tipo TEXT,
-                        precio_gramo_mayor REAL NOT NULL,
-                        precio_gramo_menor REAL NOT NULL,
-                        activo INTEGER DEFAULT 1,
-                        stock_gramos REAL NOT NULL DEFAULT 0
-                    )
-                """)
-
                 if modo_edicion.get():
-                    c.execute("""
-                        UPDATE materiales
-                        SET nombre=?, ley=?, tipo=?, precio_gramo_mayor=?, precio_gramo_menor=?, activo=?, stock_gramos=?
-                        WHERE id=?
-                    """, (nombre, ley, tipo, float(mayor), float(menor), activo, float(stock), id_edicion.get()))
-                    messagebox.showinfo("Éxito", "✅ Material actualizado correctamente.")
+                    models.guardar_material(nombre, ley, tipo, float(mayor), float(menor), activo, float(stock),
+                                            material_id=int(id_edicion.get()))
+                    mensaje = "✅ Material actualizado correctamente."
                 else:
-                    c.execute("""
-                        INSERT INTO materiales (nombre, ley, tipo, precio_gramo_mayor, precio_gramo_menor, activo, stock_gramos)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (nombre, ley, tipo, float(mayor), float(menor), activo, float(stock)))
-                    messagebox.showinfo("Éxito", "✅ Material agregado correctamente.")
-
-                conn.commit()
-                conn.close()
+                    models.guardar_material(nombre, ley, tipo, float(mayor), float(menor), activo, float(stock))
+                    mensaje = "✅ Material agregado correctamente."
+
+                messagebox.showinfo("Éxito", mensaje)
                 limpiar_formulario()
                 cargar_materiales()
             except Exception as e:
@@ -236,26 +197,14 @@ class Dashboard(tk.Frame):
             filtro = entry_buscar.get().strip().lower()
             for fila in tabla.get_children():
                 tabla.delete(fila)
-            conn = sqlite3.connect(db_path)
-            c = conn.cursor()
-            if filtro:
-                c.execute("""
-                    SELECT id, nombre, ley, tipo, precio_gramo_mayor, precio_gramo_menor, stock_gramos, activo
-                    FROM materiales
-                    WHERE LOWER(nombre) LIKE ? OR LOWER(tipo) LIKE ? OR LOWER(ley) LIKE ?
-                    ORDER BY id DESC
-                """, (f"%{filtro}%", f"%{filtro}%", f"%{filtro}%"))
-            else:
-                c.execute("""
-                    SELECT id, nombre, ley, tipo, precio_gramo_mayor, precio_gramo_menor, stock_gramos, activo
-                    FROM materiales
-                    ORDER BY id DESC
-                """)
-            resultados = c.fetchall()
-            conn.close()
+            # Filtra sobre el catálogo en memoria (mismo orden: id DESC)
+            resultados = [
+                m for m in models.listar_materiales()
+                if not filtro or filtro in m.nombre.lower() or filtro in m.tipo.lower() or filtro in m.ley.lower()
+            ]
 
             for row in resultados:
-                item = tabla.insert("", tk.END, values=row)
+                item = tabla.insert("", tk.END, values=tuple(row))
                 if filtro and any(filtro in str(v).lower() for v in row[1:4]):
                     tabla.item(item, tags=("resaltado",))
 
@@ -311,11 +260,7 @@ class Dashboard(tk.Frame):
             if not messagebox.askyesno("Confirmar", f"¿Eliminar material ID {mat_id}?"):
                 return
             try:
-                conn = sqlite3.connect(db_path)
-                c = conn.cursor()
-                c.execute("DELETE FROM materiales WHERE id=?", (mat_id,))
-                conn.commit()
-                conn.close()
+                models.eliminar_material(mat_id)
                 messagebox.showinfo("Éxito", "🗑️ Material eliminado correctamente.")
                 buscar()
             except Exception as e:
@@ -323,6 +268,10 @@ class Dashboard(tk.Frame):
 
         tk.Button(frame_acciones2, text="✏️ Editar seleccionado", command=editar_material).pack(side="left", padx=6)
         tk.Button(frame_acciones2, text="🗑️ Eliminar seleccionado", command=eliminar_material).pack(side="left", padx=6)
+        tk.Button(
+            frame_acciones2, text="💱 Repreciar por cotización",
+            command=lambda: self.open_reprecio(ventana, al_aplicar=buscar),
+        ).pack(side="right", padx=6)
 
         # --- TABLA DE MATERIALES ---
         frame_lista = tk.LabelFrame(ventana, text="Materiales registrados", padx=10, pady=10)
@@ -354,22 +303,171 @@ class Dashboard(tk.Frame):
             for fila in tabla.get_children():
                 tabla.delete(fila)
             try:
-                conn = sqlite3.connect(db_path)
-                c = conn.cursor()
-                c.execute("""
-                    SELECT id, nombre, ley, tipo, precio_gramo_mayor, precio_gramo_menor, stock_gramos, activo
-                    FROM materiales
-                    ORDER BY id DESC
-                """)
-                for row in c.fetchall():
-                    tabla.insert("", tk.END, values=row)
-                conn.close()
+                for mat in models.listar_materiales():
+                    tabla.insert("", tk.END, values=tuple(mat))
                 lbl_resultados.config(text="Mostrando todos los materiales")
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudieron cargar los materiales: {e}")
 
         cargar_materiales()
 
+    # ---- Repreciado por cotización ----
+    def open_reprecio(self, parent, al_aplicar=None):
+        """Cotización por tipo + margen por ley -> vista previa de precios nuevos -> aplicar todo junto."""
+        win = tk.Toplevel(parent)
+        win.title("Repreciar por cotización")
+        estilizar_toplevel(win)
+        win.geometry("860x560")
+        tareas = EjecutorTareas(win)
+
+        materiales = models.listar_materiales()
+        tipos = sorted({m.tipo.strip().capitalize() for m in materiales if m.tipo.strip()})
+        leyes = sorted({m.ley.strip() for m in materiales if m.ley.strip()})
+
+        frm_param = tk.Frame(win)
+        frm_param.pack(fill="x", padx=10, pady=(10, 6))
+
+        # Cotización por tipo
+        frm_cot = tk.LabelFrame(frm_param, text="Cotización (Gs por gramo de metal puro)", padx=10, pady=10)
+        frm_cot.pack(side="left", fill="y", padx=(0, 8))
+        e_cot = {}
+        for fila, tipo in enumerate(tipos):
+            tk.Label(frm_cot, text=f"{tipo}:").grid(row=fila, column=0, sticky="w")
+            e = tk.Entry(frm_cot, width=14)
+            e.grid(row=fila, column=1, padx=5, pady=2)
+            e_cot[tipo] = e
+
+        # Margen por ley (en %)
+        frm_mg = tk.LabelFrame(frm_param, text="Margen por ley (%)", padx=10, pady=10)
+        frm_mg.pack(side="left", fill="y")
+        tk.Label(frm_mg, text="Mayor").grid(row=0, column=1)
+        tk.Label(frm_mg, text="Menor").grid(row=0, column=2)
+        e_mg = {}
+        for fila, ley in enumerate(leyes + [reprecio.CLAVE_POR_DEFECTO], start=1):
+            tk.Label(frm_mg, text="Otras:" if ley == reprecio.CLAVE_POR_DEFECTO else f"{ley}:").grid(row=fila, column=0, sticky="w")
+            e_mayor = tk.Entry(frm_mg, width=7)
+            e_mayor.grid(row=fila, column=1, padx=4, pady=2)
+            e_menor = tk.Entry(frm_mg, width=7)
+            e_menor.grid(row=fila, column=2, padx=4, pady=2)
+            e_mg[ley] = (e_mayor, e_menor)
+
+        # Vista previa
+        frm_prev = tk.LabelFrame(win, text="Vista previa", padx=10, pady=10)
+        frm_prev.pack(fill="both", expand=True, padx=10, pady=(0, 6))
+        cols = ("material", "tipo", "mayor_act", "mayor_nuevo", "menor_act", "menor_nuevo")
+        tv = ttk.Treeview(frm_prev, columns=cols, show="headings", height=12)
+        for c, txt, w, anchor in (
+            ("material", "Material", 200, "w"),
+            ("tipo", "Tipo", 80, "center"),
+            ("mayor_act", "Mayor actual", 110, "e"),
+            ("mayor_nuevo", "Mayor nuevo", 110, "e"),
+            ("menor_act", "Menor actual", 110, "e"),
+            ("menor_nuevo", "Menor nuevo", 110, "e"),
+        ):
+            tv.heading(c, text=txt)
+            tv.column(c, width=w, anchor=anchor)
+        tv.tag_configure("cambia", background="#fff7cc")
+        tv.tag_configure("omitido", foreground="gray")
+        tv.pack(side="left", fill="both", expand=True)
+        sb = ttk.Scrollbar(frm_prev, orient="vertical", command=tv.yview)
+        sb.pack(side="right", fill="y")
+        tv.configure(yscrollcommand=sb.set)
+
+        lbl_estado = tk.Label(win, text="Completá cotizaciones y márgenes y tocá Vista previa.", fg="gray")
+        lbl_estado.pack(pady=(0, 4))
+        estado = {"cambios": []}
+
+        def gs(valor):
+            return f"{int(valor):,}".replace(",", ".")
+
+        def numero(entry):
+            # Cotizaciones en Gs: el punto es separador de miles ("1.250.000")
+            texto = entry.get().strip().replace(".", "").replace(",", ".")
+            return float(texto) if texto else None
+
+        def porcentaje(entry):
+            # Márgenes: "2.5" y "2,5" son 2,5 % (el punto es decimal, no de miles)
+            texto = entry.get().strip().replace(",", ".")
+            return float(texto) if texto else None
+
+        def leer_parametros():
+            cot = {t: numero(e) for t, e in e_cot.items()}
+            margenes = {}
+            for ley, (e_mayor, e_menor) in e_mg.items():
+                mayor, menor = porcentaje(e_mayor), porcentaje(e_menor)
+                if mayor is None and menor is None:
+                    continue
+                margenes[ley] = ((mayor or 0) / 100, (menor if menor is not None else mayor or 0) / 100)
+            return {t: v for t, v in cot.items() if v is not None}, margenes
+
+        def vista_previa():
+            try:
+                cot, margenes = leer_parametros()
+            except ValueError:
+                messagebox.showwarning("Atención", "Revisá los números ingresados.", parent=win)
+                return
+            fuera = [("Otras" if ley == reprecio.CLAVE_POR_DEFECTO else ley)
+                     for ley, par in margenes.items() if not all(0 <= m <= reprecio.MARGEN_MAXIMO for m in par)]
+            if fuera:
+                messagebox.showwarning(
+                    "Atención",
+                    f"Los márgenes deben estar entre 0 y {reprecio.MARGEN_MAXIMO:.0%} (revisá: {', '.join(fuera)}).",
+                    parent=win,
+                )
+                return
+            if not cot:
+                messagebox.showwarning("Atención", "Ingresá al menos una cotización.", parent=win)
+                return
+            tareas.enviar(
+                reprecio.calcular, cot, margenes,
+                clave="calculo",
+                al_terminar=mostrar,
+                al_fallar=lambda e: messagebox.showerror("Error", f"No se pudo calcular: {e}", parent=win),
+            )
+
+        def mostrar(resultado):
+            cambios, omitidos = resultado
+            estado["cambios"] = cambios
+            tv.delete(*tv.get_children())
+            for c in cambios:
+                tv.insert("", tk.END, values=(
+                    c.material, c.tipo, gs(c.mayor_actual), gs(c.mayor_nuevo), gs(c.menor_actual), gs(c.menor_nuevo),
+                ), tags=("cambia",) if c.cambia else ())
+            for m, motivo in omitidos:
+                tv.insert("", tk.END, values=(f"{m.nombre} {m.ley}".strip(), m.tipo, gs(m.precio_mayor), motivo, gs(m.precio_menor), ""),
+                          tags=("omitido",))
+            n = sum(1 for c in cambios if c.cambia)
+            lbl_estado.config(text=f"{n} materiales cambian de precio, {len(omitidos)} sin calcular.")
+            btn_aplicar.config(state="normal" if n else "disabled")
+
+        def aplicar():
+            n = sum(1 for c in estado["cambios"] if c.cambia)
+            if not n or not messagebox.askyesno("Confirmar", f"¿Actualizar el precio de {n} materiales?", parent=win):
+                return
+            btn_aplicar.config(state="disabled")
+            tareas.enviar(
+                reprecio.aplicar, estado["cambios"],
+                al_terminar=aplicado,
+                al_fallar=lambda e: messagebox.showerror("Error", f"No se pudieron guardar los precios: {e}", parent=win),
+            )
+
+        def aplicado(resultado):
+            actualizados, conflictos = resultado
+            texto = f"✅ {actualizados} materiales actualizados."
+            if conflictos:
+                texto += f"\n⚠️ {len(conflictos)} se editaron mientras tanto y no se tocaron: " + \
+                    ", ".join(c.material for c in conflictos[:10])
+            messagebox.showinfo("Repreciado", texto, parent=win)
+            if al_aplicar:
+                al_aplicar()
+            vista_previa()
+
+        frm_botones = tk.Frame(win)
+        frm_botones.pack(pady=(0, 10))
+        tk.Button(frm_botones, text="Vista previa", command=vista_previa).pack(side="left", padx=6)
+        btn_aplicar = tk.Button(frm_botones, text="Aplicar precios", command=aplicar, state="disabled")
+        btn_aplicar.pack(side="left", padx=6)
+
     # ---- Historial de ventas (con reimpresión) ----
     def open_historial_ventas(self):
         import datetime as dt
@@ -379,9 +477,7 @@ class Dashboard(tk.Frame):
         estilizar_toplevel(ventana)
         ventana.geometry("950x600")
         ventana.resizable(False, False)
-
-        # Ruta absoluta al mismo data.db que usás en gestión de materiales
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data.db"))
+        tareas = EjecutorTareas(ventana)
 
         # --------- FILTROS ---------
         frame_filtros = tk.LabelFrame(ventana, text="Filtros", padx=10, pady=10)
@@ -395,7 +491,7 @@ class Dashboard(tk.Frame):
         e_hasta = tk.Entry(frame_filtros, width=12)
         e_hasta.grid(row=0, column=3, padx=(5, 15))
 
-        tk.Label(frame_filtros, text="Texto (ID, vendedor, modalidad):").grid(row=0, column=4, sticky="w")
+        tk.Label(frame_filtros, text="Texto (ID, vendedor, modalidad, ítems):").grid(row=0, column=4, sticky="w")
         e_texto = tk.Entry(frame_filtros, width=28)
         e_texto.grid(row=0, column=5, padx=(5, 10))
 
@@ -403,21 +499,20 @@ class Dashboard(tk.Frame):
         lbl_total.grid(row=0, column=6, padx=10)
 
         def normalizar_rango():
-            d1 = e_desde.get().strip()
-            d2 = e_hasta.get().strip()
-            if not d1:
-                d1 = "0001-01-01"
-            if not d2:
-                d2 = "9999-12-31"
+            # None = sin límite (así la consulta no filtra por fecha y pagina por la PK)
+            d1 = e_desde.get().strip() or None
+            d2 = e_hasta.get().strip() or None
             # valida formato
             try:
-                dt.datetime.strptime(d1, "%Y-%m-%d")
+                if d1:
+                    dt.datetime.strptime(d1, "%Y-%m-%d")
             except Exception:
-                d1 = "0001-01-01"
+                d1 = None
             try:
-                dt.datetime.strptime(d2, "%Y-%m-%d")
+                if d2:
+                    dt.datetime.strptime(d2, "%Y-%m-%d")
             except Exception:
-                d2 = "9999-12-31"
+                d2 = None
             return d1, d2
 
         def buscar(event=None):
@@ -438,8 +533,18 @@ class Dashboard(tk.Frame):
 
         cols_v = ("id", "fecha", "vendedor", "modalidad", "total")
         tv_ventas = ttk.Treeview(frame_ventas, columns=cols_v, show="headings", height=10)
+        sb_ventas = ttk.Scrollbar(frame_ventas, orient="vertical", command=tv_ventas.yview)
+        sb_ventas.pack(side="right", fill="y")
         tv_ventas.pack(fill="both", expand=True)
 
+        def _al_desplazar(primero, ultimo):
+            sb_ventas.set(primero, ultimo)
+            # Cerca del final de lo cargado: traer la siguiente ventana
+            if float(ultimo) >= 0.9:
+                cargar_siguiente()
+
+        tv_ventas.configure(yscrollcommand=_al_desplazar)
+
         for c, t, w, a in [
             ("id", "ID", 60, "center"),
             ("fecha", "Fecha", 160, "center"),
@@ -450,7 +555,7 @@ class Dashboard(tk.Frame):
             tv_ventas.heading(c, text=t)
             tv_ventas.column(c, width=w, anchor=a)
 
-        # --------- ACCIONES (Reimprimir) ---------
+        # --------- ACCIONES (Reimprimir, lote, exportar) ---------
         frame_accion = tk.Frame(ventana)
         frame_accion.pack(fill="x", padx=10, pady=(0, 6))
 
@@ -461,48 +566,21 @@ class Dashboard(tk.Frame):
                 return
 
             venta_id = tv_ventas.item(sel[0])["values"][0]
-
-            try:
-                # Encabezado y totales
-                con = sqlite3.connect(db_path)
-                cur = con.cursor()
-                cur.execute("""
-                    SELECT v.id, v.fecha, v.modalidad, v.total, COALESCE(u.username, '(sin usuario)') AS vendedor
-                    FROM ventas v
-                    LEFT JOIN usuarios u ON u.id = v.usuario_id
-                    WHERE v.id = ?
-                """, (venta_id,))
-                v = cur.fetchone()
+            salida = os.path.abspath(os.path.join(
+                os.path.dirname(__file__), "..", "ticket_reimpreso.txt"
+            ))
+
+            def _reimprimir():
+                # Corre en segundo plano. Si el ticket está archivado (o en la cola), se reencola ese mismo
+                # ticket; el .txt de reimpresión es uno solo y se pisa cada vez
+                if COLA.reimprimir(venta_id, ruta=salida) is not None:
+                    return salida
+                # Ventas anteriores a la cola: se arma el ticket desde la base
+                v = models.obtener_venta(venta_id)
                 if not v:
-                    con.close()
-                    messagebox.showerror("Error", f"No se encontró la venta #{venta_id}.")
-                    return
+                    return None
                 _vid, fecha, modalidad, total, vendedor = v
-
-                # Ítems
-                cur.execute("""
-                    SELECT descripcion, IFNULL(peso_gramos,0), IFNULL(precio_por_gramo,0),
-                           IFNULL(cantidad,1), subtotal, tipo
-                    FROM venta_items
-                    WHERE venta_id = ?
-                    ORDER BY id ASC
-                """, (venta_id,))
-                items_rows = cur.fetchall()
-
-                # Pagos
-                cur.execute("""
-                    SELECT metodo, monto FROM pagos
-                    WHERE venta_id = ?
-                    ORDER BY id ASC
-                """, (venta_id,))
-                pagos_rows = cur.fetchall()
-                con.close()
-
-                # Printer
-                try:
-                    from ..printing import Printer
-                except Exception:
-                    from printing import Printer
+                items_rows, pagos_rows = models.detalle_venta(venta_id)
 
                 encabezado = {
                     "nombre": "ESTELA JOYAS",
@@ -520,20 +598,104 @@ class Dashboard(tk.Frame):
                 pagos = [{"metodo": m, "monto": float(x or 0)} for (m, x) in pagos_rows]
                 totales = {"total": float(total or 0)}
 
-                salida = os.path.abspath(os.path.join(
-                    os.path.dirname(__file__), "..", f"ticket_{venta_id}_reimpreso.txt"
-                ))
-
-                printer = Printer(modo="archivo", ruta=salida)
-                printer.print_ticket(encabezado, items_print, pagos, totales)
+                COLA.encolar(encabezado, items_print, pagos, totales, venta_id=venta_id, ruta=salida)
+                return salida
 
-                messagebox.showinfo("OK", f"Ticket reimprimido en:\n{salida}")
+            def _listo(ruta):
+                if ruta is None:
+                    messagebox.showerror("Error", f"No se encontró la venta #{venta_id}.")
+                else:
+                    messagebox.showinfo("OK", f"Ticket enviado a reimprimir:\n{ruta}")
 
-            except Exception as e:
-                messagebox.showerror("Error", f"No se pudo reimprimir el ticket: {e}")
+            tareas.enviar(
+                _reimprimir,
+                al_terminar=_listo,
+                al_fallar=lambda e: messagebox.showerror("Error", f"No se pudo reimprimir el ticket: {e}"),
+            )
 
         tk.Button(frame_accion, text="🖨️ Reimprimir ticket seleccionado", command=reimprimir_ticket).pack(side="left")
 
+        def reimprimir_lote():
+            # Varias ventas seleccionadas (Ctrl/Shift + clic) o, sin selección, todo el rango de fechas
+            sel = tv_ventas.selection()
+            d1, d2 = normalizar_rango()
+            if sel:
+                venta_ids = [tv_ventas.item(s)["values"][0] for s in sel]
+                nombre = f"tickets_{len(venta_ids)}_seleccionados.txt"
+            elif d1 or d2:
+                venta_ids = None
+                nombre = f"tickets_{d1 or 'inicio'}_{d2 or 'hoy'}.txt"
+            else:
+                messagebox.showwarning("Atención", "Selecciona ventas o indica un rango de fechas.", parent=ventana)
+                return
+
+            impresora = COLA.escpos_device
+            ruta = None
+            if impresora is None:
+                ruta = filedialog.asksaveasfilename(
+                    parent=ventana, title="Guardar tickets", defaultextension=".txt",
+                    initialfile=nombre, filetypes=[("Texto", "*.txt")],
+                )
+                if not ruta:
+                    return
+            btn_lote.config(state="disabled", text="🗂️ Generando...")
+
+            def _generar():
+                # Tres consultas para todo el lote y un solo archivo / trabajo de impresión
+                tickets = models.datos_tickets(
+                    venta_ids, d1, d2, encabezado={"nombre": "ESTELA JOYAS", "telefono": "000-000-000"},
+                )
+                printer = Printer(modo="escpos" if impresora else "archivo", ruta=ruta, escpos_device=impresora)
+                return printer.print_lote(d for _vid, d in tickets)
+
+            def _listo(n):
+                btn_lote.config(state="normal", text="🗂️ Reimprimir lote")
+                if not n:
+                    messagebox.showwarning("Atención", "No hay ventas para reimprimir.", parent=ventana)
+                else:
+                    destino = ruta or "la impresora"
+                    messagebox.showinfo("OK", f"{n} tickets enviados a:\n{destino}", parent=ventana)
+
+            def _fallo(e):
+                btn_lote.config(state="normal", text="🗂️ Reimprimir lote")
+                messagebox.showerror("Error", f"No se pudieron reimprimir los tickets: {e}", parent=ventana)
+
+            tareas.enviar(_generar, al_terminar=_listo, al_fallar=_fallo)
+
+        btn_lote = tk.Button(frame_accion, text="🗂️ Reimprimir lote", command=reimprimir_lote)
+        btn_lote.pack(side="left", padx=(8, 0))
+
+        def exportar_ventas():
+            d1, d2 = normalizar_rango()
+            ruta = filedialog.asksaveasfilename(
+                parent=ventana,
+                title="Exportar ventas",
+                defaultextension=".csv",
+                initialfile=f"ventas_{d1 or 'inicio'}_{d2 or 'hoy'}.csv",
+                filetypes=[
+                    ("CSV", "*.csv"), ("CSV comprimido", "*.csv.gz"),
+                    ("JSON Lines", "*.jsonl"), ("JSON Lines comprimido", "*.jsonl.gz"),
+                ],
+            )
+            if not ruta:
+                return
+            btn_exportar.config(state="disabled", text="📤 Exportando...")
+
+            def _listo(resultado):
+                btn_exportar.config(state="normal", text="📤 Exportar")
+                n, _ultimo = resultado
+                messagebox.showinfo("OK", f"{n} ventas exportadas a:\n{ruta}", parent=ventana)
+
+            def _fallo(e):
+                btn_exportar.config(state="normal", text="📤 Exportar")
+                messagebox.showerror("Error", f"No se pudo exportar: {e}", parent=ventana)
+
+            # El filtro de texto no aplica: se exporta todo el rango de fechas
+            tareas.enviar(exportar.exportar, ruta, desde=d1, hasta=d2, al_terminar=_listo, al_fallar=_fallo)
+
+        btn_exportar = tk.Button(frame_accion, text="📤 Exportar", command=exportar_ventas)
+        btn_exportar.pack(side="left", padx=(8, 0))
+
         # --------- DETALLES (Ítems y Pagos) ---------
         frame_detalle = tk.Frame(ventana)
         frame_detalle.pack(fill="both", expand=False, padx=10, pady=(0, 10))
@@ -571,102 +733,107 @@ class Dashboard(tk.Frame):
         tv_pagos.column("monto", width=140, anchor="e")
 
         # --------- CARGA / EVENTOS ---------
+        def _limpiar(tv):
+            for it in tv.get_children():
+                tv.delete(it)
+
+        # Estado de la paginación (cursor = id de la última fila mostrada)
+        pagina = {"filtro": (None, None, ""), "cursor": None, "agotado": True, "cargando": False}
+
         def cargar_ventas():
             # limpiar tablas
-            for it in tv_ventas.get_children():
-                tv_ventas.delete(it)
-            for it in tv_items.get_children():
-                tv_items.delete(it)
-            for it in tv_pagos.get_children():
-                tv_pagos.delete(it)
+            _limpiar(tv_ventas)
+            _limpiar(tv_items)
+            _limpiar(tv_pagos)
 
             d1, d2 = normalizar_rango()
             txt = e_texto.get().strip().lower()
-            like = f"%{txt}%"
+            pagina.update(filtro=(d1, d2, txt), cursor=None, agotado=False, cargando=True)
+
+            # clave="ventas": una búsqueda nueva descarta la que seguía en curso
+            tareas.enviar(
+                models.pagina_ventas, d1, d2, txt,
+                clave="ventas",
+                al_terminar=mostrar_pagina,
+                al_fallar=fallo_ventas,
+            )
+            # El resumen va por separado: la primera ventana aparece sin esperarlo
+            lbl_total.config(text="Mostrando ... ventas | Total: ... Gs")
+            tareas.enviar(
+                models.resumen_ventas, d1, d2, txt,
+                clave="resumen",
+                al_terminar=mostrar_resumen,
+                al_fallar=fallo_ventas,
+            )
 
-            try:
-                con = sqlite3.connect(db_path)
-                cur = con.cursor()
-                if txt:
-                    cur.execute("""
-                        SELECT v.id, v.fecha, COALESCE(u.username,'(sin usuario)') AS vendedor, v.modalidad, v.total
-                        FROM ventas v
-                        LEFT JOIN usuarios u ON u.id = v.usuario_id
-                        WHERE v.fecha BETWEEN ? AND ?
-                          AND (
-                               LOWER(COALESCE(u.username,'')) LIKE ?
-                            OR LOWER(COALESCE(v.modalidad,'')) LIKE ?
-                            OR CAST(v.id AS TEXT) LIKE ?
-                          )
-                        ORDER BY v.id DESC
-                    """, (d1, d2, like, like, like))
-                else:
-                    cur.execute("""
-                        SELECT v.id, v.fecha, COALESCE(u.username,'(sin usuario)') AS vendedor, v.modalidad, v.total
-                        FROM ventas v
-                        LEFT JOIN usuarios u ON u.id = v.usuario_id
-                        WHERE v.fecha BETWEEN ? AND ?
-                        ORDER BY v.id DESC
-                    """, (d1, d2))
-                rows = cur.fetchall()
-                con.close()
-
-                total_gs = 0
-                for vid, fecha, vend, mod, tot in rows:
-                    total_gs += float(tot or 0)
-                    tv_ventas.insert("", tk.END, values=(vid, fecha, vend, mod, f"{int(tot):,}".replace(",", ".")))
-                lbl_total.config(text=f"Mostrando {len(rows)} ventas | Total: {int(total_gs):,} Gs".replace(",", "."))
-            except Exception as e:
-                messagebox.showerror("Error", f"No se pudieron cargar ventas: {e}")
+        def cargar_siguiente():
+            if pagina["cargando"] or pagina["agotado"]:
+                return
+            pagina["cargando"] = True
+            d1, d2, txt = pagina["filtro"]
+            tareas.enviar(
+                models.pagina_ventas, d1, d2, txt, pagina["cursor"],
+                clave="ventas",
+                al_terminar=mostrar_pagina,
+                al_fallar=fallo_ventas,
+            )
+
+        def fallo_ventas(e):
+            pagina["cargando"] = False
+            messagebox.showerror("Error", f"No se pudieron cargar ventas: {e}")
+
+        def mostrar_pagina(rows):
+            pagina["cargando"] = False
+            pagina["agotado"] = len(rows) < models.TAM_PAGINA
+            if rows:
+                pagina["cursor"] = rows[-1][0]
+            for vid, fecha, vend, mod, tot in rows:
+                tv_ventas.insert("", tk.END, values=(vid, fecha, vend, mod, f"{int(tot):,}".replace(",", ".")))
+
+        def mostrar_resumen(resultado):
+            cant, total_gs = resultado
+            lbl_total.config(text=f"Mostrando {cant} ventas | Total: {int(total_gs):,} Gs".replace(",", "."))
 
         def cargar_detalle(event=None):
             # limpiar detalle
-            for it in tv_items.get_children():
-                tv_items.delete(it)
-            for it in tv_pagos.get_children():
-                tv_pagos.delete(it)
+            _limpiar(tv_items)
+            _limpiar(tv_pagos)
 
             sel = tv_ventas.selection()
             if not sel:
                 return
             venta_id = tv_ventas.item(sel[0])["values"][0]
-            try:
-                con = sqlite3.connect(db_path)
-                cur = con.cursor()
-
-                # Ítems
-                cur.execute("""
-                    SELECT descripcion, IFNULL(peso_gramos,0), IFNULL(precio_por_gramo,0),
-                           IFNULL(cantidad,1), subtotal, tipo
-                    FROM venta_items
-                    WHERE venta_id = ?
-                    ORDER BY id ASC
-                """, (venta_id,))
-                for (desc, peso, pgr, cant, subt, tipo) in cur.fetchall():
-                    tv_items.insert(
-                        "", tk.END,
-                        values=(
-                            desc or "",
-                            f"{float(peso):.2f}",
-                            f"{int(pgr):,}".replace(",", "."),
-                            int(cant),
-                            f"{int(subt):,}".replace(",", "."),
-                            tipo or "",
-                        )
-                    )
+            tareas.enviar(
+                models.detalle_venta, venta_id,
+                clave="detalle",
+                al_terminar=mostrar_detalle,
+                al_fallar=lambda e: messagebox.showerror(
+                    "Error", f"No se pudo cargar el detalle de la venta #{venta_id}: {e}"
+                ),
+            )
 
-                # Pagos
-                cur.execute("""
-                    SELECT metodo, monto FROM pagos
-                    WHERE venta_id = ?
-                    ORDER BY id ASC
-                """, (venta_id,))
-                for (met, mon) in cur.fetchall():
-                    tv_pagos.insert("", tk.END, values=(met, f"{int(mon):,}".replace(",", ".")))
+        def mostrar_detalle(resultado):
+            items_rows, pagos_rows = resultado
+            _limpiar(tv_items)
+            _limpiar(tv_pagos)
+
+            # Ítems
+            for (desc, peso, pgr, cant, subt, tipo) in items_rows:
+                tv_items.insert(
+                    "", tk.END,
+                    values=(
+                        desc or "",
+                        f"{float(peso):.2f}",
+                        f"{int(pgr):,}".replace(",", "."),
+                        int(cant),
+                        f"{int(subt):,}".replace(",", "."),
+                        tipo or "",
+                    )
+                )
 
-                con.close()
-            except Exception as e:
-                messagebox.showerror("Error", f"No se pudo cargar el detalle de la venta #{venta_id}: {e}")
+            # Pagos
+            for (met, mon) in pagos_rows:
+                tv_pagos.insert("", tk.END, values=(met, f"{int(mon):,}".replace(",", ".")))
 
         tv_ventas.bind("<<TreeviewSelect>>", cargar_detalle)
 
@@ -679,16 +846,108 @@ class Dashboard(tk.Frame):
         win = tk.Toplevel(self.master)
         win.title("Cierre de Caja")
         estilizar_toplevel(win)
-        win.geometry("520x420")
+        win.geometry("520x600")
         win.resizable(False, False)
-
-        # Ruta a la BD
-        db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data.db"))
+        tareas = EjecutorTareas(win)
+        sesion = {"actual": None}
 
         # Cabecera
         hoy_str = dt.date.today().isoformat()
         tk.Label(win, text=f"Cierre de Caja - {hoy_str}", font=("TkDefaultFont", 11, "bold")).pack(pady=(10, 6))
 
+        # Sesión de caja de esta terminal (totales propios, aunque cruce la medianoche)
+        frm_sesion = tk.LabelFrame(win, text=f"Sesión de caja ({caja.TERMINAL})", padx=10, pady=10)
+        frm_sesion.pack(fill="x", padx=10, pady=(0, 8))
+
+        lbl_sesion = tk.Label(frm_sesion, text="Cargando...", justify="left", anchor="w")
+        lbl_sesion.grid(row=0, column=0, columnspan=3, sticky="w", padx=4, pady=2)
+
+        tk.Label(frm_sesion, text="Monto (Gs):").grid(row=1, column=0, sticky="w", padx=4, pady=(6, 2))
+        ent_monto = tk.Entry(frm_sesion, width=14)
+        ent_monto.grid(row=1, column=1, sticky="w", padx=4, pady=(6, 2))
+        btn_sesion = tk.Button(frm_sesion, text="Abrir caja", state="disabled")
+        btn_sesion.grid(row=1, column=2, sticky="e", padx=4, pady=(6, 2))
+
+        def gs(valor):
+            return f"{int(valor or 0):,}".replace(",", ".")
+
+        def cargar_sesion():
+            tareas.enviar(
+                caja.sesion_abierta,
+                clave="sesion",
+                al_terminar=mostrar_sesion,
+                al_fallar=lambda e: messagebox.showerror("Error", f"No se pudo leer la sesión de caja: {e}"),
+            )
+
+        def mostrar_sesion(s):
+            sesion["actual"] = s
+            ent_monto.delete(0, tk.END)
+            if s is None:
+                lbl_sesion.config(text="Caja cerrada. Ingresá el monto inicial para abrirla.")
+                btn_sesion.config(text="Abrir caja", state="normal")
+                return
+            esperado = s["monto_inicial"] + s["total_efectivo"]
+            lbl_sesion.config(text=(
+                f"Abierta desde {s['fecha_apertura']} (#{s['id']})\n"
+                f"Monto inicial: {gs(s['monto_inicial'])} Gs   Ventas: {s['cantidad_ventas']} "
+                f"por {gs(s['total_ventas'])} Gs\n"
+                f"Efectivo: {gs(s['total_efectivo'])}   Tarjeta: {gs(s['total_tarjeta'])}   "
+                f"Transferencia: {gs(s['total_transferencia'])}\n"
+                f"Efectivo esperado en caja: {gs(esperado)} Gs"
+            ))
+            btn_sesion.config(text="Cerrar caja", state="normal")
+
+        def leer_monto():
+            texto = ent_monto.get().strip().replace(".", "").replace(",", ".")
+            try:
+                monto = float(texto)
+            except ValueError:
+                messagebox.showwarning("Atención", "Ingresá un monto válido.", parent=win)
+                return None
+            if monto < 0:
+                messagebox.showwarning("Atención", "El monto no puede ser negativo.", parent=win)
+                return None
+            return monto
+
+        def accion_sesion():
+            monto = leer_monto()
+            if monto is None:
+                return
+            btn_sesion.config(state="disabled")
+            s = sesion["actual"]
+            if s is None:
+                tareas.enviar(
+                    caja.abrir_sesion, self.user.id, monto,
+                    clave="sesion",
+                    al_terminar=lambda _id: cargar_sesion(),
+                    al_fallar=fallo_sesion,
+                )
+            else:
+                tareas.enviar(
+                    caja.cerrar_sesion, s["id"], self.user.id, monto,
+                    clave="sesion",
+                    al_terminar=sesion_cerrada,
+                    al_fallar=fallo_sesion,
+                )
+
+        def sesion_cerrada(s):
+            dif = s["diferencia"]
+            estado = "Cuadra" if abs(dif) < 0.5 else ("Sobrante" if dif > 0 else "Faltante")
+            messagebox.showinfo(
+                "Caja cerrada",
+                f"Esperado: {gs(s['monto_esperado'])} Gs\n"
+                f"Contado: {gs(s['monto_cierre'])} Gs\n"
+                f"{estado}: {gs(abs(dif))} Gs",
+                parent=win,
+            )
+            cargar_sesion()
+
+        def fallo_sesion(exc):
+            messagebox.showerror("Error", str(exc), parent=win)
+            cargar_sesion()
+
+        btn_sesion.config(command=accion_sesion)
+
         # Contenedores
         frm_totales = tk.LabelFrame(win, text="Totales del día", padx=10, pady=10)
         frm_totales.pack(fill="x", padx=10, pady=(0, 8))
@@ -712,49 +971,120 @@ class Dashboard(tk.Frame):
         tv.pack(fill="both", expand=True)
 
         def cargar_cierre():
+            tareas.enviar(
+                models.resumen_caja_dia, hoy_str,
+                clave="cierre",
+                al_terminar=mostrar_cierre,
+                al_fallar=lambda e: messagebox.showerror("Error", f"No se pudo calcular el cierre: {e}"),
+            )
+
+        def mostrar_cierre(resultado):
+            cant, total, desglose = resultado
             # limpiar
             for it in tv.get_children():
                 tv.delete(it)
 
-            try:
-                con = sqlite3.connect(db_path)
-                cur = con.cursor()
-
-                # Ventas del día (fecha LIKE 'YYYY-MM-DD%')
-                cur.execute("""
-                    SELECT COUNT(*), COALESCE(SUM(total), 0)
-                    FROM ventas
-                    WHERE fecha LIKE ?
-                """, (hoy_str + "%",))
-                cant, total = cur.fetchone() or (0, 0)
-
-                # Desglose por método
-                cur.execute("""
-                    SELECT p.metodo, COALESCE(SUM(p.monto), 0) AS monto
-                    FROM pagos p
-                    WHERE p.venta_id IN (
-                        SELECT id FROM ventas WHERE fecha LIKE ?
-                    )
-                    GROUP BY p.metodo
-                    ORDER BY monto DESC
-                """, (hoy_str + "%",))
-                desglose = cur.fetchall()
-                con.close()
-
-                # Totales
-                lbl_cant.config(text=f"Ventas: {cant}")
-                lbl_total.config(text=f"Total del día: {int(total):,} Gs".replace(",", "."))
+            # Totales
+            lbl_cant.config(text=f"Ventas: {cant}")
+            lbl_total.config(text=f"Total del día: {int(total):,} Gs".replace(",", "."))
 
-                # Métodos
-                for metodo, monto in desglose:
-                    tv.insert("", tk.END, values=(metodo, f"{int(monto):,}".replace(",", ".")))
+            # Métodos
+            for metodo, monto in desglose:
+                tv.insert("", tk.END, values=(metodo, f"{int(monto):,}".replace(",", ".")))
 
-            except Exception as e:
-                messagebox.showerror("Error", f"No se pudo calcular el cierre: {e}")
+        def actualizar():
+            cargar_sesion()
+            cargar_cierre()
 
-        tk.Button(win, text="Actualizar", command=cargar_cierre).pack(pady=(0, 10))
+        tk.Button(win, text="Actualizar", command=actualizar).pack(pady=(0, 10))
 
         # Carga inicial
-        cargar_cierre()
+        actualizar()
     # <<< ADDED
 
+    # ---- Reportes ----
+    def open_reportes(self):
+        import datetime as dt
+
+        win = tk.Toplevel(self.master)
+        win.title("Reportes de Ventas")
+        estilizar_toplevel(win)
+        win.geometry("760x520")
+        tareas = EjecutorTareas(win)
+
+        # --------- FILTROS ---------
+        frm = tk.LabelFrame(win, text="Consulta", padx=10, pady=10)
+        frm.pack(fill="x", padx=10, pady=(10, 6))
+
+        tk.Label(frm, text="Agrupar por:").grid(row=0, column=0, sticky="w")
+        cb_agrupacion = ttk.Combobox(frm, values=list(AGRUPACIONES), state="readonly", width=12)
+        cb_agrupacion.set("material")
+        cb_agrupacion.grid(row=0, column=1, padx=(5, 15))
+
+        hoy = dt.date.today()
+        tk.Label(frm, text="Desde (YYYY-MM-DD):").grid(row=0, column=2, sticky="w")
+        e_desde = tk.Entry(frm, width=12)
+        e_desde.insert(0, hoy.replace(day=1).isoformat())
+        e_desde.grid(row=0, column=3, padx=(5, 15))
+
+        tk.Label(frm, text="Hasta (YYYY-MM-DD):").grid(row=0, column=4, sticky="w")
+        e_hasta = tk.Entry(frm, width=12)
+        e_hasta.insert(0, hoy.isoformat())
+        e_hasta.grid(row=0, column=5, padx=(5, 15))
+
+        # --------- RESULTADOS ---------
+        frm_res = tk.LabelFrame(win, text="Resultado", padx=10, pady=10)
+        frm_res.pack(fill="both", expand=True, padx=10, pady=(0, 6))
+
+        cols = ("grupo", "ventas", "gramos", "ingresos", "precio_gramo")
+        tv = ttk.Treeview(frm_res, columns=cols, show="headings", height=14)
+        for c, txt, w, anchor in (
+            ("grupo", "Grupo", 220, "w"),
+            ("ventas", "Ventas", 70, "center"),
+            ("gramos", "Gramos", 100, "e"),
+            ("ingresos", "Ingresos (Gs)", 140, "e"),
+            ("precio_gramo", "Prom. Gs/g", 120, "e"),
+        ):
+            tv.heading(c, text=txt)
+            tv.column(c, width=w, anchor=anchor)
+        tv.pack(side="left", fill="both", expand=True)
+        sb = ttk.Scrollbar(frm_res, orient="vertical", command=tv.yview)
+        sb.pack(side="right", fill="y")
+        tv.configure(yscrollcommand=sb.set)
+
+        lbl_total = tk.Label(win, text="", fg="gray")
+        lbl_total.pack(pady=(0, 6))
+
+        def gs(valor):
+            return f"{int(round(valor)):,}".replace(",", ".")
+
+        def consultar(event=None):
+            try:
+                ini, fin = models.rango_dias(e_desde.get().strip() or None, e_hasta.get().strip() or None)
+            except ValueError:
+                messagebox.showwarning("Atención", "Fechas inválidas (YYYY-MM-DD).", parent=win)
+                return
+            lbl_total.config(text="Calculando...")
+            tareas.enviar(
+                REPORTES.consultar, cb_agrupacion.get(), ini, fin,
+                clave="reporte",
+                al_terminar=mostrar,
+                al_fallar=lambda e: messagebox.showerror("Error", f"No se pudo generar el reporte: {e}", parent=win),
+            )
+
+        def mostrar(filas):
+            tv.delete(*tv.get_children())
+            gramos = ingresos = 0.0
+            for f in filas:
+                tv.insert("", tk.END, values=(
+                    f.grupo, f.ventas, f"{f.gramos:.2f}", gs(f.ingresos),
+                    gs(f.precio_gramo) if f.gramos else "-",
+                ))
+                gramos += f.gramos
+                ingresos += f.ingresos
+            lbl_total.config(text=f"{len(filas)} grupos | {gramos:.2f} g | Total: {gs(ingresos)} Gs")
+
+        tk.Button(frm, text="Consultar", command=consultar).grid(row=0, column=6, padx=6)
+        cb_agrupacion.bind("<<ComboboxSelected>>", consultar)
+
+        consultar()
@@ -2,16 +2,20 @@
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
-from ..auth import validar_login
-
 # Como este archivo está dentro de JoyApp/ui/, usamos import relativo:
-from ..auth import validar_login
+from ..auth import desbloquear
+from ..tareas import EjecutorTareas
 
 
 class Login(tk.Toplevel):
-    def __init__(self, master, on_success):
+    def __init__(self, master, on_success, usuario=None):
+        """
+        usuario: si se indica, es la pantalla de bloqueo de la terminal: trae el
+        usuario cargado, no se puede cerrar y tapa la app hasta que alguien ingrese
+        (el mismo usuario desbloquea; otro es un cambio de turno).
+        """
         super().__init__(master)
-        self.title("Login – Joyería")
+        self.title("Terminal bloqueada" if usuario else "Login – Joyería")
         self.resizable(False, False)
 
         # --- UI ---
@@ -26,15 +30,26 @@ class Login(tk.Toplevel):
         self.e_user.grid(row=0, column=1, padx=4, pady=4)
         self.e_pass.grid(row=1, column=1, padx=4, pady=4)
 
-        btn = ttk.Button(frm, text="Ingresar", command=self.login)
-        btn.grid(row=2, column=0, columnspan=2, pady=(8, 0))
+        self.btn = ttk.Button(frm, text="Ingresar", command=self.login)
+        self.btn.grid(row=2, column=0, columnspan=2, pady=(8, 0))
 
         # callbacks
         self.on_success = on_success
 
+        # bcrypt corre en segundo plano: la ventana no se congela al validar
+        self.tareas = EjecutorTareas(self)
+        self._validando = False
+
         # UX: enter para enviar y foco inicial
         self.bind("<Return>", lambda _e: self.login())
-        self.e_user.focus_set()
+        if usuario:
+            self.e_user.insert(0, usuario)
+            self.e_pass.focus_set()
+            self.protocol("WM_DELETE_WINDOW", lambda: None)
+            self.transient(master)
+            self.after(20, self._bloquear)
+        else:
+            self.e_user.focus_set()
 
         # Centrar la ventana sobre el master
         self.after(10, self._center_on_master)
@@ -53,15 +68,40 @@ class Login(tk.Toplevel):
         y = my + (mh - h) // 2
         self.geometry(f"+{x}+{y}")
 
+    def _bloquear(self):
+        try:
+            self.grab_set()
+        except tk.TclError:
+            self.after(50, self._bloquear)  # la ventana todavía no es visible
+
     def login(self):
+        if self._validando:
+            return
         username = self.e_user.get().strip()
         password = self.e_pass.get()
-        res = validar_login(username, password)
+        self._validando = True
+        self.btn.config(state="disabled")
+        # Si el usuario ingresó hace poco, desbloquear no pasa por bcrypt
+        self.tareas.enviar(
+            desbloquear, username, password,
+            al_terminar=self._login_resultado,
+            al_fallar=self._login_error,
+            clave="login",
+        )
+
+    def _login_resultado(self, res):
+        self._validando = False
         if res:
-            # res puede ser un dict/tupla con info del usuario (id, rol, etc.)
+            # res es la auth.Sesion del usuario (id, username, rol, permisos)
             self.on_success(res)
             self.destroy()
         else:
+            self.btn.config(state="normal")
             messagebox.showerror("Error", "Usuario/contraseña inválidos")
             self.e_pass.delete(0, tk.END)
             self.e_pass.focus_set()
+
+    def _login_error(self, exc):
+        self._validando = False
+        self.btn.config(state="normal")
+        messagebox.showerror("Error", f"No se pudo validar el usuario: {exc}")
@@ -2,16 +2,22 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from ..models import listar_materiales_activos, obtener_precios_material, crear_venta
-from ..pricing import precio_material, MENOR, MAYOR
-from ..printing import Printer
-
-# >>> ADD: imports necesarios para leer stock desde la BD
-import sqlite3, os
+from .. import caja
+from ..models import obtener_precios_material, crear_venta
+from ..catalogo import CATALOGO
+from ..pricing import precio_material, precios_materiales, MENOR, MAYOR
+from ..printing import COLA
+from ..tareas import EjecutorTareas
+
+# >>> ADD: stock con caché corta (no abre la base en cada tecla)
+from ..stock import STOCK
 # <<< ADD
 
 
 class NuevaVenta(tk.Frame):
+    MAX_SUGERENCIAS = 50  # tope de opciones en el combo de materiales
+    DEBOUNCE_MS = 120     # espera tras la última tecla antes de buscar
+
     def __init__(self, master, user):
         super().__init__(master)
         self.user = user
@@ -20,17 +26,22 @@ class NuevaVenta(tk.Frame):
         self.modalidad = tk.StringVar(value=MENOR)
 
         # --- Modalidad ---
-        ttk.Radiobutton(self, text="Menor", variable=self.modalidad, value=MENOR).grid(row=0, column=0, padx=6, pady=6)
-        ttk.Radiobutton(self, text="Mayor", variable=self.modalidad, value=MAYOR).grid(row=0, column=1, padx=6, pady=6)
+        ttk.Radiobutton(self, text="Menor", variable=self.modalidad, value=MENOR,
+                        command=self._recotizar_items).grid(row=0, column=0, padx=6, pady=6)
+        ttk.Radiobutton(self, text="Mayor", variable=self.modalidad, value=MAYOR,
+                        command=self._recotizar_items).grid(row=0, column=1, padx=6, pady=6)
 
         # --- Material con búsqueda y autocompletado ---
         tk.Label(self, text="Material").grid(row=1, column=0, sticky="e", padx=6, pady=6)
-        self.materiales = listar_materiales_activos()  # [(id, nombre, ley), ...]
-        valores_materiales = [f"{m[1]} {m[2] or ''}".strip() for m in self.materiales]
+        # Índice y etiqueta -> Material de la misma foto del catálogo (compartidos entre
+        # ventanas): el combo filtrado cambia los índices, la etiqueta no. Las etiquetas
+        # repetidas ("nombre ley" iguales) llevan " #id" para no pisarse.
+        self.indice, self._por_etiqueta = CATALOGO.indice_y_etiquetas()
+        valores_materiales = [etq for _id, etq in self.indice.entradas]
 
         self.cbo_mat = ttk.Combobox(
             self,
-            values=valores_materiales,
+            values=valores_materiales[:self.MAX_SUGERENCIAS],
             state="normal",  # Permite escribir
             width=28,
         )
@@ -43,22 +54,24 @@ class NuevaVenta(tk.Frame):
 
         # --- Autocompletado dinámico ---
         self._autocompletando = False
+        self._busqueda_pendiente = None
 
-        def filtrar_y_autocompletar(event):
+        def filtrar_y_autocompletar():
+            self._busqueda_pendiente = None
             if self._autocompletando:
                 return
 
-            texto = self.cbo_mat.get().strip().lower()
-            filtrados = [v for v in valores_materiales if texto in v.lower()] if texto else valores_materiales
+            texto = self.cbo_mat.get().strip()
+            filtrados = [etq for _id, etq in self.indice.buscar(texto, limite=self.MAX_SUGERENCIAS)]
             self.cbo_mat["values"] = filtrados
 
             if not texto:
                 return
 
-            coincidencias = [v for v in valores_materiales if v.lower().startswith(texto)]
-            if coincidencias:
+            coincidencia = self.indice.empieza_con(texto)
+            if coincidencia:
                 self._autocompletando = True
-                self.cbo_mat.set(coincidencias[0])
+                self.cbo_mat.set(coincidencia[1])
                 self.cbo_mat.icursor(len(texto))
                 self.cbo_mat.selection_range(len(texto), tk.END)
                 self._autocompletando = False
@@ -66,33 +79,35 @@ class NuevaVenta(tk.Frame):
             if filtrados:
                 self.cbo_mat.event_generate("<Down>")
 
+        def programar_busqueda(event):
+            # Teclas de navegación no cambian el texto
+            if event.keysym in ("Up", "Down", "Return", "Tab", "Escape"):
+                return
+            # Debounce: solo se evalúa la última consulta tras una pausa al tipear
+            if self._busqueda_pendiente is not None:
+                self.after_cancel(self._busqueda_pendiente)
+            self._busqueda_pendiente = self.after(self.DEBOUNCE_MS, filtrar_y_autocompletar)
+
         def seleccionar_primer_resultado(event):
             if self.cbo_mat["values"]:
                 self.cbo_mat.set(self.cbo_mat["values"][0])
 
-        self.cbo_mat.bind("<KeyRelease>", filtrar_y_autocompletar)
+        self.cbo_mat.bind("<KeyRelease>", programar_busqueda)
         self.cbo_mat.bind("<Return>", seleccionar_primer_resultado)
 
         # >>> ADD: helpers de stock
-        def _db_path():
-            return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data.db"))
-
         def _leer_stock(material_id: int) -> float:
             try:
-                con = sqlite3.connect(_db_path())
-                cur = con.cursor()
-                row = cur.execute("SELECT COALESCE(stock_gramos, 0) FROM materiales WHERE id=?", (material_id,)).fetchone()
-                con.close()
-                return float(row[0] if row else 0.0)
+                return STOCK.leer(material_id)
             except Exception:
                 return 0.0
 
         def _refrescar_stock_label(event=None):
-            idx = self.cbo_mat.current()
-            if idx is None or idx < 0 or idx >= len(self.materiales):
+            mat = self._material_seleccionado()
+            if mat is None:
                 self.stock_var.set("Stock: -")
                 return
-            mat_id = int(self.materiales[idx][0])
+            mat_id = int(mat[0])
             stock = _leer_stock(mat_id)
             self.stock_var.set(f"Stock: {stock:.2f} g")
 
@@ -106,21 +121,33 @@ class NuevaVenta(tk.Frame):
 
         # >>> ADD: validar contra stock mientras escribe
         def _validar_peso_vs_stock(event=None):
-            idx = self.cbo_mat.current()
-            if idx is None or idx < 0 or idx >= len(self.materiales):
+            mat = self._material_seleccionado()
+            if mat is None:
                 return
             try:
                 peso = float(self.e_peso.get().strip().replace(",", ".")) if self.e_peso.get().strip() else 0.0
             except Exception:
                 peso = 0.0
-            mat_id = int(self.materiales[idx][0])
+            mat_id = int(mat[0])
             stock = _leer_stock(mat_id)
             if peso > stock > 0:
                 self.stock_var.set(f"Stock: {stock:.2f} g  ⚠ Supera stock")
             else:
                 self.stock_var.set(f"Stock: {stock:.2f} g")
 
-        self.e_peso.bind("<KeyRelease>", _validar_peso_vs_stock)
+        # Una ráfaga de teclas = una sola validación, tras una pausa corta
+        self._validacion_pendiente = None
+
+        def _programar_validacion(event=None):
+            if self._validacion_pendiente is not None:
+                self.after_cancel(self._validacion_pendiente)
+            self._validacion_pendiente = self.after(self.DEBOUNCE_MS, _validar_pendiente)
+
+        def _validar_pendiente():
+            self._validacion_pendiente = None
+            _validar_peso_vs_stock()
+
+        self.e_peso.bind("<KeyRelease>", _programar_validacion)
         # <<< ADD
 
         # --- Botón agregar ---
@@ -168,15 +195,45 @@ class NuevaVenta(tk.Frame):
         self.e_trf.grid(row=8, column=1, padx=6, pady=2, sticky="we")
 
         # --- Guardar venta ---
-        tk.Button(self, text="Guardar + Imprimir", command=self.guardar).grid(row=9, column=0, columnspan=2, pady=10)
+        self.btn_guardar = tk.Button(self, text="Guardar + Imprimir", command=self.guardar)
+        self.btn_guardar.grid(row=9, column=0, columnspan=2, pady=10)
 
         # Estado interno
         self.items = []
+        self._guardando = False
+        self.tareas = EjecutorTareas(self)
 
         # Expansión
         self.grid_rowconfigure(4, weight=1)
         self.grid_columnconfigure(1, weight=1)
 
+    def _material_seleccionado(self):
+        """Material (id, nombre, ley, ...) elegido en el combo, o None."""
+        return self._por_etiqueta.get(self.cbo_mat.get().strip())
+
+    @staticmethod
+    def _descripcion(nombre, ley, peso, pgr):
+        return f"{nombre} {ley or ''} {peso} g @ {int(pgr)}"
+
+    def _recotizar_items(self):
+        """Cambió la modalidad: recalcula todas las líneas ya cargadas con una sola llamada a pricing."""
+        if not self.items:
+            return
+        modalidad = self.modalidad.get()
+        lineas = []
+        for it in self.items:
+            mat = CATALOGO.obtener(it["material_id"])
+            if mat is not None:
+                it["precio_por_gramo"] = mat.precio_mayor if modalidad == MAYOR else mat.precio_menor
+                it["descripcion"] = self._descripcion(mat.nombre, mat.ley, it["peso_gramos"], it["precio_por_gramo"])
+            lineas.append((it["precio_por_gramo"], it["peso_gramos"], modalidad))
+        for it, fila, subtotal in zip(self.items, self.tree.get_children(), precios_materiales(lineas)):
+            it["subtotal"] = subtotal
+            self.tree.item(fila, values=(it["descripcion"], f"{int(subtotal):,}".replace(",", ".")))
+        self._refrescar_total_label()
+        if self.metodo.get():
+            self._refrescar_montos_segun_metodo()
+
     # ---------- Utilidades de pago / total ----------
     def calcular_total_actual(self):
         return sum(i["subtotal"] for i in self.items)
@@ -212,8 +269,8 @@ class NuevaVenta(tk.Frame):
     # --- Función para agregar ítem ---
     def add_item(self):
         # >>> ADD: validación dura contra el stock antes de agregar
-        idx_sel = self.cbo_mat.current()
-        if idx_sel is None or idx_sel < 0 or idx_sel >= len(self.materiales):
+        mat_sel = self._material_seleccionado()
+        if mat_sel is None:
             messagebox.showwarning("Atención", "Elegí un material.")
             return
         try:
@@ -224,15 +281,11 @@ class NuevaVenta(tk.Frame):
             messagebox.showerror("Error", "Peso inválido.")
             return
 
-        mat_id_sel = int(self.materiales[idx_sel][0])
+        mat_id_sel = int(mat_sel[0])
 
-        # leer stock actual del material
+        # leer stock actual del material (caché corta; crear_venta vuelve a validarlo)
         try:
-            con = sqlite3.connect(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data.db")))
-            cur = con.cursor()
-            row = cur.execute("SELECT COALESCE(stock_gramos, 0) FROM materiales WHERE id=?", (mat_id_sel,)).fetchone()
-            con.close()
-            stock_act = float(row[0] if row else 0.0)
+            stock_act = STOCK.leer(mat_id_sel)
         except Exception:
             stock_act = 0.0
 
@@ -248,25 +301,13 @@ class NuevaVenta(tk.Frame):
             return
         # <<< ADD
 
-        idx = self.cbo_mat.current()
-        if idx < 0:
-            messagebox.showwarning("Atención", "Elegí un material.")
-            return
-
-        try:
-            peso = float(self.e_peso.get())
-            if peso <= 0:
-                raise ValueError
-        except Exception:
-            messagebox.showerror("Error", "Peso inválido.")
-            return
-
-        mat = self.materiales[idx]  # (id, nombre, ley)
+        peso = peso_ing  # ya validado arriba (acepta "12,35")
+        mat = mat_sel  # Material: (id, nombre, ley, ...)
         precios = obtener_precios_material(mat[0])  # (mayor, menor)
         pgr = precios[0] if self.modalidad.get() == MAYOR else precios[1]
 
         subtotal = precio_material(pgr, peso, self.modalidad.get())
-        desc = f"{mat[1]} {mat[2] or ''} {peso} g @ {int(pgr)}"
+        desc = self._descripcion(mat[1], mat[2], peso, pgr)
 
         self.items.append({
             "material_id": mat[0],
@@ -299,24 +340,69 @@ class NuevaVenta(tk.Frame):
             messagebox.showwarning("Atención", "Seleccioná un método de pago.")
             return
 
+        if self._guardando:
+            return
+
         total = self.calcular_total_actual()
         pagos = [{"metodo": self.metodo.get(), "monto": total}]
 
-        venta_id = crear_venta(self.user["id"], self.modalidad.get(), self.items, pagos)
+        # Guardar + imprimir en segundo plano: la ventana sigue respondiendo
+        self._guardando = True
+        self.btn_guardar.config(state="disabled")
+        self.tareas.enviar(
+            self._registrar_venta,
+            self.user.id, self.user.username, self.modalidad.get(),
+            list(self.items), pagos, total,
+            al_terminar=self._venta_guardada,
+            al_fallar=self._venta_fallida,
+        )
+
+    @staticmethod
+    def _registrar_venta(usuario_id, vendedor, modalidad, items, pagos, total):
+        """
+        Corre en un hilo del pool: commit de la venta y ticket a la cola de impresión.
+        Devuelve (id de la venta, error al encolar el ticket o None). Una vez hecho el
+        commit la venta está guardada pase lo que pase con el ticket.
+        """
+        # Si esta terminal tiene la caja abierta, la venta suma a esa sesión
+        sesion = caja.sesion_abierta()
+        venta_id = crear_venta(usuario_id, modalidad, items, pagos, caja_sesion_id=sesion["id"] if sesion else None)
 
-        printer = Printer(modo="archivo", ruta=f"ticket_{venta_id}.txt")
         encabezado = {
             "nombre": "ESTELA JOYAS",
             "telefono": "000-000-000",
             "ticket_id": str(venta_id),
-            "vendedor": self.user.get("username", "Usuario"),
-            "modalidad": self.modalidad.get(),
+            "vendedor": vendedor,
+            "modalidad": modalidad,
         }
-        items_print = [{"descripcion": i["descripcion"], "detalle": None, "subtotal": i["subtotal"]} for i in self.items]
+        items_print = [{"descripcion": i["descripcion"], "detalle": None, "subtotal": i["subtotal"]} for i in items]
         totales = {"total": total}
-        printer.print_ticket(encabezado, items_print, pagos, totales)
-
-        messagebox.showinfo("OK", f"Venta #{venta_id} guardada. Ticket: ticket_{venta_id}.txt")
+        # Solo encola: si la impresora está lenta o trabada, la venta no espera
+        try:
+            COLA.encolar(encabezado, items_print, pagos, totales, venta_id=venta_id)
+        except Exception as e:
+            return venta_id, str(e) or e.__class__.__name__
+        return venta_id, None
+
+    def _venta_fallida(self, exc):
+        self._guardando = False
+        self.btn_guardar.config(state="normal")
+        messagebox.showerror("Error", f"No se pudo guardar la venta: {exc}")
+
+    def _venta_guardada(self, resultado):
+        venta_id, error_impresion = resultado
+        self._guardando = False
+        self.btn_guardar.config(state="normal")
+        if error_impresion is None:
+            messagebox.showinfo("OK", f"Venta #{venta_id} guardada. Ticket enviado a imprimir.")
+        else:
+            # La venta YA está guardada: no volver a guardarla, reimprimir desde el historial
+            messagebox.showinfo("OK", f"Venta #{venta_id} guardada.")
+            messagebox.showwarning(
+                "Ticket",
+                f"No se pudo enviar el ticket de la venta #{venta_id} a imprimir: {error_impresion}\n"
+                "Reimprimilo desde el Historial de Ventas.",
+            )
 
         # Reset general
         self.items.clear()
@@ -0,0 +1,33 @@
+# tests/conftest.py
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# Los tests importan el paquete JoyApp desde la raíz del repo
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+
+@pytest.fixture
+def base_temporal(tmp_path):
+    """Copia de JoyApp/data.db migrada y en uso como db.DB_PATH; la real nunca se toca."""
+    from JoyApp import db
+    from JoyApp.auth import USUARIOS
+    from JoyApp.catalogo import CATALOGO
+    from JoyApp.stock import STOCK
+
+    original = db.DB_PATH
+    ruta = tmp_path / "data.db"
+    shutil.copy(RAIZ / "JoyApp" / "data.db", ruta)
+    db.cerrar_conexiones()
+    db.DB_PATH = ruta
+    db.init_db()
+    for cache in (CATALOGO, STOCK, USUARIOS):
+        cache.invalidar()
+    yield ruta
+    db.cerrar_conexiones()
+    db.DB_PATH = original
+    for cache in (CATALOGO, STOCK, USUARIOS):
+        cache.invalidar()
@@ -0,0 +1,12 @@
+# tests/test_auth.py
+"""Permisos por rol."""
+from JoyApp.auth import PERMISOS_POR_ROL, Sesion
+
+
+def test_materiales_solo_para_el_jefe():
+    assert Sesion.de(1, "jefe", "JEFE").puede("materiales")
+    assert not Sesion.de(2, "vendedor", "VENDEDOR").puede("materiales")
+
+
+def test_el_vendedor_tiene_todo_lo_demas():
+    assert PERMISOS_POR_ROL["VENDEDOR"] == PERMISOS_POR_ROL["JEFE"] - {"materiales"}
@@ -0,0 +1,73 @@
+# tests/test_catalogo.py
+"""Catálogo en memoria: etiquetas únicas y recargas que no rearman el índice sin necesidad."""
+import sqlite3
+import threading
+
+import pytest
+
+from JoyApp import models
+from JoyApp.catalogo import CATALOGO, Material, etiquetas_unicas
+
+
+def _material(id_, nombre, ley):
+    return Material(id_, nombre, ley, "Oro", 400000.0, 500000.0, 10.0, 1)
+
+
+def test_etiquetas_sin_repetir_quedan_igual():
+    pares = etiquetas_unicas([_material(1, "Anillo", "750"), _material(2, "Cadena", "")])
+    assert [etq for _, etq in pares] == ["Anillo 750", "Cadena"]
+
+
+def test_etiquetas_repetidas_llevan_id():
+    materiales = [_material(7, "Anillo", "750"), _material(3, "Anillo", "750"), _material(5, "Anillo", "585")]
+    pares = etiquetas_unicas(materiales)
+    assert [etq for _, etq in pares] == ["Anillo 750 #7", "Anillo 750 #3", "Anillo 585"]
+    por_etiqueta = {etq: m for m, etq in pares}
+    assert len(por_etiqueta) == len(materiales)
+    assert por_etiqueta["Anillo 750 #3"].id == 3
+
+
+@pytest.fixture
+def catalogo(base_temporal, monkeypatch):
+    monkeypatch.setattr(CATALOGO, "intervalo", 0)  # chequear data_version en cada lectura
+    mid = models.guardar_material("Prueba", "750", "Oro", 400000, 500000, stock_gramos=5.0)
+    return base_temporal, mid
+
+
+def _en_otro_hilo(fn):
+    # Como la app: las escrituras van por otra conexión (pool de tareas, cola de impresión)
+    hilo = threading.Thread(target=fn)
+    hilo.start()
+    hilo.join()
+
+
+def test_escritura_en_otra_tabla_no_recarga(catalogo):
+    ruta, _mid = catalogo
+    indice, _ = CATALOGO.indice_y_etiquetas()
+    version = CATALOGO.version
+    otra = sqlite3.connect(ruta)
+    with otra:
+        otra.execute("INSERT INTO configuracion (clave, valor) VALUES ('prueba', '1')")
+    otra.close()
+    assert CATALOGO.indice_y_etiquetas()[0] is indice
+    assert CATALOGO.version == version
+
+
+def test_venta_actualiza_stock_sin_rearmar_el_indice(catalogo):
+    _ruta, mid = catalogo
+    indice, _ = CATALOGO.indice_y_etiquetas()
+    item = {"material_id": mid, "descripcion": "Prueba 750", "peso_gramos": 1.0, "precio_por_gramo": 500000,
+            "cantidad": 1, "subtotal": 500000, "tipo": "MATERIAL"}
+    _en_otro_hilo(lambda: models.crear_venta(1, "MENOR", [item], [{"metodo": "EFECTIVO", "monto": 500000}]))
+    nuevo, por_etiqueta = CATALOGO.indice_y_etiquetas()
+    assert nuevo is indice
+    assert por_etiqueta["Prueba 750"].stock == pytest.approx(4.0)
+
+
+def test_cambio_de_nombre_rearma_el_indice(catalogo):
+    _ruta, mid = catalogo
+    indice, _ = CATALOGO.indice_y_etiquetas()
+    _en_otro_hilo(lambda: models.guardar_material("Otro", "750", "Oro", 400000, 500000, stock_gramos=5.0, material_id=mid))
+    nuevo, por_etiqueta = CATALOGO.indice_y_etiquetas()
+    assert nuevo is not indice
+    assert "Otro 750" in por_etiqueta and "Prueba 750" not in por_etiqueta
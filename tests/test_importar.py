@@ -0,0 +1,60 @@
+# tests/test_importar.py
+"""Importación masiva: control de stock y reporte de errores por venta."""
+import pytest
+
+from JoyApp import models
+from JoyApp.db import get_conn
+from JoyApp.stock import STOCK
+
+
+@pytest.fixture
+def material(base_temporal):
+    """Material nuevo con 0.3 g de stock."""
+    mid = models.guardar_material("Prueba", "750", "Oro", 400000, 500000, stock_gramos=0.3)
+    vendedor = get_conn().execute("SELECT username FROM usuarios ORDER BY id").fetchone()[0]
+    return mid, vendedor
+
+
+def _venta(ref, vendedor, mid, peso):
+    return {"ref": ref, "fecha": "2025-03-01 10:00", "vendedor": vendedor, "modalidad": "MENOR",
+            "metodo": "EFECTIVO", "items": [{"material_id": mid, "peso_gramos": peso}]}
+
+
+def _stock(mid):
+    return get_conn().execute("SELECT stock_gramos FROM materiales WHERE id=?", (mid,)).fetchone()[0]
+
+
+def test_gramos_que_suman_justo_el_stock(material):
+    mid, vendedor = material
+    res = models.importar_ventas([_venta(1, vendedor, mid, 0.1), _venta(2, vendedor, mid, 0.2)])
+    assert res.errores == []
+    assert [ref for ref, _ in res.importadas] == [1, 2]
+    assert _stock(mid) == pytest.approx(0.0)
+
+
+def test_lote_fallido_reporta_solo_las_ventas_sin_stock(material, monkeypatch):
+    mid, vendedor = material
+    # El control previo ve stock de sobra (como si otra terminal lo tomara después)
+    monkeypatch.setattr(STOCK, "leer_varios", lambda ids: {m: 10.0 for m in ids})
+    ventas = [_venta(1, vendedor, mid, 0.1), _venta(2, vendedor, mid, 0.2), _venta(3, vendedor, mid, 0.1)]
+    res = models.importar_ventas(ventas)
+    assert [ref for ref, _ in res.importadas] == [1, 2]
+    assert [ref for ref, _ in res.errores] == [3]
+    assert _stock(mid) == pytest.approx(0.0)
+
+
+def test_csv_sin_pagos_ni_metodo_es_un_error(material, tmp_path):
+    from JoyApp.importar import importar_archivo
+
+    mid, vendedor = material
+    ruta = tmp_path / "ventas.csv"
+    ruta.write_text(
+        "ref,fecha,vendedor,modalidad,pagos,metodo,material_id,peso_gramos\n"
+        f"A,2025-03-01,{vendedor},MENOR,,,{mid},0.1\n"
+        f"B,2025-03-01,{vendedor},MENOR,,TARJETA,{mid},0.1\n",
+        encoding="utf-8",
+    )
+    res = importar_archivo(ruta)
+    assert [ref for ref, _ in res.importadas] == ["B"]
+    assert [ref for ref, _ in res.errores] == ["A"]
+    assert "sin pagos" in res.errores[0][1]
@@ -0,0 +1,38 @@
+# tests/test_nueva_venta.py
+"""Humo de la pantalla de venta: se arma sobre una copia de la base (necesita pantalla para Tk)."""
+import tkinter as tk
+from types import SimpleNamespace
+
+import pytest
+
+from JoyApp.auth import Sesion
+from JoyApp.catalogo import CATALOGO
+
+
+@pytest.fixture
+def raiz():
+    try:
+        r = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"sin pantalla para Tk: {e}")
+    r.withdraw()
+    yield r
+    r.destroy()
+
+
+def test_nueva_venta_se_construye(base_temporal, raiz):
+    from JoyApp.ui.nueva_venta import NuevaVenta
+
+    ui = NuevaVenta(tk.Toplevel(raiz), Sesion.de(1, "admin", "JEFE"))
+    etiquetas = [etq for _id, etq in ui.indice.entradas]
+    assert len(etiquetas) == len(CATALOGO.activos())
+    assert list(ui.cbo_mat["values"]) == etiquetas[:NuevaVenta.MAX_SUGERENCIAS]
+    ui.cbo_mat.set(etiquetas[0])
+    assert ui._material_seleccionado().id == ui.indice.entradas[0][0]
+
+
+def test_dashboard_abre_nueva_venta(base_temporal, raiz):
+    from JoyApp.ui.dashboard import Dashboard
+
+    # open_nueva_venta solo usa master y user
+    Dashboard.open_nueva_venta(SimpleNamespace(master=raiz, user=Sesion.de(1, "admin", "JEFE")))
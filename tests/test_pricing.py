@@ -0,0 +1,102 @@
+# tests/test_pricing.py
+"""
+Propiedades de pricing.precios_materiales contra valores calculados a mano,
+contra un cálculo exacto con Fraction y contra la fórmula en float que se
+usaba antes (ceil/round).
+"""
+import random
+from decimal import Decimal
+from fractions import Fraction
+from math import ceil
+
+import pytest
+
+from JoyApp.pricing import MAYOR, MENOR, REDONDEO_MENOR, precio_gramo_aplicado, precio_material, precios_materiales
+
+CASOS = 20000
+
+
+def _precio_material_anterior(precio_gramo, peso_gramos, modalidad) -> int:
+    """La fórmula original, en float."""
+    if modalidad == MENOR:
+        precio_aj = ceil(precio_gramo / 1000) * 1000
+    else:
+        precio_aj = precio_gramo
+    return int(round(precio_aj * float(peso_gramos)))
+
+
+def _lineas(semilla: int, n: int = CASOS):
+    """(precio por gramo, gramos, modalidad) como los carga la app: Gs enteros o con centavos, gramos con hasta 3 decimales."""
+    rnd = random.Random(semilla)
+    lineas = []
+    for _ in range(n):
+        precio = rnd.randint(1000, 900000)
+        if rnd.random() < 0.2:
+            precio = round(precio + rnd.random(), 2)
+        gramos = round(rnd.uniform(0.01, 250), rnd.choice((1, 2, 3)))
+        lineas.append((precio, gramos, rnd.choice((MAYOR, MENOR))))
+    return lineas
+
+
+def _precio_exacto(precio_gramo, peso_gramos, modalidad) -> int:
+    """Referencia independiente de pricing: aritmética exacta y mitad al par (round de Fraction)."""
+    precio = Fraction(str(precio_gramo))
+    if modalidad == MENOR:
+        precio = ceil(precio / REDONDEO_MENOR) * REDONDEO_MENOR
+    return round(precio * Fraction(str(peso_gramos)))
+
+
+def _es_empate(precio, gramos, modalidad) -> bool:
+    """¿El producto exacto cae justo en ,5 Gs?"""
+    exacto = precio_gramo_aplicado(precio, modalidad) * Decimal(str(gramos))
+    return exacto - exacto.to_integral_value(rounding="ROUND_FLOOR") == Decimal("0.5")
+
+
+# (precio por gramo, gramos, modalidad) -> subtotal, calculados a mano
+CASOS_A_MANO = [
+    ((525000, 2.5, MENOR), 1312500),      # ya es múltiplo de 1000
+    ((525001, 1, MENOR), 526000),         # MENOR sube al próximo múltiplo
+    ((999.99, 1, MENOR), 1000),
+    ((1001, 0.5, MENOR), 1000),           # 2000 × 0,5
+    ((9500.5, 3.1, MAYOR), 29452),        # 29451,55
+    ((420000, 0.001, MAYOR), 420),
+    ((1001, 0.5, MAYOR), 500),            # 500,5: mitad al par baja
+    ((1003, 0.5, MAYOR), 502),            # 501,5: mitad al par sube
+    ((201850, 66.35, MAYOR), 13392748),   # 13392747,5
+]
+
+
+def test_lote_contra_valores_a_mano():
+    lineas = [linea for linea, _ in CASOS_A_MANO]
+    assert precios_materiales(lineas) == [esperado for _, esperado in CASOS_A_MANO]
+
+
+@pytest.mark.parametrize("semilla", [1, 2, 3])
+def test_lote_contra_calculo_exacto(semilla):
+    lineas = _lineas(semilla)
+    assert precios_materiales(lineas) == [_precio_exacto(*l) for l in lineas]
+
+
+@pytest.mark.parametrize("semilla", [1, 2, 3])
+def test_dentro_de_1_gs_de_la_formula_anterior_y_solo_en_empates(semilla):
+    lineas = _lineas(semilla)
+    for linea, nuevo in zip(lineas, precios_materiales(lineas)):
+        anterior = _precio_material_anterior(*linea)
+        assert abs(nuevo - anterior) <= 1, linea
+        if nuevo != anterior:
+            assert _es_empate(*linea), linea
+
+
+def test_empate_conocido():
+    # 201850 × 66.35 = 13392747,5 exacto: mitad al par da 13392748 (el float daba 13392747)
+    assert precio_material(201850, 66.35, MAYOR) == 13392748
+    assert _es_empate(201850, 66.35, MAYOR)
+
+
+@pytest.mark.parametrize("semilla", [1, 2, 3])
+def test_menor_redondea_al_alza_a_multiplos(semilla):
+    for precio, _gramos, _modalidad in _lineas(semilla, 5000):
+        aplicado = precio_gramo_aplicado(precio, MENOR)
+        assert aplicado % REDONDEO_MENOR == 0
+        assert Decimal(str(precio)) <= aplicado < Decimal(str(precio)) + REDONDEO_MENOR
+        assert precio_gramo_aplicado(precio, MAYOR) == Decimal(str(precio))
@@ -0,0 +1,37 @@
+# tests/test_printing.py
+"""Cola de impresión: ventas nuevas y reimpresiones salen por la misma impresora."""
+import pytest
+
+from JoyApp.db import get_conn
+from JoyApp.printing import ColaImpresion
+
+TICKET = ({"ticket_id": "1", "vendedor": "admin", "modalidad": "MENOR"},
+          [{"descripcion": "Anillo 750", "detalle": None, "subtotal": 1000}],
+          [{"metodo": "EFECTIVO", "monto": 1000}],
+          {"total": 1000})
+
+
+@pytest.fixture
+def cola(base_temporal, monkeypatch):
+    c = ColaImpresion(terminal="prueba")
+    monkeypatch.setattr(c, "iniciar", lambda: None)  # sin hilo: solo se mira lo encolado
+    return c
+
+
+def _modo(trabajo_id):
+    return get_conn().execute("SELECT modo FROM trabajos_impresion WHERE id=?", (trabajo_id,)).fetchone()[0]
+
+
+def test_sin_impresora_va_a_archivo(cola):
+    assert _modo(cola.encolar(*TICKET, venta_id=1)) == "archivo"
+
+
+def test_con_impresora_venta_y_reimpresion_van_a_la_termica(cola):
+    cola.escpos_device = object()
+    assert _modo(cola.encolar(*TICKET, venta_id=1)) == "escpos"
+    assert _modo(cola.reimprimir(1)) == "escpos"
+
+
+def test_modo_explicito_se_respeta(cola):
+    cola.escpos_device = object()
+    assert _modo(cola.encolar(*TICKET, venta_id=1, modo="archivo")) == "archivo"